@@ -0,0 +1,79 @@
+# account_cache.py
+
+import time
+import threading
+from request_budget import NORMAL
+
+# ==============================================================================
+# 💼 계좌 상태 캐시 (포지션 / 잔고)
+# ==============================================================================
+# fetch_positions / fetch_balance 응답을 TTL 동안 메인 루프와 텔레그램 스레드가 공유한다.
+# 같은 항목을 동시에 요청하면 한 스레드만 거래소를 호출하고 나머지는 그 결과를 받는다.
+# 단, 조회 중인 스레드보다 우선순위가 높은 호출자(예: 청산 직전 CRITICAL 조회)는 기다리지 않고 직접 조회한다
+# (저순위 조회는 요청 예산 대기로 최대 1분 가까이 락을 잡을 수 있으므로).
+# 우리가 낸 주문/체결은 invalidate()로 즉시 무효화해야 한다. TTL은 주입된 시계 기준 (페이퍼/재생은 시뮬레이션 시간).
+
+class AccountCache:
+    def __init__(self, exchange, ttl=2.0, clock=None, budget=None):
+        self.exchange = exchange
+        self.ttl = ttl
+        self.clock = clock or time
+        self.budget = budget        # 호출 스레드 우선순위 확인용 (None이면 모두 NORMAL)
+        self._state_lock = threading.Lock() # 값/시각 갱신 (네트워크 대기 중에는 잡지 않음)
+        self._entries = {
+            key: {"lock": threading.Lock(), "method": method, "value": None, "at": 0.0, "valid_from": 0.0, "holder": None}
+            for key, method in (("positions", "fetch_positions"), ("balance", "fetch_balance"))
+        }
+
+    def positions(self, max_age=None):
+        """fetch_positions 결과 (max_age초보다 오래된 캐시면 새로 조회, 0이면 항상 조회)"""
+        return self._get("positions", self.exchange.fetch_positions, max_age)
+
+    def balance(self, max_age=None):
+        """fetch_balance 결과 (max_age초보다 오래된 캐시면 새로 조회, 0이면 항상 조회)"""
+        return self._get("balance", self.exchange.fetch_balance, max_age)
+
+    def invalidate(self):
+        """주문/체결 후 호출 -> 다음 조회는 반드시 거래소에서 새로 가져옴 (진행 중인 이전 조회 결과도 버림)"""
+        now = self.clock.time()
+        with self._state_lock:
+            for entry in self._entries.values():
+                entry["at"] = 0.0
+                entry["valid_from"] = now
+
+    def _priority(self, method):
+        return self.budget.current_priority(method) if self.budget is not None else NORMAL
+
+    def _get(self, key, fetcher, max_age):
+        ttl = self.ttl if max_age is None else max_age
+        entry = self._entries[key]
+        priority = self._priority(entry["method"])
+        requested_at = self.clock.time()
+
+        lock = entry["lock"]
+        if not lock.acquire(blocking=False):
+            holder = entry["holder"]
+            if holder is not None and priority < holder:
+                # 저순위 스레드가 예산 대기 중일 수 있으므로 기다리지 않고 직접 조회
+                return self._fetch(entry, fetcher)
+            lock.acquire()
+        try:
+            entry["holder"] = priority
+            with self._state_lock:
+                # 락을 기다리는 동안 다른 스레드가 요청 이후에 새로 받아왔다면 그 결과를 그대로 사용
+                if entry["value"] is not None and (entry["at"] >= requested_at or self.clock.time() - entry["at"] < ttl):
+                    return entry["value"]
+            return self._fetch(entry, fetcher)
+        finally:
+            entry["holder"] = None
+            lock.release()
+
+    def _fetch(self, entry, fetcher):
+        """거래소 조회 후 캐시 갱신 (조회 시작 시각 기준 - 더 최신 결과나 무효화 이전 조회는 덮어쓰지 않음)"""
+        started = self.clock.time()
+        value = fetcher()
+        with self._state_lock:
+            if started >= entry["at"] and started >= entry["valid_from"]:
+                entry["value"] = value
+                entry["at"] = started
+        return value
@@ -0,0 +1,200 @@
+# api_metrics.py
+
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# ==============================================================================
+# ⏱️ API 지연/오류 계측
+# ==============================================================================
+# 엔드포인트별로 최근 WINDOW건의 응답 시간(p50/p95/p99), 호출 수, 오류 수,
+# ccxt 레이트리밋 대기 시간을 기록한다. 거래소 호출은 InstrumentedExchange로,
+# 텔레그램 HTTP 호출은 metrics.timed()/record()로 계측한다.
+
+WINDOW = 1000               # 엔드포인트별 보관하는 최근 응답 시간 개수
+
+def _percentile(sorted_values, pct):
+    """정렬된 리스트의 nearest-rank 백분위수"""
+    if not sorted_values: return 0.0
+    idx = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[idx]
+
+class ApiMetrics:
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def _endpoint(self, name):
+        ep = self._endpoints.get(name)
+        if ep is None:
+            ep = {"latencies": deque(maxlen=self.window), "count": 0, "errors": 0,
+                  "rate_limit_waits": 0, "rate_limit_wait_sec": 0.0, "last_error": None}
+            self._endpoints[name] = ep
+        return ep
+
+    def record(self, name, latency, error=None):
+        """호출 1건 기록 (latency: 초, error: 실패 시 예외/메시지)"""
+        with self._lock:
+            ep = self._endpoint(name)
+            ep["count"] += 1
+            ep["latencies"].append(latency)
+            if error is not None:
+                ep["errors"] += 1
+                ep["last_error"] = str(error)[:200]
+
+    def record_wait(self, name, wait):
+        """레이트리밋으로 대기한 시간 기록 (초)"""
+        with self._lock:
+            ep = self._endpoint(name)
+            ep["rate_limit_waits"] += 1
+            ep["rate_limit_wait_sec"] += wait
+
+    @contextmanager
+    def timed(self, name):
+        """with metrics.timed("telegram.sendMessage"): ... 형태로 블록 소요 시간 기록"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.record(name, time.perf_counter() - start, e)
+            raise
+        self.record(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        """엔드포인트별 통계 (ms 단위) 딕셔너리"""
+        with self._lock:
+            items = [(name, sorted(ep["latencies"]), dict(ep)) for name, ep in self._endpoints.items()]
+
+        stats = {}
+        for name, lat, ep in items:
+            stats[name] = {
+                "count": ep["count"],
+                "errors": ep["errors"],
+                "p50_ms": round(_percentile(lat, 50) * 1000, 1),
+                "p95_ms": round(_percentile(lat, 95) * 1000, 1),
+                "p99_ms": round(_percentile(lat, 99) * 1000, 1),
+                "max_ms": round((lat[-1] if lat else 0.0) * 1000, 1),
+                "rate_limit_waits": ep["rate_limit_waits"],
+                "rate_limit_wait_ms": round(ep["rate_limit_wait_sec"] * 1000, 1),
+                "last_error": ep["last_error"],
+            }
+        return stats
+
+    def format_report(self):
+        """텔레그램 /latency 응답용 요약 (HTML)"""
+        stats = self.snapshot()
+        if not stats:
+            return "⏱️ <b>[API 지연]</b>\n기록된 호출 없음"
+
+        uptime_min = (time.time() - self.started_at) / 60
+        msg = f"⏱️ <b>[API 지연]</b> (가동 {uptime_min:,.0f}분, 최근 {self.window}건 기준)\n"
+        msg += "<code>엔드포인트 / 호출 / 오류 / p50 / p95 / p99 (ms)</code>\n"
+        for name in sorted(stats, key=lambda n: -stats[n]["p95_ms"]):
+            s = stats[name]
+            msg += (f"<code>{name}</code> {s['count']} / {s['errors']} / "
+                    f"{s['p50_ms']:.0f} / {s['p95_ms']:.0f} / {s['p99_ms']:.0f}")
+            if s["rate_limit_waits"]:
+                msg += f" (대기 {s['rate_limit_waits']}회 {s['rate_limit_wait_ms']:.0f}ms)"
+            msg += "\n"
+        return msg
+
+    def dump(self, path):
+        """통계를 JSON 파일로 저장 (임시 파일 후 교체)"""
+        data = {"time": time.time(), "started_at": self.started_at, "endpoints": self.snapshot()}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+
+# 프로세스 전체에서 공유하는 계측기
+metrics = ApiMetrics()
+
+# 계측 대상 메서드 접두사 (amount_to_precision 등 로컬 계산 메서드는 제외)
+INSTRUMENTED_PREFIXES = ("fetch_", "create_", "cancel_", "edit_", "set_", "load_markets")
+LOCAL_METHODS = {"set_markets", "set_sandbox_mode", "set_headers"} # 네트워크 요청이 없는 메서드
+RECORDED_LOCAL_METHODS = {"amount_to_precision", "price_to_precision"} # 계측하지 않지만 녹화는 하는 로컬 메서드
+
+class InstrumentedExchange:
+    """ccxt 거래소 객체를 감싸 API 메서드 호출마다 지연/오류/레이트리밋 대기를 기록하는 프록시
+
+    budget(request_budget.RequestBudget)을 주면 호출 전에 가중치 예산을 받고, 응답 헤더로 사용량을 보정한다.
+    recorder(market_recorder.MarketRecorder)를 붙이면 모든 응답/오류를 전송 시각과 함께 녹화한다.
+    """
+
+    def __init__(self, exchange, prefix="binance", metrics_obj=None, budget=None, recorder=None):
+        object.__setattr__(self, "_exchange", exchange)
+        object.__setattr__(self, "_prefix", prefix)
+        object.__setattr__(self, "_metrics", metrics_obj or metrics)
+        object.__setattr__(self, "_budget", budget)
+        object.__setattr__(self, "_recorder", recorder)
+        object.__setattr__(self, "_current", threading.local())
+
+        # ccxt 내부 throttle()을 감싸 현재 호출 중인 엔드포인트의 대기 시간으로 기록
+        original_throttle = exchange.throttle
+        def throttle(cost=None):
+            start = time.perf_counter()
+            original_throttle(cost)
+            waited = time.perf_counter() - start
+            if waited > 0.001:
+                name = getattr(self._current, "name", None) or f"{prefix}.unknown"
+                self._metrics.record_wait(name, waited)
+        exchange.throttle = throttle
+
+    def attach_recorder(self, recorder):
+        """응답 녹화기 연결/해제 (None) - 이미 만들어진 래퍼에도 바로 적용됨"""
+        object.__setattr__(self, "_recorder", recorder)
+
+    def __getattr__(self, name):
+        attr = getattr(self._exchange, name)
+        if callable(attr) and name in RECORDED_LOCAL_METHODS:
+            def local_wrapper(*args, **kwargs):
+                result = attr(*args, **kwargs)
+                recorder = self._recorder
+                if recorder is not None: recorder.record(name, args, kwargs, recorder.now_ms(), result)
+                return result
+            object.__setattr__(self, name, local_wrapper)
+            return local_wrapper
+        if not callable(attr) or not name.startswith(INSTRUMENTED_PREFIXES) or name in LOCAL_METHODS:
+            return attr
+
+        endpoint = f"{self._prefix}.{name}"
+        current = self._current
+        record = self._metrics.record
+        budget = self._budget
+        exchange = self._exchange
+        def wrapper(*args, **kwargs):
+            sent_at = None
+            if budget is not None:
+                waited = budget.acquire(name, args, kwargs)
+                if waited > 0:
+                    self._metrics.record_wait(endpoint, waited)
+                sent_at = budget.clock.time()
+            recorder = self._recorder
+            sent_ms = recorder.now_ms() if recorder is not None else None
+            current.name = endpoint
+            start = time.perf_counter()
+            try:
+                result = attr(*args, **kwargs)
+            except Exception as e:
+                record(endpoint, time.perf_counter() - start, e)
+                if budget is not None: budget.observe(exchange, e, sent_at)
+                if recorder is not None: recorder.record(name, args, kwargs, sent_ms, error=e)
+                raise
+            finally:
+                current.name = None
+            record(endpoint, time.perf_counter() - start)
+            if budget is not None: budget.observe(exchange, None, sent_at)
+            if recorder is not None: recorder.record(name, args, kwargs, sent_ms, result)
+            return result
+
+        # 다음 접근부터는 __getattr__을 거치지 않도록 프록시에 캐시
+        object.__setattr__(self, name, wrapper)
+        return wrapper
+
+    def __setattr__(self, name, value):
+        setattr(self._exchange, name, value)
@@ -3,42 +3,57 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import time
+import os
+import shutil
+import tempfile
+import argparse
+import multiprocessing
+import candle_cache
+import backtest_metrics
+from scheduler import parse_timeframe
 
 # ===============================================================
 # [설정] 파라미터 범위 지정
 # ===============================================================
 SYMBOLS = ["BTC/USDT", "ETH/USDT", "SOL/USDT", "XRP/USDT"]
-TIMEFRAMES = ["6h", "12h", "1d"]  # 비교할 시간대
+TIMEFRAMES = ["6h", "12h", "1d"]  # 비교할 시간대 (BASE_TIMEFRAME의 배수면 무엇이든 가능: 4h, 8h, 2d ...)
+BASE_TIMEFRAME = "1h"       # 실제로 수집/캐시하는 기준 해상도 (상위 타임프레임은 로컬에서 리샘플링)
 K_VALUES = [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]   # 비교할 K값
 FETCH_DAYS = 365            # 2년치 데이터
 TOTAL_CAPITAL = 10000.0
 LEVERAGE = 3.0
 FEE_RATE = 0.0004
 FUNDING_RATE = 0.0001
+OFFLINE = False             # True: 네트워크 없이 로컬 캐시(data_cache/)만 사용
+WORKERS = 1                 # 그리드 병렬 워커 수 (1이면 직렬 실행)
 
-def fetch_all_data(symbols, timeframes, days):
-    """모든 코인, 모든 타임프레임의 데이터를 미리 수집"""
-    binance = ccxt.binance()
-    all_data = {}
+def fetch_all_data(symbols, timeframes, days, offline=OFFLINE, base_timeframe=BASE_TIMEFRAME):
+    """모든 코인의 기준 해상도 데이터를 수집하고 각 타임프레임으로 리샘플링 (로컬 캐시 + 신규 봉만 추가 수집)
+
+    offline=True면 네트워크 없이 캐시만 사용하며, 기간은 캐시의 마지막 봉 기준으로 자른다.
+    """
+    binance = None if offline else ccxt.binance()
+    all_data = {tf: {} for tf in timeframes}
+    # 가장 긴 봉도 구간 시작 봉이 온전히 만들어지도록 그만큼 앞에서부터 기준 봉 수집
+    lead_ms = max(parse_timeframe(tf) for tf in timeframes) * 1000
     
-    print(f"📡 데이터 수집 시작 (기간: {days}일, 대상: {len(symbols)}개 코인)")
+    mode = "오프라인 캐시" if offline else "캐시 + 신규 봉 수집"
+    print(f"📡 데이터 수집 시작 (기간: {days}일, 대상: {len(symbols)}개 코인, 기준 {base_timeframe}, {mode})")
     
-    for tf in timeframes:
-        all_data[tf] = {}
-        for sym in symbols:
-            print(f"   ㄴ 수집중: {sym} [{tf}]...", end="\r")
-            
-            since = binance.milliseconds() - (days * 24 * 60 * 60 * 1000)
-            ohlcv_list = []
-            while since < binance.milliseconds():
-                data = binance.fetch_ohlcv(sym, tf, since, limit=1000)
-                if not data: break
-                since = data[-1][0] + 1
-                ohlcv_list += data
-                time.sleep(0.1) # API 제한 방지
+    for sym in symbols:
+        print(f"   ㄴ 수집중: {sym} [{base_timeframe}]...", end="\r")
+        now_ms = int(time.time() * 1000) if offline else binance.milliseconds()
+        since = now_ms - (days * 24 * 60 * 60 * 1000)
+        base = candle_cache.update_candles(binance, sym, base_timeframe, since - lead_ms, offline=offline)
+        if offline and len(base) > 0:
+            since = base[-1, 0] - (days * 24 * 60 * 60 * 1000)
+
+        for tf in timeframes:
+            candles = candle_cache.resampled_candles(sym, tf, base, base_timeframe)
+            candles = candles[candles[:, 0] >= since]
             
-            df = pd.DataFrame(ohlcv_list, columns=['datetime', 'open', 'high', 'low', 'close', 'volume'])
-            df['datetime'] = pd.to_datetime(df['datetime'], unit='ms')
+            df = pd.DataFrame(np.asarray(candles), columns=candle_cache.COLUMNS)
+            df['datetime'] = pd.to_datetime(df['datetime'].astype(np.int64), unit='ms')
             df.set_index('datetime', inplace=True)
             
             # 기본 지표 계산 (Range)
@@ -230,8 +245,57 @@ def fetch_all_data(symbols, timeframes, days):
         
 #     return equity_curve
 
+def build_market_matrix(data_map):
+    """심볼별 DataFrame을 공통 시간축 기준 (시간 x 심볼) 배열로 변환"""
+    sample_df = list(data_map.values())[0]
+    time_index = sample_df.index
+
+    # 공통 시간축에 없는 봉은 NaN -> 진입 조건이 False가 되어 슬롯 자금 유지
+    mats = {}
+    for col in ('open', 'high', 'low', 'close', 'range'):
+        mats[col] = np.column_stack([
+            df[col].reindex(time_index).to_numpy(dtype=np.float64)
+            for df in data_map.values()
+        ])
+    return time_index, mats
+
+def compute_bar_factors(k, mats, leverage=LEVERAGE, fee_rate=FEE_RATE, funding_rate=FUNDING_RATE):
+    """봉/코인별 슬롯 자금 증감 배율(1 + 수익률)과 진입 여부를 배열 연산으로 계산"""
+    target_long = mats['open'] + mats['range'] * k
+    with np.errstate(invalid='ignore'):
+        entry = mats['high'] > target_long
+
+    # 미진입 칸은 0 나눗셈 방지용 더미 가격 사용 (결과는 np.where로 버림)
+    entry_p = np.where(entry, target_long, 1.0)
+    exit_p = mats['close']
+
+    # amount = 슬롯자금 * 레버리지 / 진입가 -> 슬롯자금 대비 비율로 정리
+    pnl = exit_p - entry_p
+    fee = (entry_p + exit_p) * fee_rate
+    fund = entry_p * funding_rate
+    with np.errstate(invalid='ignore'):
+        growth = leverage * (pnl - fee - fund) / entry_p
+
+    factors = np.where(entry, 1.0 + growth, 1.0)
+    return factors, entry
+
+def run_vectorized_backtest(k, mats, leverage=LEVERAGE, fee_rate=FEE_RATE, funding_rate=FUNDING_RATE):
+    """(시간 x 심볼) 배열로 자산 곡선 계산 - 매 봉 전체 자산을 코인 수로 균등 재분배(복리)"""
+    curve, _ = run_vectorized_with_exposure(k, mats, leverage, fee_rate, funding_rate)
+    return curve
+
+def run_vectorized_with_exposure(k, mats, leverage=LEVERAGE, fee_rate=FEE_RATE, funding_rate=FUNDING_RATE):
+    """자산 곡선과 봉별 투입 비율(진입한 슬롯 / 전체 슬롯) - 승률/노출/회전율 지표용"""
+    factors, entry = compute_bar_factors(k, mats, leverage, fee_rate, funding_rate)
+    return TOTAL_CAPITAL * np.cumprod(factors.mean(axis=1)), entry.mean(axis=1)
+
 def run_single_backtest(tf, k, data_map):
-    """특정 TF와 K값으로 백테스트 수행 (4개 코인 롱 전용 분산 투자)"""
+    """특정 TF와 K값으로 백테스트 수행 (4개 코인 롱 전용 분산 투자, 벡터 연산)"""
+    _, mats = build_market_matrix(data_map)
+    return run_vectorized_backtest(k, mats)
+
+def run_single_backtest_loop(tf, k, data_map):
+    """[참조용] 봉 단위 파이썬 루프 버전 (벡터 커널 검증용으로 유지)"""
     sample_df = list(data_map.values())[0]
     time_index = sample_df.index
     
@@ -278,73 +342,127 @@ def run_single_backtest(tf, k, data_map):
         
     return equity_curve
 
-def analyze_results(timeframes, k_values):
-    # 1. 데이터 준비
-    raw_data = fetch_all_data(SYMBOLS, TIMEFRAMES, FETCH_DAYS)
-    results = []
+def periods_per_year(tf):
+    """타임프레임의 연간 봉 수"""
+    return 365 * 86400 / parse_timeframe(tf)
 
-    print("\n🔄 시뮬레이션 진행 중...")
-    
-    # 2. 이중 루프 (Grid Search)
+def evaluate_curve(tf, k, curve):
+    """자산 곡선 1개의 성과 지표 계산"""
+    m = backtest_metrics.compute_metrics(curve, TOTAL_CAPITAL, FETCH_DAYS / 365.0, periods_per_year(tf))
+    return {
+        "TF": tf,
+        "K": k,
+        "Final Balance": m["Final Balance"][0],
+        "Return": m["Return"][0],
+        "CAGR": m["CAGR"][0],
+        "MDD": m["MDD"][0],
+        "Score (Calmar)": m["Score (Calmar)"][0]
+    }
+
+def grid_metrics_table(cells, sort_by="Score (Calmar)"):
+    """그리드 결과 [(TF, K, 자산 곡선, 투입 비율)] -> 지표 결과표 (TF별로 한 번에 배열 계산)"""
+    frames = []
+    for tf in dict.fromkeys(cell[0] for cell in cells):
+        group = [cell for cell in cells if cell[0] == tf]
+        metrics = backtest_metrics.compute_metrics(
+            np.stack([cell[2] for cell in group]), TOTAL_CAPITAL, FETCH_DAYS / 365.0, periods_per_year(tf),
+            exposure=np.stack([cell[3] for cell in group]), leverage=LEVERAGE)
+        frames.append(backtest_metrics.metrics_table([{"TF": tf, "K": cell[1]} for cell in group], metrics, sort_by=None))
+    df = pd.concat(frames, ignore_index=True)
+    return backtest_metrics.sort_table(df, sort_by) if sort_by else df
+
+def run_grid_serial(raw_data, timeframes, k_values):
+    """TF x K 그리드를 단일 코어에서 순서대로 실행 -> [(TF, K, 자산 곡선, 투입 비율)]"""
+    results = []
     for tf in timeframes:
-        # 해당 TF의 데이터만 추출
-        tf_data = raw_data[tf]
+        # 시간 x 심볼 배열은 TF당 한 번만 생성하여 모든 K에 재사용
+        _, mats = build_market_matrix(raw_data[tf])
         
         for k in k_values:
             print(f"   👉 Testing: Timeframe=[{tf}] / K=[{k}]...", end="\r")
+            curve, exposure = run_vectorized_with_exposure(k, mats)
+            results.append((tf, k, curve, exposure))
+    return results
+
+# ===============================================================
+# [병렬 그리드] 프로세스 풀 + 메모리 매핑 데이터
+# ===============================================================
+# TF별 (컬럼 x 시간 x 심볼) 배열을 임시 .npy 파일에 한 번 저장하고,
+# 워커는 np.load(mmap_mode='r')로 같은 페이지 캐시를 공유한다 (DataFrame pickle 없음).
+MATRIX_COLUMNS = ('open', 'high', 'low', 'close', 'range')
+_worker_mats = {}
+
+def _init_grid_worker(matrix_files):
+    """워커 시작 시 TF별 메모리 매핑 배열 연결"""
+    for tf, path in matrix_files.items():
+        stacked = np.load(path, mmap_mode='r')
+        _worker_mats[tf] = {col: stacked[i] for i, col in enumerate(MATRIX_COLUMNS)}
+
+def _run_grid_cell(task):
+    """그리드 셀 1개 실행 (워커 프로세스)"""
+    idx, tf, k = task
+    curve, exposure = run_vectorized_with_exposure(k, _worker_mats[tf])
+    return idx, (tf, k, curve, exposure)
+
+def run_grid_parallel(raw_data, timeframes, k_values, workers=WORKERS):
+    """TF x K 그리드를 프로세스 풀에서 실행하고 끝나는 순서대로 결과 수신"""
+    tmp_dir = tempfile.mkdtemp(prefix="grid_")
+    try:
+        matrix_files = {}
+        for tf in timeframes:
+            _, mats = build_market_matrix(raw_data[tf])
+            path = os.path.join(tmp_dir, f"{tf}.npy")
+            np.save(path, np.stack([mats[col] for col in MATRIX_COLUMNS]))
+            matrix_files[tf] = path
+
+        tasks = [(tf, k) for tf in timeframes for k in k_values]
+        tasks = [(i, tf, k) for i, (tf, k) in enumerate(tasks)]
+        results = [None] * len(tasks)
+
+        with multiprocessing.Pool(workers, initializer=_init_grid_worker, initargs=(matrix_files,)) as pool:
+            for done, (idx, row) in enumerate(pool.imap_unordered(_run_grid_cell, tasks), start=1):
+                results[idx] = row
+                print(f"   👉 완료 {done}/{len(tasks)}: Timeframe=[{row[0]}] / K=[{row[1]}]   ", end="\r")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    # 직렬 실행과 같은 순서로 정렬해 결과표가 완전히 동일하도록 유지
+    return results
+
+def analyze_results(timeframes, k_values, workers=WORKERS, sort_by="Score (Calmar)"):
+    # 1. 데이터 준비
+    raw_data = fetch_all_data(SYMBOLS, TIMEFRAMES, FETCH_DAYS, offline=OFFLINE)
+
+    print(f"\n🔄 시뮬레이션 진행 중... (워커 {workers}개)")
+    
+    # 2. 그리드 탐색 (TF x K)
+    if workers > 1:
+        results = run_grid_parallel(raw_data, timeframes, k_values, workers)
+    else:
+        results = run_grid_serial(raw_data, timeframes, k_values)
             
-            curve = run_single_backtest(tf, k, tf_data)
-            
-            # 성과 분석
-            final_equity = curve[-1]
-            total_ret = (final_equity - TOTAL_CAPITAL) / TOTAL_CAPITAL
-            
-            # CAGR
-            years = FETCH_DAYS / 365.0
-            cagr = (final_equity / TOTAL_CAPITAL) ** (1/years) - 1
-            
-            # MDD
-            s = pd.Series(curve)
-            peak = s.cummax()
-            drawdown = (s - peak) / peak
-            mdd = drawdown.min()
-            
-            # Calmar Ratio (수익/위험 비율)
-            calmar = cagr / abs(mdd) if mdd != 0 else 0
-            
-            results.append({
-                "TF": tf,
-                "K": k,
-                "Final Balance": final_equity,
-                "Return": total_ret * 100,
-                "CAGR": cagr * 100,
-                "MDD": mdd * 100,
-                "Score (Calmar)": calmar
-            })
-            
-    # 3. 결과 출력
-    df_res = pd.DataFrame(results)
-    # Score(칼마 비율) 순으로 정렬
-    df_res = df_res.sort_values(by="Score (Calmar)", ascending=False)
+    # 3. 결과 출력 (지표는 TF별로 전체 K를 한 번에 계산, sort_by 기준 정렬)
+    df_res = grid_metrics_table(results, sort_by)
     
-    print("\n\n" + "="*80)
-    print(f"🏆 전략 파라미터 비교 결과 (Top 5)")
-    print("="*80)
+    print("\n\n" + "="*120)
+    print(f"🏆 전략 파라미터 비교 결과 (정렬: {sort_by})")
+    print("="*120)
     # 보기 좋게 출력
-    print(df_res.to_string(index=False, formatters={
-        "Final Balance": "${:,.0f}".format,
-        "Return": "{:+.2f}%".format,
-        "CAGR": "{:+.2f}%".format,
-        "MDD": "{:.2f}%".format,
-        "Score (Calmar)": "{:.2f}".format
-    }))
-    print("="*80)
+    print(df_res.to_string(index=False, formatters=backtest_metrics.FORMATTERS))
+    print("="*120)
     
     # 최적 조합 추천
     best = df_res.iloc[0]
     print(f"\n✅ 추천 설정: 타임프레임 [{best['TF']}] / K값 [{best['K']}]")
-    print(f"   (이유: 수익률 대비 MDD가 가장 우수함)")
+    print(f"   (이유: {sort_by} 기준 최상위)")
 
 if __name__ == "__main__":
-    analyze_results(TIMEFRAMES, K_VALUES)
+    parser = argparse.ArgumentParser(description="변동성 돌파 전략 그리드 백테스트")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="병렬 워커 수 (1이면 직렬)")
+    parser.add_argument("--offline", action="store_true", help="네트워크 없이 로컬 캐시만 사용")
+    parser.add_argument("--sort", default="Score (Calmar)", choices=backtest_metrics.METRIC_COLUMNS, help="결과 정렬 기준 지표")
+    args = parser.parse_args()
+    if args.offline:
+        OFFLINE = True
+    analyze_results(TIMEFRAMES, K_VALUES, workers=args.workers, sort_by=args.sort)
 
@@ -0,0 +1,103 @@
+# backtest_metrics.py
+
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# 📐 자산 곡선 성과 지표 (그리드 전체 일괄 계산)
+# ==============================================================================
+# (그리드 셀 x 시간) 자산 곡선 배열을 받아 모든 셀의 지표를 한 번의 배열 연산으로 계산한다.
+# 셀마다 pd.Series를 만들지 않으므로 셀이 수천 개여도 지표 계산 비용은 시뮬레이션에 비해 작다.
+
+METRIC_COLUMNS = ["Final Balance", "Return", "CAGR", "MDD", "MDD Days", "Sharpe", "Sortino",
+                  "Score (Calmar)", "Win Rate", "Exposure", "Turnover"]
+
+# 정렬 시 작을수록 좋은 지표 (나머지는 클수록 좋음, MDD는 음수 %라 클수록 얕음)
+LOWER_IS_BETTER = {"MDD Days", "Turnover"}
+
+FORMATTERS = {
+    "Final Balance": "${:,.0f}".format,
+    "Return": "{:+.2f}%".format,
+    "CAGR": "{:+.2f}%".format,
+    "MDD": "{:.2f}%".format,
+    "MDD Days": "{:,.0f}".format,
+    "Sharpe": "{:.2f}".format,
+    "Sortino": "{:.2f}".format,
+    "Score (Calmar)": "{:.2f}".format,
+    "Win Rate": "{:.1f}%".format,
+    "Exposure": "{:.1f}%".format,
+    "Turnover": "{:,.0f}x".format,
+}
+
+def compute_metrics(curves, initial, years, periods_per_year, exposure=None, leverage=1.0, bar_days=None):
+    """자산 곡선 배열 -> 지표별 1-D 배열 딕셔너리 (퍼센트 지표는 % 단위)
+
+    curves: (셀 x 시간) 각 봉 종료 시점 자산, initial: 시작 자산
+    exposure: (셀 x 시간) 봉마다 포지션에 들어간 자금 비율 (0~1), 없으면 Win Rate/Exposure/Turnover는 NaN
+    leverage: 회전율 계산용 (진입 1회 = 진입 + 청산으로 증거금 x 레버리지 x 2 거래)
+    bar_days: 봉 1개의 일수 (MDD Days 계산용, 기본 365 / periods_per_year)
+    """
+    curves = np.atleast_2d(np.asarray(curves, dtype=np.float64))
+    n_cells, n_bars = curves.shape
+    bar_days = 365.0 / periods_per_year if bar_days is None else bar_days
+
+    final = curves[:, -1]
+    total_ret = final / initial - 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cagr = np.where(final > 0, (final / initial) ** (1 / years) - 1, -1.0)
+
+    # MDD / 최장 수중 기간 (시작 자산을 첫 고점으로 포함)
+    padded = np.concatenate([np.full((n_cells, 1), float(initial)), curves], axis=1)
+    peak = np.maximum.accumulate(padded, axis=1)
+    drawdown = padded / peak - 1
+    mdd = drawdown.min(axis=1)
+    steps = np.arange(n_bars + 1)
+    last_peak = np.maximum.accumulate(np.where(padded >= peak, steps, 0), axis=1)
+    mdd_days = (steps - last_peak).max(axis=1) * bar_days
+
+    # 봉 단위 수익률 기반 위험 조정 지표
+    returns = padded[:, 1:] / padded[:, :-1] - 1
+    mean = returns.mean(axis=1)
+    std = returns.std(axis=1)
+    downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2, axis=1))
+    scale = np.sqrt(periods_per_year)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe = np.where(std > 0, mean / std * scale, 0.0)
+        sortino = np.where(downside > 0, mean / downside * scale, 0.0)
+        calmar = np.where(mdd != 0, cagr / np.abs(mdd), 0.0)
+
+    if exposure is not None:
+        exposure = np.atleast_2d(np.asarray(exposure, dtype=np.float64))
+        active = exposure > 0
+        n_active = active.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            win_rate = np.where(n_active > 0, (active & (returns > 0)).sum(axis=1) / n_active, np.nan)
+        avg_exposure = exposure.mean(axis=1)
+        turnover = exposure.sum(axis=1) * 2 * leverage / years # 연간 거래대금 / 자산
+    else:
+        win_rate = avg_exposure = turnover = np.full(n_cells, np.nan)
+
+    return {
+        "Final Balance": final,
+        "Return": total_ret * 100,
+        "CAGR": cagr * 100,
+        "MDD": mdd * 100,
+        "MDD Days": mdd_days,
+        "Sharpe": sharpe,
+        "Sortino": sortino,
+        "Score (Calmar)": calmar,
+        "Win Rate": win_rate * 100,
+        "Exposure": avg_exposure * 100,
+        "Turnover": turnover,
+    }
+
+def sort_table(df, sort_by="Score (Calmar)"):
+    """좋은 순서로 정렬 (LOWER_IS_BETTER 지표는 오름차순)"""
+    return df.sort_values(by=sort_by, ascending=sort_by in LOWER_IS_BETTER, kind="stable")
+
+def metrics_table(labels, metrics, sort_by="Score (Calmar)"):
+    """셀 라벨(예: [{"TF": "6h", "K": 0.5}, ...])과 지표를 합친 결과표 (sort_by=None이면 정렬 안 함)"""
+    df = pd.DataFrame(labels)
+    for col in METRIC_COLUMNS:
+        df[col] = metrics[col]
+    return sort_table(df, sort_by) if sort_by else df
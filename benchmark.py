@@ -0,0 +1,304 @@
+# benchmark.py
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import datetime
+import multiprocessing
+import contextlib
+import numpy as np
+from datetime import timezone
+try:
+    import resource                         # 최대 RSS 측정 (Windows에는 없음)
+except ImportError:
+    resource = None
+
+# ==============================================================================
+# 🏁 벤치마크 (백테스트 커널 + 라이브 결정 루프)
+# ==============================================================================
+# 네트워크 없이 합성 캔들로 다음을 측정해 JSON 파일로 저장한다.
+#   - 백테스트: 캐시 로드/리샘플/DataFrame 구성(fetch_all_data 오프라인), 그리드 처리량
+#     (봉 x 심볼 x 그리드 셀 / 초), 지표 계산 시간, 수년치 데이터 전체 처리 시 최대 메모리(RSS)
+#   - 라이브 루프: 고정 지연(실제 sleep) 모의 거래소 위에서 check_entry / update_targets /
+#     close_all_positions 1회 소요 시간과, 같은 호출을 지연 0으로 실행한 봇 자체 처리 시간(_overhead)
+# --compare로 저장된 기준 결과와 비교해 THRESHOLD 이상 나빠진 항목을 표시하고 종료 코드 1을 반환한다.
+#   python benchmark.py --out bench.json
+#   python benchmark.py --out bench.json --compare benchmark_baseline.json --threshold 0.15
+
+THRESHOLD = 0.15            # 기준 대비 이 비율 이상 나빠지면 회귀로 판정
+REPEAT = 5                  # 시간 측정 반복 횟수 (최솟값 사용)
+NOISE_FLOOR_MS = 1.0        # ms 항목은 차이가 이보다 작으면 비율과 관계없이 회귀로 보지 않음 (측정 잡음)
+
+# ------------------------------------------------------------------
+# 측정 유틸
+# ------------------------------------------------------------------
+def best_of(fn, repeat=REPEAT):
+    """fn()을 repeat번 실행한 최소 소요 시간 (초) - 다른 프로세스의 간섭이 가장 적은 값"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def result(value, unit, better="lower"):
+    return {"value": float(value), "unit": unit, "better": better}
+
+@contextlib.contextmanager
+def quiet():
+    """진행 표시(print)와 INFO 로그 숨김"""
+    root = logging.getLogger()
+    level = root.level
+    root.setLevel(logging.WARNING)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        root.setLevel(level)
+
+def write_synthetic_cache(cache_dir, symbols, days, base_timeframe="1h", seed=0):
+    """기하 브라운 운동 기준 해상도 캔들을 캔들 캐시 형식으로 저장 (마지막 봉 = 현재 시각 직전)"""
+    import candle_cache
+    import mock_exchange
+    from scheduler import parse_timeframe
+    base_ms = parse_timeframe(base_timeframe) * 1000
+    n = int(days * 86400 * 1000 // base_ms)
+    end_ms = int(time.time() * 1000) // base_ms * base_ms
+    for i, sym in enumerate(symbols):
+        candles = mock_exchange.synthetic_candles(0, n, base_price=100.0 * (1 + i), vol=0.008, seed=seed + i)
+        candles[:, 0] = end_ms - (n - np.arange(n)) * base_ms
+        candle_cache.save_candles(sym, base_timeframe, candles, cache_dir)
+
+def _report_peak_rss(queue, fn, args):
+    fn(*args)
+    queue.put(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+def peak_rss_mb(fn, *args):
+    """새 인터프리터(spawn)에서 fn(*args)을 실행한 프로세스 최대 RSS (MB, resource 모듈이 없으면 None)"""
+    if resource is None:
+        return None
+    ctx = multiprocessing.get_context("spawn")   # fork는 부모 프로세스의 RSS를 물려받음
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_report_peak_rss, args=(queue, fn, args))
+    proc.start()
+    maxrss = queue.get()
+    proc.join()
+    # ru_maxrss 단위: Linux KB, macOS 바이트
+    return maxrss / 1e6 if sys.platform == "darwin" else maxrss / 1e3
+
+# ------------------------------------------------------------------
+# 백테스트
+# ------------------------------------------------------------------
+def backtest_once(symbols, days):
+    """현재 디렉토리 캐시로 캐시 로드 -> 그리드 -> 결과표 1회 (최대 메모리 측정용)"""
+    import backtest
+    backtest.FETCH_DAYS = days
+    with quiet():
+        data = backtest.fetch_all_data(symbols, backtest.TIMEFRAMES, days, offline=True)
+        backtest.grid_metrics_table(backtest.run_grid_serial(data, backtest.TIMEFRAMES, backtest.K_VALUES))
+
+def bench_backtest(symbols, days, repeat=REPEAT):
+    import backtest
+    backtest.FETCH_DAYS = days
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix="bench_")
+    cwd = os.getcwd()
+    try:
+        # fetch_all_data는 ./data_cache를 사용하므로 임시 디렉토리에서 실행
+        os.chdir(work_dir)
+        write_synthetic_cache("data_cache", symbols, days + 2)
+        timeframes, k_values = backtest.TIMEFRAMES, backtest.K_VALUES
+
+        with quiet():
+            start = time.perf_counter()
+            raw_data = backtest.fetch_all_data(symbols, timeframes, days, offline=True) # 파생 캐시 생성 포함
+            cold = time.perf_counter() - start
+            warm = best_of(lambda: backtest.fetch_all_data(symbols, timeframes, days, offline=True), repeat)
+        results["backtest.fetch_all_data_cold_ms"] = result(cold * 1000, "ms")
+        results["backtest.fetch_all_data_ms"] = result(warm * 1000, "ms")
+
+        # 그리드 처리량: TF별 (봉 x 심볼) 배열 구성 + K 전체 시뮬레이션
+        work = sum(len(next(iter(raw_data[tf].values()))) * len(symbols) for tf in timeframes) * len(k_values)
+        cells = []
+        def grid():
+            cells[:] = backtest.run_grid_serial(raw_data, timeframes, k_values)
+        with quiet():
+            grid_sec = best_of(grid, repeat)
+        results["backtest.grid_ms"] = result(grid_sec * 1000, "ms")
+        results["backtest.grid_throughput"] = result(work / grid_sec, "bar*symbol*cell/s", "higher")
+
+        metrics_sec = best_of(lambda: backtest.grid_metrics_table(cells), repeat)
+        results["backtest.metrics_ms"] = result(metrics_sec * 1000, "ms")
+
+        # 최대 메모리: 새 프로세스에서 캐시 로드부터 결과표까지 한 번 실행한 최대 RSS
+        # (tracemalloc은 메모리 매핑된 캐시 페이지를 세지 못하므로 운영체제 기준으로 측정)
+        peak = peak_rss_mb(backtest_once, symbols, days)
+        if peak is not None:
+            results["backtest.peak_rss_mb"] = result(peak, "MB")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+# ------------------------------------------------------------------
+# 라이브 루프
+# ------------------------------------------------------------------
+class FixedLatencyExchange:
+    """모의 거래소를 감싸 네트워크 요청마다 실제로 latency초 대기"""
+
+    NETWORK_PREFIXES = ("fetch_", "create_", "cancel_", "set_", "load_markets")
+
+    def __init__(self, exchange, latency):
+        self._exchange = exchange
+        self.latency = latency
+        self.id = "bench"
+
+    def __getattr__(self, name):
+        attr = getattr(self._exchange, name)
+        if not callable(attr) or not name.startswith(self.NETWORK_PREFIXES):
+            return attr
+        def call(*args, **kwargs):
+            if self.latency > 0: time.sleep(self.latency)
+            return attr(*args, **kwargs)
+        return call
+
+def bench_live(n_symbols, latency_ms, iterations, repeat=REPEAT):
+    import paper_trade
+    symbols = [f"SIM{i:03d}/USDT" for i in range(n_symbols)]
+    paper_trade.prepare_config(symbols, "1d", 0.5, "poll")
+    import coin_bot
+    import mock_exchange
+
+    start_ms = int(datetime.datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)
+    candles = {sym: mock_exchange.synthetic_candles(start_ms - 86400 * 1000, 3 * 1440, 100.0 * (1 + i % 7), seed=i)
+               for i, sym in enumerate(symbols)}
+    clock = mock_exchange.SimClock(start_ms + 3600 * 1000)
+    mock = mock_exchange.MockExchange(candles, clock)
+    stub = FixedLatencyExchange(mock, latency_ms / 1000)
+
+    work_dir = tempfile.mkdtemp(prefix="bench_live_")
+    coin_bot.set_exchange(stub, clock)
+    coin_bot.LOG_FILE = os.path.join(work_dir, "trades.csv")
+    coin_bot.STATE_FILE = None
+    coin_bot.MARKET_CACHE_FILE = None
+    coin_bot.RECORD_FILE = None
+    results = {}
+
+    def timed(name, fn, n, setup=None):
+        """fn을 n회 실행한 회당 소요 시간 중앙값 - 고정 지연 포함 / 지연 0(봇 자체 처리 시간) 두 가지"""
+        for suffix, latency in (("", latency_ms / 1000), ("_overhead", 0.0)):
+            stub.latency = latency
+            elapsed = []
+            for _ in range(n):
+                if setup is not None: setup()
+                start = time.perf_counter()
+                fn()
+                elapsed.append(time.perf_counter() - start)
+            results[f"live.{name}{suffix}_ms"] = result(np.median(elapsed) * 1000, "ms")
+
+    def open_all():
+        """청산 측정용: 전 심볼 롱 포지션 진입 (측정 제외)"""
+        clock.sleep(60)
+        for sym in symbols:
+            mock.create_market_buy_order(sym, 1.0)
+        coin_bot.account.invalidate()
+
+    def entry_tick():
+        coin_bot.check_entry()
+        clock.sleep(1.0) # 실제 루프처럼 1초씩 진행해 요청 예산이 쌓이지 않게 함
+
+    try:
+        with quiet():
+            coin_bot.load_markets_all()
+            timed("update_targets", coin_bot.update_targets, repeat)
+            # 감시 경로: 돌파 없음
+            for sym in symbols:
+                coin_bot.bot_state["targets"][sym] = {"long": float("inf")}
+            timed("check_entry", entry_tick, iterations)
+            timed("close_all_positions", lambda: coin_bot.close_all_positions("Benchmark"), repeat, setup=open_all)
+    finally:
+        coin_bot.close_journal()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+# ------------------------------------------------------------------
+# 결과 저장 / 비교
+# ------------------------------------------------------------------
+def metadata(args):
+    try:
+        import subprocess
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "time": datetime.datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": vars(args),
+    }
+
+def compare(current, baseline, threshold=THRESHOLD, noise_floor_ms=NOISE_FLOOR_MS):
+    """항목별 [(이름, 기준값, 현재값, 변화율(+면 나빠짐), 회귀 여부)] (기준에 없는 항목은 제외)"""
+    rows = []
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if base is None or base["value"] == 0: continue
+        change = (cur["value"] - base["value"]) / base["value"]
+        worse = change if cur.get("better", "lower") == "lower" else -change
+        significant = cur["unit"] != "ms" or abs(cur["value"] - base["value"]) >= noise_floor_ms
+        rows.append((name, base["value"], cur["value"], worse, worse > threshold and significant))
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="백테스트 커널 / 라이브 결정 루프 벤치마크 (오프라인, 합성 데이터)")
+    parser.add_argument("--out", default="benchmark_results.json", help="결과 JSON 파일")
+    parser.add_argument("--compare", default=None, help="기준 결과 JSON (회귀 판정)")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="회귀 판정 기준 (0.15 = 15%% 악화)")
+    parser.add_argument("--only", choices=["backtest", "live"], default=None, help="한쪽만 실행")
+    parser.add_argument("--symbols", type=int, default=4, help="백테스트 심볼 수")
+    parser.add_argument("--years", type=float, default=2.0, help="백테스트 데이터 기간 (년)")
+    parser.add_argument("--live-symbols", type=int, default=50, help="라이브 루프 심볼 수")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="모의 거래소 요청당 고정 지연 (ms)")
+    parser.add_argument("--iterations", type=int, default=200, help="check_entry 반복 횟수")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    args = parser.parse_args()
+
+    results = {}
+    if args.only in (None, "backtest"):
+        symbols = [f"SIM{i:03d}/USDT" for i in range(args.symbols)]
+        results.update(bench_backtest(symbols, int(args.years * 365), args.repeat))
+    if args.only in (None, "live"):
+        results.update(bench_live(args.live_symbols, args.latency_ms, args.iterations, args.repeat))
+
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump({"meta": metadata(args), "results": results}, f, indent=1)
+
+    print("\n" + "=" * 78)
+    print(f"🏁 벤치마크 결과 -> {args.out}")
+    print("=" * 78)
+    for name, r in results.items():
+        print(f"{name:<42} {r['value']:>16,.2f} {r['unit']}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+        rows = compare(results, baseline, args.threshold)
+        regressions = [row for row in rows if row[4]]
+        print("-" * 78)
+        print(f"기준 비교 ({args.compare}, 허용 {args.threshold:.0%})")
+        for name, base, cur, worse, regressed in rows:
+            flag = "❌ 회귀" if regressed else ("✅ 개선" if worse < -args.threshold else "")
+            print(f"{name:<42} {base:>12,.2f} -> {cur:>12,.2f} ({worse:+.1%} 악화) {flag}")
+        print("=" * 78)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,225 @@
+# candle_cache.py
+
+import os
+import json
+import time
+import struct
+import itertools
+import numpy as np
+from scheduler import parse_timeframe, WEEK_OFFSET_MS
+
+# ==============================================================================
+# 💾 OHLCV 로컬 캐시
+# ==============================================================================
+# (심볼, 타임프레임)마다 .npy 파일 1개에 [timestamp(ms), open, high, low, close, volume]
+# float64 배열로 저장한다. np.load(mmap_mode='r')로 바로 메모리 매핑되므로
+# 수년치 데이터도 파싱 없이 즉시 로드된다. 새로 받은 봉은 페이지 단위로 파일에 이어 쓰고
+# 헤더의 행 수만 고치므로 갱신할 때도 전체 이력을 메모리에 올리지 않는다.
+# 상위 타임프레임(4h, 8h, 2d ...)은 기준 해상도(1h 등) 하나만 받아 resample()로 만들고
+# {심볼}_{타임프레임}@{기준}.npy로 따로 캐시한다 (resampled_candles, 만든 기준 캔들 식별값은 .npy.json).
+
+CACHE_DIR = "data_cache"
+COLUMNS = ['datetime', 'open', 'high', 'low', 'close', 'volume']
+ROW_BYTES = 8 * len(COLUMNS)
+HEADER_BYTES = 128          # 직접 쓰는 .npy 헤더 크기 (행 수가 늘어도 제자리에서 고칠 수 있는 여유 포함)
+WRITE_CHUNK_ROWS = 1_000_000 # 이전 형식 캐시를 옮겨 쓸 때 한 번에 복사하는 행 수 (약 48MB)
+
+def cache_path(symbol, timeframe, cache_dir=CACHE_DIR):
+    """캐시 파일 경로 (BTC/USDT, 6h -> data_cache/BTC_USDT_6h.npy)"""
+    safe_sym = symbol.replace('/', '_').replace(':', '_')
+    return os.path.join(cache_dir, f"{safe_sym}_{timeframe}.npy")
+
+def load_candles(symbol, timeframe, cache_dir=CACHE_DIR, mmap=True):
+    """캐시된 캔들 배열 로드 (없으면 None)"""
+    path = cache_path(symbol, timeframe, cache_dir)
+    if not os.path.isfile(path):
+        return None
+    return np.load(path, mmap_mode='r' if mmap else None)
+
+def save_candles(symbol, timeframe, candles, cache_dir=CACHE_DIR):
+    """임시 파일에 쓴 뒤 교체하여 중간에 끊겨도 캐시가 깨지지 않도록 저장"""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(symbol, timeframe, cache_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, np.ascontiguousarray(candles, dtype=np.float64))
+    os.replace(tmp_path, path)
+
+def fetch_pages(exchange, symbol, timeframe, since, after=-1.0, pause=0.1):
+    """since(ms)부터 현재까지 페이지(최대 1000봉) 단위 캔들 배열을 차례로 반환 (after 이하 시각은 제외)"""
+    while since < exchange.milliseconds():
+        data = exchange.fetch_ohlcv(symbol, timeframe, since, limit=1000)
+        if not data: break
+        since = data[-1][0] + 1
+        page = np.array(data, dtype=np.float64).reshape(-1, len(COLUMNS))
+        page = page[page[:, 0] > after]
+        if len(page):
+            after = page[-1, 0]
+            yield page
+        time.sleep(pause) # API 제한 방지
+
+def _npy_header(rows, size=HEADER_BYTES):
+    """(rows x 6) float64 .npy 1.0 헤더를 size 바이트에 맞춰 공백 패딩 (안 들어가면 None)"""
+    body = "{'descr': '<f8', 'fortran_order': False, 'shape': (%d, %d), }" % (rows, len(COLUMNS))
+    pad = size - 10 - len(body) - 1
+    if pad < 0:
+        return None
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", size - 10) + (body + " " * pad + "\n").encode("latin1")
+
+def _write_new(path, pages):
+    """페이지를 임시 파일에 차례로 쓰고 마지막에 헤더의 행 수를 고친 뒤 교체 -> 쓴 행 수 (0이면 교체 안 함)"""
+    tmp_path = path + ".tmp"
+    rows = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_npy_header(0))
+            for page in pages:
+                f.write(np.ascontiguousarray(page, dtype='<f8').tobytes())
+                rows += len(page)
+            f.seek(0)
+            f.write(_npy_header(rows))
+        if rows:
+            os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return rows
+
+def _write_rows(path, start_row, pages):
+    """기존 캐시 파일의 start_row부터 페이지를 덮어쓰고 이어 씀 -> 전체 행 수
+
+    파일은 줄어들지 않으므로 다른 곳에서 연 메모리 매핑도 안전하다. 헤더의 행 수는 데이터를 다 쓴 뒤
+    마지막에 고치므로 중간에 끊기면 이전 행 수 그대로 읽힌다. 헤더를 제자리에서 고칠 수 없는 형식
+    (np.save 2.0 헤더, 다른 dtype 등)이면 아무것도 쓰지 않고 None.
+    """
+    with open(path, 'r+b') as f:
+        if np.lib.format.read_magic(f) != (1, 0):
+            return None
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        offset = f.tell()
+        if fortran_order or dtype != np.dtype('<f8') or shape[1:] != (len(COLUMNS),) or _npy_header(10 ** 12, offset) is None:
+            return None
+
+        end = start_row
+        f.seek(offset + start_row * ROW_BYTES)
+        for page in pages:
+            f.write(np.ascontiguousarray(page, dtype='<f8').tobytes())
+            end += len(page)
+        rows = max(shape[0], end)
+        f.flush()
+        os.fsync(f.fileno())
+        f.seek(0)
+        f.write(_npy_header(rows, offset))
+    return rows
+
+def _iter_rows(path, stop, chunk=WRITE_CHUNK_ROWS):
+    """캐시 파일 앞 stop행을 chunk행씩 복사해 반환 (메모리 매핑에서 읽음)"""
+    arr = np.load(path, mmap_mode='r')
+    for i in range(0, stop, chunk):
+        yield np.array(arr[i:min(i + chunk, stop)])
+
+def update_candles(exchange, symbol, timeframe, since, offline=False, cache_dir=CACHE_DIR):
+    """캐시를 기준으로 since 이후 캔들을 반환 (마지막 캐시 시각 이후 봉만 추가 수집)
+
+    받은 페이지는 바로 캐시 파일에 이어 쓰므로 수년치 1분봉도 전체를 메모리에 올리지 않으며,
+    반환값은 캐시 파일의 메모리 매핑 배열이다. offline=True면 네트워크 없이 캐시만 반환한다.
+    """
+    cached = load_candles(symbol, timeframe, cache_dir)
+
+    if offline:
+        if cached is None:
+            raise FileNotFoundError(f"캐시 없음 (오프라인 모드): {cache_path(symbol, timeframe, cache_dir)}")
+        return cached
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(symbol, timeframe, cache_dir)
+    if cached is not None and len(cached) > 0 and cached[0, 0] <= since:
+        # 마지막 캐시 봉은 수집 당시 미완성 봉일 수 있으므로 그 시각부터 다시 받아 제자리에서 덮어씀
+        keep = len(cached) - 1
+        last_ts = int(cached[-1, 0])
+        prev_ts = float(cached[-2, 0]) if keep else -1.0
+        del cached
+        pages = fetch_pages(exchange, symbol, timeframe, last_ts, after=prev_ts)
+        if _write_rows(path, keep, pages) is None:
+            # 이전 형식 파일 -> 기존 행을 청크 단위로 옮기며 새 파일로 한 번 다시 씀
+            _write_new(path, itertools.chain(_iter_rows(path, keep), pages))
+    else:
+        # 캐시가 없거나 요청 구간 시작보다 늦게 시작하면 전체 재수집
+        del cached
+        _write_new(path, fetch_pages(exchange, symbol, timeframe, since))
+
+    candles = load_candles(symbol, timeframe, cache_dir)
+    return candles if candles is not None else np.empty((0, len(COLUMNS)))
+
+def resample(candles, timeframe):
+    """기준 해상도 캔들 -> 상위 타임프레임 캔들 (바이낸스 봉 경계에 정렬, 벡터 연산)
+
+    봉 시작 = epoch 기준 타임프레임 배수 (주봉은 월요일 00:00 UTC).
+    기준 봉이 봉 시작부터 있지 않은 첫 봉(구간 앞부분이 잘린 봉)은 버린다.
+    """
+    candles = np.asarray(candles)
+    if len(candles) == 0:
+        return np.empty((0, len(COLUMNS)))
+    tf_ms = parse_timeframe(timeframe) * 1000
+    offset = WEEK_OFFSET_MS if tf_ms % (7 * 86400 * 1000) == 0 else 0
+
+    ts = candles[:, 0].astype(np.int64)
+    keys = (ts - offset) // tf_ms * tf_ms + offset
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(candles)] - 1
+
+    out = np.empty((len(starts), len(COLUMNS)))
+    out[:, 0] = keys[starts]
+    out[:, 1] = candles[starts, 1]
+    out[:, 2] = np.maximum.reduceat(candles[:, 2], starts)
+    out[:, 3] = np.minimum.reduceat(candles[:, 3], starts)
+    out[:, 4] = candles[ends, 4]
+    out[:, 5] = np.add.reduceat(candles[:, 5], starts)
+
+    if ts[0] != keys[0]:
+        out = out[1:]
+    return out
+
+def _source_fingerprint(base):
+    """파생 캐시를 만든 기준 캔들 식별값 (행 수, 첫 시각, 마지막 봉 전체)
+
+    update_candles는 마지막 봉을 항상 다시 받아 덮어쓰므로 행 수/마지막 시각이 같아도 마지막 봉 값이
+    바뀔 수 있다. 파일 수정 시각은 해상도가 낮은 파일 시스템에서 같은 틱 안의 재저장을 구분하지 못한다.
+    """
+    base = np.asarray(base)
+    if len(base) == 0:
+        return None
+    return {"rows": int(len(base)), "first": float(base[0, 0]), "last": [float(v) for v in base[-1]]}
+
+def resampled_candles(symbol, timeframe, base, base_timeframe="1h", cache_dir=CACHE_DIR):
+    """기준 해상도 캔들(base)로 timeframe 캔들을 만들어 반환 (파생 캐시가 같은 base로 만든 것이면 재사용)
+
+    기준 해상도의 배수가 아닌 타임프레임은 ValueError.
+    """
+    base_sec, tf_sec = parse_timeframe(base_timeframe), parse_timeframe(timeframe)
+    if tf_sec % base_sec:
+        raise ValueError(f"{timeframe}은 기준 해상도 {base_timeframe}의 배수가 아닙니다")
+    if tf_sec == base_sec:
+        return base
+
+    derived_tf = f"{timeframe}@{base_timeframe}"
+    derived_file = cache_path(symbol, derived_tf, cache_dir)
+    meta_file = derived_file + ".json"
+    source = _source_fingerprint(base)
+    if os.path.isfile(derived_file) and os.path.isfile(meta_file):
+        try:
+            with open(meta_file, encoding='utf-8') as f:
+                if json.load(f) == source:
+                    return load_candles(symbol, derived_tf, cache_dir)
+        except (OSError, ValueError):
+            pass
+
+    derived = resample(base, timeframe)
+    if len(derived) > 0:
+        # 파생 캐시 -> 식별값 순서로 저장 (중간에 끊기면 식별값이 맞지 않아 다음에 다시 만듦)
+        save_candles(symbol, derived_tf, derived, cache_dir)
+        tmp_path = meta_file + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(source, f)
+        os.replace(tmp_path, meta_file)
+    return derived
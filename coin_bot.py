@@ -5,11 +5,19 @@ import logging
 import threading
 import requests
 import traceback
-import csv
-import os
+import signal
 import config
 import telegram_notifier
-from datetime import timezone
+import state_store
+import market_cache
+from trade_journal import TradeJournal
+from account_cache import AccountCache
+from api_metrics import InstrumentedExchange, metrics
+from market_recorder import MarketRecorder
+from request_budget import RequestBudget, CRITICAL, LOW, weight_of
+from market_watch import EntryExecutor, fetch_targets
+from scheduler import CandleScheduler, SystemClock
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # ===============================================================
 # [초기 설정]
@@ -17,12 +25,17 @@ from datetime import timezone
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
 logger = logging.getLogger()
 
-binance = ccxt.binance({
+# 요청 가중치 예산: 모든 스레드가 공유하며 주문/취소를 우선 처리 (끄면 ccxt 기본 레이트리밋 사용)
+REQUEST_BUDGET = getattr(config, "REQUEST_BUDGET", True)
+budget = RequestBudget(getattr(config, "REQUEST_WEIGHT_LIMIT", 2400))
+
+# 모든 거래소 호출은 계측 프록시를 거쳐 엔드포인트별 지연/오류가 기록됨
+binance = InstrumentedExchange(ccxt.binance({
     'apiKey': config.BINANCE_API_KEY,
     'secret': config.BINANCE_SECRET,
     'options': {'defaultType': 'future'},
-    'enableRateLimit': True
-})
+    'enableRateLimit': not REQUEST_BUDGET
+}), budget=budget if REQUEST_BUDGET else None)
 
 # [전역 변수]
 bot_state = {
@@ -32,44 +45,219 @@ bot_state = {
     "positions": {sym: False for sym in config.SYMBOLS},
     "targets": {sym: {"long": 0.0} for sym in config.SYMBOLS}, # short 삭제
     "last_update_id": 0,
-    "last_close_slot": None 
+    "last_close_slot": None,
+    "entry_orders": {},         # [stop 모드] 심볼별 대기 중인 스탑마켓 진입 주문 {"id", "target", "amount"}
+    "candle": None              # 목표가를 계산한 봉의 시작 시각(ms) - 스냅샷 복구 판단용
 }
 
+clock = SystemClock()
+
+# 포지션/잔고 조회 결과 공유 캐시 (메인 루프 + 텔레그램 스레드)
+account = AccountCache(binance, ttl=getattr(config, "ACCOUNT_CACHE_TTL", 2.0), clock=clock, budget=budget)
+
 LOG_FILE = "trade_history.csv"
+JOURNAL_FLUSH_SEC = getattr(config, "JOURNAL_FLUSH_SEC", 1.0)       # 매매 기록 버퍼를 파일에 쓰는 주기 (초)
+JOURNAL_ROTATE_ROWS = getattr(config, "JOURNAL_ROTATE_ROWS", 5000)  # 이 행 수를 넘으면 컬럼형 아카이브로 이동
+TAKER_FEE_RATE = getattr(config, "TAKER_FEE_RATE", 0.0005) # 주문 응답에 수수료가 없을 때 추정용
+STATE_FILE = getattr(config, "STATE_FILE", "bot_state.json") # None이면 스냅샷 저장/복구 안 함
+MARKET_CACHE_FILE = getattr(config, "MARKET_CACHE_FILE", "market_cache.json") # None이면 캐시 사용 안 함
+MARKET_CACHE_TTL = getattr(config, "MARKET_CACHE_TTL", 24 * 3600) # 마켓 정보/레버리지 캐시 유효 시간 (초)
+RECORD_FILE = getattr(config, "RECORD_FILE", None) # 거래소 응답 녹화 파일 (.jsonl.gz, None이면 녹화 안 함)
+recorder = None
+
+def set_exchange(exchange, new_clock=None):
+    """거래소 백엔드 교체 (예: mock_exchange.MockExchange) - 계측/계좌 캐시도 함께 재구성"""
+    global binance, account, clock, budget
+    if new_clock is not None:
+        clock = new_clock
+    budget = RequestBudget(budget.limit, clock=clock)
+    binance = InstrumentedExchange(exchange, prefix=getattr(exchange, "id", "exchange"),
+                                   budget=budget if REQUEST_BUDGET else None, recorder=recorder)
+    account = AccountCache(binance, ttl=account.ttl, clock=clock, budget=budget)
+
+def start_recording(path):
+    """거래소 응답 녹화 시작 (market_recorder.py로 재생할 때 필요한 설정도 헤더에 기록)"""
+    global recorder
+    exchange = binance._exchange
+    header = {
+        "id": getattr(exchange, "id", "exchange"),
+        "has": {k: v for k, v in getattr(exchange, "has", {}).items() if v},
+        "config": {"SYMBOLS": config.SYMBOLS, "TIMEFRAME": config.TIMEFRAME, "K_VALUE": config.K_VALUE,
+                   "LEVERAGE": config.LEVERAGE, "ENTRY_MODE": ENTRY_MODE, "MAX_POSITIONS": MAX_POSITIONS,
+                   "CLOSE_BEFORE_SEC": CLOSE_BEFORE_SEC, "OPEN_DELAY_SEC": OPEN_DELAY_SEC},
+    }
+    recorder = MarketRecorder(path, clock, header)
+    binance.attach_recorder(recorder)
+    logger.info(f"📼 거래소 응답 녹화 시작: {path}")
+
+def stop_recording():
+    """남은 녹화 내용을 파일에 쓰고 닫기 (종료 시)"""
+    global recorder
+    if recorder is None: return
+    binance.attach_recorder(None)
+    recorder.close()
+    recorder = None
+
+LATENCY_DUMP_FILE = getattr(config, "LATENCY_DUMP_FILE", "latency_stats.json")
+LATENCY_DUMP_SEC = getattr(config, "LATENCY_DUMP_SEC", 60) # API 지연 통계 파일 저장 주기 (초)
+LOOP_REPORT_EVERY = 300     # 진입 감시 루프 소요 시간 요약 로그 주기 (회)
+SLOW_LOOP_SEC = 1.0         # 이 시간을 넘는 루프는 즉시 경고
+
+# 진입 방식: "poll" = 1초 현재가 감시 후 시장가 / "stop" = 봉 시작 시 목표가에 스탑마켓 주문 선배치
+ENTRY_MODE = getattr(config, "ENTRY_MODE", "poll")
+ENTRY_RECONCILE_SEC = getattr(config, "ENTRY_RECONCILE_SEC", 10) # [stop 모드] 체결 확인 주기 (초)
+TRIGGER_PARAMS = {'trigger': True} # 선물 조건부 주문은 Algo 주문 API로 조회/취소
+
+CLOSE_BEFORE_SEC = getattr(config, "CLOSE_BEFORE_SEC", 600) # 봉 마감 몇 초 전에 청산할지
+OPEN_DELAY_SEC = getattr(config, "OPEN_DELAY_SEC", 10)      # 새 봉 시작 후 목표가 계산까지 대기 (캔들 생성 대기)
+
+CLOSE_WORKERS = 8           # 동시 청산 주문 스레드 수
+MARKET_WORKERS = getattr(config, "MARKET_WORKERS", 8) # 목표가 계산/동시 진입 주문 스레드 수
+MAX_POSITIONS = getattr(config, "MAX_POSITIONS", len(config.SYMBOLS)) # 동시 보유 포지션 수 (자본 배분 단위)
+TARGET_REPORT_LIMIT = 20    # 봉 시작 알림에 목표가를 나열할 최대 심볼 수
+
+# 진입 자본 배분 담당 (총 자산 / MAX_POSITIONS 슬롯)
+executor = EntryExecutor(MAX_POSITIONS, MARKET_WORKERS)
+CLOSE_RETRIES = 2           # 실패/부분 체결 심볼 재시도 횟수
+
+loop_stats = {"count": 0, "last": 0.0, "total": 0.0, "max": 0.0}
+shutdown_requested = False  # SIGTERM 수신 -> 메인 루프가 빠져나온 뒤 상태 저장 후 종료
 
 # ===============================================================
 # [유틸리티]
 # ===============================================================
-def write_trade_log(action, symbol, price, amount, note=""):
+journal = None
+journal_lock = threading.Lock()
+entry_orders_lock = threading.RLock() # bot_state["entry_orders"] 변경 (메인 루프 + 텔레그램 스레드)
+
+def get_journal():
+    """LOG_FILE용 매매 기록기 (LOG_FILE이 바뀌면 이전 파일을 닫고 새로 연다)"""
+    global journal
+    with journal_lock:
+        if journal is None or journal.path != LOG_FILE:
+            if journal is not None: journal.close()
+            journal = TradeJournal(LOG_FILE, JOURNAL_FLUSH_SEC, JOURNAL_ROTATE_ROWS)
+        return journal
+
+def close_journal():
+    """남은 매매 기록을 파일에 쓰고 닫기 (종료 시)"""
+    global journal
+    with journal_lock:
+        if journal is not None:
+            journal.close()
+            journal = None
+
+def now_ms():
+    return int(clock.time() * 1000)
+
+def write_trade_log(action, symbol, price, amount, note="", order=None, target=None, signal_ms=None, sent_ms=None):
+    """매매 1건 기록 (버퍼에만 넣고 반환 - 파일 쓰기는 백그라운드)
+
+    order: 주문 응답이 있으면 실제 체결가/체결 수량/수수료/주문 ID/체결 시각을 우선 사용
+    price/amount: 주문 응답에 체결 정보가 없을 때의 대체값
+    """
     try:
-        file_exists = os.path.isfile(LOG_FILE)
-        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        ts = now_ms()
+        fee = fill_ms = order_id = None
+        if order:
+            price = order.get('average') or order.get('price') or price
+            amount = order.get('filled') or amount
+            fee = (order.get('fee') or {}).get('cost')
+            fill_ms = order.get('timestamp')
+            order_id = order.get('id')
         val_price = float(price)
         val_amount = float(amount)
         total_value = val_price * val_amount
-
-        with open(LOG_FILE, mode='a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            if not file_exists:
-                writer.writerow(['Time', 'Action', 'Symbol', 'Price', 'Amount', 'Value', 'Note'])
-            writer.writerow([now, action, symbol, val_price, val_amount, f"{total_value:.2f}", note])
+        if fee is None: fee = total_value * TAKER_FEE_RATE
+
+        get_journal().record({
+            'Time': clock.now().astimezone().strftime("%Y-%m-%d %H:%M:%S"),
+            'Timestamp': ts,
+            'Action': action,
+            'Symbol': symbol,
+            'Price': val_price,
+            'Amount': val_amount,
+            'Value': f"{total_value:.2f}",
+            'Fee': f"{float(fee):.6f}",
+            'Order ID': order_id or "",
+            'Target': target if target is not None else "",
+            'Signal Time': signal_ms if signal_ms is not None else "",
+            'Sent Time': sent_ms if sent_ms is not None else "",
+            'Fill Time': fill_ms if fill_ms is not None else "",
+            'Note': note,
+        })
     except Exception as e:
         logger.error(f"로그 저장 실패: {e}")
 
-def set_leverage_all():
-    for sym in config.SYMBOLS:
+def persist_state():
+    """bot_state 스냅샷 저장 (상태가 바뀔 때마다 호출)"""
+    if not STATE_FILE: return
+    try:
+        state_store.save_state(STATE_FILE, bot_state)
+    except Exception as e:
+        logger.error(f"상태 스냅샷 저장 실패: {e}")
+
+def restore_state(candle_start_ms):
+    """스냅샷이 현재 봉의 것이면 전체 상태 복구 (True 반환)
+
+    봉이 바뀌었어도 텔레그램 update id와 /stop 상태는 유지한다 (이미 처리한 명령 재실행 방지).
+    """
+    snap = state_store.load_state(STATE_FILE) if STATE_FILE else None
+    if not snap: return False
+
+    bot_state["last_update_id"] = snap.get("last_update_id", 0)
+    bot_state["is_active"] = snap.get("is_active", True)
+    if snap.get("candle") != candle_start_ms or set(snap.get("targets", {})) != set(config.SYMBOLS):
+        return False
+
+    for key in ("temp_pause", "period_capital", "positions", "targets", "last_close_slot", "entry_orders", "candle"):
+        if key in snap:
+            bot_state[key] = snap[key]
+    return True
+
+def record_loop_time(elapsed):
+    """진입 감시 루프 1회 소요 시간 기록 및 주기적 요약 로그"""
+    loop_stats["count"] += 1
+    loop_stats["last"] = elapsed
+    loop_stats["total"] += elapsed
+    loop_stats["max"] = max(loop_stats["max"], elapsed)
+
+    if elapsed > SLOW_LOOP_SEC:
+        logger.warning(f"⏱️ 진입 감시 루프 지연: {elapsed * 1000:.0f}ms")
+    if loop_stats["count"] % LOOP_REPORT_EVERY == 0:
+        avg_ms = loop_stats["total"] / loop_stats["count"] * 1000
+        logger.info(f"⏱️ 진입 감시 루프: 평균 {avg_ms:.0f}ms / 최대 {loop_stats['max'] * 1000:.0f}ms ({loop_stats['count']}회)")
+
+def latency_dumper():
+    """API 지연 통계를 주기적으로 JSON 파일에 기록 (외부 모니터링/회귀 비교용)"""
+    while True:
+        time.sleep(LATENCY_DUMP_SEC)
         try:
-            binance.set_leverage(config.LEVERAGE, sym)
-            logger.info(f"✅ {sym} 레버리지 {config.LEVERAGE}배 설정 완료")
+            metrics.dump(LATENCY_DUMP_FILE)
         except Exception as e:
-            logger.error(f"⚠️ {sym} 레버리지 설정 실패: {e}")
+            logger.error(f"지연 통계 저장 실패: {e}")
+
+def load_markets_all():
+    """마켓 정보(정밀도/한도) 준비 - 캐시가 유효하면 거래소 요청 없음"""
+    if not MARKET_CACHE_FILE: return
+    try:
+        if market_cache.load_markets_cached(binance, config.SYMBOLS, MARKET_CACHE_FILE, MARKET_CACHE_TTL):
+            logger.info("🗂️ 마켓 정보 캐시 사용")
+    except Exception as e:
+        logger.error(f"마켓 정보 로드 실패: {e}")
+
+def set_leverage_all():
+    """이미 같은 레버리지로 설정된 심볼은 건너뛰고 나머지만 병렬 설정"""
+    results = market_cache.ensure_leverage(binance, config.SYMBOLS, config.LEVERAGE, MARKET_CACHE_FILE, MARKET_CACHE_TTL)
+    for sym, ok in results.items():
+        if ok: logger.info(f"✅ {sym} 레버리지 {config.LEVERAGE}배 설정 완료")
 
 def sync_positions():
     try:
         for sym in config.SYMBOLS:
             bot_state["positions"][sym] = False 
 
-        exchange_pos = binance.fetch_positions()
+        exchange_pos = account.positions()
         for pos in exchange_pos:
             market_sym = pos['symbol'].split(':')[0] 
             if market_sym in config.SYMBOLS:
@@ -78,6 +266,7 @@ def sync_positions():
                     side = pos['side'].upper()
                     bot_state["positions"][market_sym] = side
                     logger.info(f"🔄 동기화 확인: {market_sym} 보유 중 ({side})")
+        persist_state()
     except Exception as e:
         logger.error(f"❌ 포지션 동기화 실패: {e}")
 
@@ -87,12 +276,15 @@ def sync_positions():
 def get_telegram_updates(offset=None):
     url = f"https://api.telegram.org/bot{config.TELEGRAM_BOT_TOKEN}/getUpdates"
     try:
-        response = requests.get(url, params={'timeout': 10, 'offset': offset}).json()
+        # 롱폴링(최대 10초 대기)이므로 지연 시간에는 대기 시간이 포함됨
+        with metrics.timed("telegram.getUpdates"):
+            response = requests.get(url, params={'timeout': 10, 'offset': offset}).json()
         return response.get("result", [])
     except: return []
 
 def telegram_listener():
     logger.info("📡 텔레그램 리스너 시작")
+    budget.set_thread_priority(LOW) # /info 등 조회는 주문/감시보다 후순위
     while True:
         try:
             updates = get_telegram_updates(bot_state["last_update_id"] + 1)
@@ -102,30 +294,38 @@ def telegram_listener():
                     text = update["message"]["text"].strip()
                     if str(update["message"]["chat"]["id"]) == str(config.TELEGRAM_CHAT_ID):
                         handle_command(text)
+            if updates:
+                persist_state()
             time.sleep(1)
         except: time.sleep(1)
 
 def handle_command(command):
     if command.lower() in ["/info", "info"]:
         send_status_report()
+    elif command.lower() in ["/latency", "latency"]:
+        telegram_notifier.send_telegram_message(metrics.format_report().rstrip("\n") + "\n" + budget.format_status())
     elif command.lower() in ["/stop", "stop"]:
         bot_state["is_active"] = False
+        cancel_entry_orders()
         telegram_notifier.send_telegram_message("⛔ <b>[매수 정지]</b>")
     elif command.lower() in ["/start", "start"]:
         bot_state["is_active"] = True
         bot_state["temp_pause"] = False
+        place_entry_orders()
         telegram_notifier.send_telegram_message("✅ <b>[매수 재개]</b>")
     elif command.lower() in ["/sell", "sell"]:
         telegram_notifier.send_telegram_message("🚨 <b>[긴급 매도]</b>")
-        close_all_positions(reason="User Command")
         bot_state["temp_pause"] = True
+        cancel_entry_orders()
+        close_all_positions(reason="User Command")
+    persist_state()
 
 def send_status_report():
     try:
-        bal = binance.fetch_balance()
+        bal = account.balance()
         wallet_bal = bal['USDT']['total']
         free_bal = bal['USDT']['free']
-        pos_data = binance.fetch_positions()
+        pos_data = account.positions()
         
         total_pnl = 0.0
         pos_msg = ""
@@ -165,7 +365,8 @@ def send_status_report():
         msg += f"💵 주문가능: <code>${free_bal:,.2f}</code>\n"
         msg += "-" * 20 + "\n"
         msg += pos_msg if pos_msg else "💤 보유 포지션 없음\n"
-        msg += f"💼 프레임 할당액: <code>${bot_state['period_capital']:,.2f}</code>"
+        msg += f"💼 프레임 할당액: <code>${bot_state['period_capital']:,.2f}</code>\n"
+        msg += f"⏱️ 감시 루프: <code>{loop_stats['last'] * 1000:.0f}ms</code> (최대 {loop_stats['max'] * 1000:.0f}ms)"
         telegram_notifier.send_telegram_message(msg)
     except Exception as e: logger.error(f"리포트 에러: {e}")
 
@@ -173,14 +374,6 @@ def send_status_report():
 # [매매 로직]
 # ===============================================================
 
-def get_next_start_time():
-    now_utc = datetime.datetime.now(timezone.utc)
-    # 오늘 자정(UTC 00:00) 기준
-    base_date = now_utc.replace(hour=0, minute=0, second=0, microsecond=0)
-    # 다음 날 자정
-    next_start = base_date + datetime.timedelta(days=1)
-    return next_start
-
 def update_targets(is_restart=False):
     if is_restart:
         msg = "♻️ <b>[시스템 복구 모드]</b> 롱 목표가를 재계산하고 매매를 재개합니다.\n"
@@ -189,102 +382,387 @@ def update_targets(is_restart=False):
         bot_state["temp_pause"] = False
     
     try:
-        bal = binance.fetch_balance()
-        bot_state["period_capital"] = bal['USDT']['total'] / len(config.SYMBOLS)
+        bal = account.balance()
+        bot_state["period_capital"] = executor.slot_capital(bal['USDT']['total'])
     except: pass
 
-    for sym in config.SYMBOLS:
-        try:
-            ohlcv = binance.fetch_ohlcv(sym, timeframe=config.TIMEFRAME, limit=2)
-            # 변동성 계산 (전일 고가 - 전일 저가) * K
-            rng = (ohlcv[-2][2] - ohlcv[-2][3]) * config.K_VALUE
-            
-            # 롱 타겟만 저장 (Short 제거)
-            bot_state["targets"][sym] = {
-                "long": ohlcv[-1][1] + rng
-            }
-            msg += f"- {sym.split('/')[0]}: Long Target {bot_state['targets'][sym]['long']:,.2f}\n"
-        except Exception as e:
-            logger.error(f"{sym} 타겟 계산 실패: {e}")
-    
+    # 롱 목표가 = 현재 봉 시가 + (전 봉 고가 - 전 봉 저가) * K, 심볼별 병렬 조회
+    targets, candle, errors = fetch_targets(binance, config.SYMBOLS, config.TIMEFRAME, config.K_VALUE, MARKET_WORKERS)
+    for sym, e in errors.items():
+        logger.error(f"{sym} 타겟 계산 실패: {e}")
+    for sym, target in targets.items():
+        bot_state["targets"][sym] = {"long": target}
+    if candle is not None:
+        bot_state["candle"] = candle
+
+    listed = [sym for sym in config.SYMBOLS if sym in targets]
+    for sym in listed[:TARGET_REPORT_LIMIT]:
+        msg += f"- {sym.split('/')[0]}: Long Target {targets[sym]:,.2f}\n"
+    if len(listed) > TARGET_REPORT_LIMIT:
+        msg += f"... 외 {len(listed) - TARGET_REPORT_LIMIT}개 심볼 (총 {len(listed)}개, 최대 {executor.max_positions}개 보유)\n"
+    if errors:
+        msg += f"⚠️ 목표가 계산 실패: {len(errors)}개\n"
+
     telegram_notifier.send_telegram_message(msg)
     sync_positions()
 
-def check_entry():
+    # [stop 모드] 목표가/할당액이 바뀌었으므로 기존 진입 주문을 취소하고 다시 배치
+    cancel_entry_orders(sweep=is_restart)
+    place_entry_orders()
+    persist_state()
+
+def calc_order_amount(sym, price, free_usdt):
+    """프레임 할당액 기준 주문 수량 계산 (주문가능 금액 부족 시 99%만 사용, 5 USDT 미만이면 None)"""
+    order_cost = bot_state["period_capital"]
+    if free_usdt < order_cost: order_cost = free_usdt * 0.99 
+    if order_cost < 5.0: return None
+
+    amount_usdt = order_cost * config.LEVERAGE
+    return binance.amount_to_precision(sym, amount_usdt / price)
+
+def place_entry_orders():
+    """[stop 모드] 포지션이 없는 심볼에 롱 목표가 스탑마켓 매수 주문 배치 (남은 슬롯 수만큼)
+
+    대기 주문도 슬롯을 차지하므로 동시에 발동해도 MAX_POSITIONS를 넘지 않는다. 후보가 슬롯보다 많으면
+    현재가가 목표가에 가까운 심볼부터 배치하고, 나머지는 1초 감시로 슬롯이 빌 때만 진입한다.
+    """
+    if ENTRY_MODE != "stop": return
     if not bot_state["is_active"] or bot_state["temp_pause"]: return
 
-    for sym in config.SYMBOLS:
-        # 이미 포지션이 있으면 스킵
-        if bot_state["positions"][sym]: continue
+    with entry_orders_lock:
+        slots = executor.free_slots(used_slots())
+        candidates = [sym for sym in config.SYMBOLS
+                      if not bot_state["positions"][sym] and sym not in bot_state["entry_orders"]
+                      and bot_state["targets"][sym]['long'] > 0]
+        if slots == 0 or not candidates: return
 
         try:
-            ticker = binance.fetch_ticker(sym)
-            curr = ticker['last']
-            tg_long = bot_state["targets"][sym]['long']
-            
-            # 롱 진입 조건만 확인
-            if curr > tg_long:
-                # [안전장치] 중복 진입 방지
-                is_duplicate = False
-                positions = binance.fetch_positions()
-                for p in positions:
-                    market_sym = p['symbol'].split(':')[0]
-                    if market_sym == sym:
-                        if abs(float(p['contracts'])) > 0.00001: 
-                            is_duplicate = True
-                            bot_state["positions"][sym] = p['side'].upper()
-                            break
-                
-                if is_duplicate:
-                    continue
-
-                # 주문 수량 계산
-                bal = binance.fetch_balance()
-                free_usdt = bal['USDT']['free']
-                order_cost = bot_state["period_capital"]
-                if free_usdt < order_cost: order_cost = free_usdt * 0.99 
-                if order_cost < 5.0: continue
-
-                amount_usdt = order_cost * config.LEVERAGE
-                amount = binance.amount_to_precision(sym, amount_usdt / curr)
-                
-                # 시장가 매수 주문
-                binance.create_market_buy_order(sym, amount)
-                bot_state["positions"][sym] = "LONG"
-                write_trade_log("BUY_LONG", sym, curr, amount)
-                telegram_notifier.send_telegram_message(f"⚡ <b>[LONG 진입]</b> {sym} @ {curr}")
+            free_usdt = account.balance()['USDT']['free']
+        except Exception as e:
+            logger.error(f"진입 주문 배치용 잔고 조회 실패: {e}")
+            return
+
+        if len(candidates) > slots:
+            try:
+                prices = fetch_last_prices(candidates)
+            except Exception as e:
+                logger.warning(f"진입 주문 우선순위용 현재가 조회 실패 (심볼 순서대로 배치): {e}")
+                prices = {}
+            # 목표가 / 현재가가 작을수록 먼저 발동될 주문
+            candidates.sort(key=lambda sym: bot_state["targets"][sym]['long'] / prices[sym] if prices.get(sym) else float('inf'))
+
+        placed = 0
+        for sym in candidates:
+            if placed >= slots: break
+            target = bot_state["targets"][sym]['long']
+            try:
+                amount = calc_order_amount(sym, target, free_usdt)
+                if amount is None: continue
+                params = {'triggerPrice': binance.price_to_precision(sym, target), 'workingType': 'CONTRACT_PRICE'}
+                order = binance.create_order(sym, 'market', 'buy', amount, None, params)
+                bot_state["entry_orders"][sym] = {"id": order['id'], "target": target, "amount": amount}
+                placed += 1
+                # 미발동 스탑 주문은 증거금을 잡지 않으므로 동시에 발동해도 넘치지 않도록 직접 차감
+                free_usdt -= float(amount) * target / config.LEVERAGE
+                logger.info(f"📌 {sym} 스탑마켓 진입 주문 배치 @ {target:,.4f} (수량 {amount})")
+            except Exception as e:
+                # 이미 목표가를 넘어 즉시 발동되는 경우 등은 거부됨 -> 해당 심볼은 1초 감시로 진입
+                logger.warning(f"{sym} 진입 주문 배치 실패 (현재가 감시로 대체): {e}")
+    account.invalidate()
+    persist_state()
+
+def fetch_open_entry_orders(symbols):
+    """[stop 모드] 심볼별 미체결 조건부 주문 병렬 조회 -> ({심볼: [주문]}, {심볼: 오류})
+
+    심볼 없는 전체 조회는 ccxt binance가 거부하므로(warnWithoutSymbol) 심볼마다 조회한다 (가중치 1씩).
+    """
+    orders, errors = {}, {}
+    if not symbols:
+        return orders, errors
+
+    def fetch(sym):
+        return binance.fetch_open_orders(sym, params=TRIGGER_PARAMS)
+
+    with ThreadPoolExecutor(max_workers=min(MARKET_WORKERS, len(symbols))) as pool:
+        futures = {pool.submit(fetch, sym): sym for sym in symbols}
+        for fut in as_completed(futures):
+            sym = futures[fut]
+            try:
+                orders[sym] = fut.result()
+            except Exception as e:
+                errors[sym] = e
+    return orders, errors
+
+def cancel_entry_orders(sweep=False):
+    """[stop 모드] 대기 중인 진입 주문 전체 취소
+
+    sweep=True면 재시작 전 프로세스가 남긴 주문까지 거래소 미체결 목록에서 찾아 취소한다.
+    """
+    with entry_orders_lock:
+        if sweep and ENTRY_MODE == "stop":
+            open_orders, errors = fetch_open_entry_orders(config.SYMBOLS)
+            for sym, e in errors.items():
+                logger.error(f"{sym} 잔여 진입 주문 조회 실패: {e}")
+            for sym, orders in open_orders.items():
+                for o in orders:
+                    if o['side'] != 'buy' or o.get('reduceOnly'): continue
+                    try:
+                        binance.cancel_order(o['id'], o['symbol'], params=TRIGGER_PARAMS)
+                    except Exception as e:
+                        logger.error(f"{sym} 잔여 진입 주문 취소 실패: {e}")
+                # 조회에 성공한 심볼은 거래소 기준으로 정리 완료 (조회 실패 심볼은 아래에서 기록된 주문 ID로 취소)
+                bot_state["entry_orders"].pop(sym, None)
+
+        for sym, entry in list(bot_state["entry_orders"].items()):
+            try:
+                binance.cancel_order(entry["id"], sym, params=TRIGGER_PARAMS)
+            except Exception as e:
+                # 이미 체결/취소된 주문 -> 체결분은 포지션 동기화/청산 로직이 처리
+                logger.warning(f"{sym} 진입 주문 취소 실패: {e}")
+            bot_state["entry_orders"].pop(sym, None)
+    persist_state()
+
+def reconcile_entry_orders():
+    """[stop 모드] 미체결 목록에서 사라진 진입 주문을 포지션과 대조해 체결 처리"""
+    with entry_orders_lock:
+        if not bot_state["entry_orders"]: return
 
+        try:
+            open_orders, errors = fetch_open_entry_orders(list(bot_state["entry_orders"]))
+            for sym, e in errors.items():
+                logger.warning(f"{sym} 진입 주문 조회 실패: {e}")
+            # 조회에 실패한 심볼은 사라진 것으로 보지 않고 다음 대조로 넘김
+            open_ids = {str(o['id']) for orders in open_orders.values() for o in orders}
+            gone = [sym for sym, entry in bot_state["entry_orders"].items()
+                    if sym in open_orders and str(entry["id"]) not in open_ids]
+            if not gone: return
+
+            # 사라진 주문은 거래소에서 체결되었을 수 있으므로 캐시를 거치지 않고 조회
+            held = {}
+            for p in account.positions(max_age=0):
+                market_sym = p['symbol'].split(':')[0]
+                if abs(float(p['contracts'])) > 0.00001:
+                    held[market_sym] = p
+
+            for sym in gone:
+                entry = bot_state["entry_orders"].pop(sym)
+                if sym in held:
+                    fill_price = float(held[sym].get('entryPrice') or entry["target"])
+                    bot_state["positions"][sym] = held[sym]['side'].upper()
+                    write_trade_log("BUY_LONG", sym, fill_price, entry["amount"], "Stop Entry",
+                                    order={'id': entry["id"]}, target=entry["target"])
+                    telegram_notifier.send_telegram_message(f"⚡ <b>[LONG 진입]</b> {sym} @ {fill_price} (목표 {entry['target']:,.4f})")
+                else:
+                    # 체결 없이 사라진 주문(만료/거부) -> 해당 심볼은 1초 감시로 진입
+                    logger.warning(f"{sym} 진입 주문이 체결 없이 종료됨 (현재가 감시로 대체)")
+
+            # 보유 슬롯이 다 찼으면 남은 진입 주문은 증거금 초과 체결을 막기 위해 취소
+            if bot_state["entry_orders"] and executor.free_slots(held_count()) == 0:
+                logger.info(f"🧺 보유 한도 {executor.max_positions}개 도달 - 남은 진입 주문 취소")
+                cancel_entry_orders()
+            persist_state()
+        except Exception as e:
+            logger.error(f"진입 주문 대조 실패: {e}")
+
+def fetch_last_prices(symbols):
+    """모든 심볼의 현재가를 한 번의 요청으로 조회 (모든 심볼이 같은 시점의 스냅샷을 사용)"""
+    if binance.has.get('fetchLastPrices'):
+        data = binance.fetch_last_prices(symbols)
+        key = 'price'
+    else:
+        data = binance.fetch_tickers(symbols)
+        key = 'last'
+
+    prices = {}
+    for market_sym, item in data.items():
+        price = item.get(key)
+        if price is not None:
+            prices[market_sym.split(':')[0]] = float(price) # BTC/USDT:USDT -> BTC/USDT
+    return prices
+
+def held_count():
+    """보유 포지션 수"""
+    return sum(1 for side in bot_state["positions"].values() if side)
+
+def used_slots():
+    """자본 슬롯을 차지한 심볼 수 (보유 포지션 + 대기 중인 진입 주문)"""
+    pending = sum(1 for sym in list(bot_state["entry_orders"]) if not bot_state["positions"].get(sym))
+    return held_count() + pending
+
+def poll_watch_symbols():
+    """1초 현재가 감시 대상 (이미 포지션이 있거나 거래소 진입 주문이 걸린 심볼은 제외)"""
+    return [sym for sym in config.SYMBOLS
+            if not bot_state["positions"][sym] and sym not in bot_state["entry_orders"]]
+
+def check_entry():
+    if not bot_state["is_active"] or bot_state["temp_pause"]: return
+
+    watch_symbols = poll_watch_symbols()
+    if not watch_symbols or executor.free_slots(used_slots()) == 0: return
+    # 가중치 한도에 가까우면 이번 감시는 건너뛰어 주문/청산 몫을 남김
+    if not budget.has_room(LOW, weight_of('fetch_last_prices' if binance.has.get('fetchLastPrices') else 'fetch_tickers')):
+        return
+
+    try:
+        with budget.priority(LOW):
+            prices = fetch_last_prices(watch_symbols)
+        signal_ms = now_ms() # 돌파를 확인한 시점 (진입 지연 분석용)
+    except Exception as e:
+        logger.error(f"현재가 일괄 조회 실패: {e}")
+        return
+
+    breakouts = []
+    for sym in watch_symbols:
+        curr = prices.get(sym)
+        tg_long = bot_state["targets"][sym]['long']
+        # 롱 진입 조건만 확인
+        if curr is not None and tg_long > 0 and curr > tg_long:
+            breakouts.append((sym, curr, tg_long))
+    if not breakouts: return
+
+    # 동시에 여러 심볼이 돌파해도 포지션/잔고는 캐시에서 1회씩만 조회하고, 주문 후 한 번에 무효화
+    try:
+        # [안전장치] 중복 진입 방지
+        for p in account.positions():
+            market_sym = p['symbol'].split(':')[0]
+            if market_sym in bot_state["positions"] and abs(float(p['contracts'])) > 0.00001:
+                bot_state["positions"][market_sym] = p['side'].upper()
+        breakouts = [b for b in breakouts if not bot_state["positions"][b[0]]]
+        selected = executor.select(breakouts, used_slots())
+        if not selected: return
+        free_usdt = account.balance()['USDT']['free']
+    except Exception as e:
+        logger.error(f"진입 전 계좌 조회 실패: {e}")
+        return
+
+    # 주문 수량 계산 (같은 잔고 스냅샷에서 앞선 주문의 증거금을 차감해 사용)
+    orders = []
+    for sym, curr, _ in selected:
+        try:
+            amount = calc_order_amount(sym, curr, free_usdt)
         except Exception as e:
             logger.error(f"{sym} 진입 에러: {e}")
+            continue
+        if amount is None: continue
+        free_usdt -= float(amount) * curr / config.LEVERAGE
+        orders.append((sym, curr, amount))
+
+    # 시장가 매수 주문 (여러 심볼이면 동시 전송)
+    results = executor.execute(orders, send_entry_order)
+    for (sym, curr, amount), result, err in results:
+        if err is not None:
+            logger.error(f"{sym} 진입 에러: {err}")
+            continue
+        order, sent_ms = result
+        bot_state["positions"][sym] = "LONG"
+        write_trade_log("BUY_LONG", sym, curr, amount, order=order, target=bot_state["targets"][sym]['long'],
+                        signal_ms=signal_ms, sent_ms=sent_ms)
+        fill_price = order.get('average') or curr
+        telegram_notifier.send_telegram_message(f"⚡ <b>[LONG 진입]</b> {sym} @ {fill_price}")
+
+    if results:
+        account.invalidate()
+        persist_state()
+
+def open_positions_to_close(symbols=None):
+    """청산 대상 포지션 목록 [(주문용 심볼, 내부 심볼, 방향, 수량)]"""
+    targets = []
+    # 청산은 거래소 측 체결(스탑 진입 등)을 놓치지 않도록 항상 새로 조회 (주문과 같은 최우선 순위)
+    with budget.priority(CRITICAL):
+        positions = account.positions(max_age=0)
+    for p in positions:
+        order_symbol = p['symbol'] # 주문용 (BTC/USDT:USDT)
+        market_sym = order_symbol.split(':')[0] # 내부용 (BTC/USDT)
+        if market_sym not in config.SYMBOLS: continue
+        if symbols is not None and market_sym not in symbols: continue
+
+        amt = abs(float(p['contracts']))
+        if amt > 0.00001: # 먼지 잔고 무시
+            targets.append((order_symbol, market_sym, p['side'].upper(), amt))
+    return targets
+
+def send_entry_order(order):
+    """시장가 매수 주문 1건 전송 ((심볼, 현재가, 수량)) -> (주문 응답, 전송 시각 ms)"""
+    sym, _, amount = order
+    sent_ms = now_ms()
+    # RESULT 응답이면 체결가/체결 수량이 주문 응답에 바로 포함됨
+    return binance.create_market_buy_order(sym, amount, params={'newOrderRespType': 'RESULT'}), sent_ms
+
+def send_close_order(order_symbol, side, amt):
+    """reduceOnly 시장가 청산 주문 1건 전송 -> (주문 응답, 전송 시각, 응답 시각, 전송 시각 ms)"""
+    params = {'reduceOnly': True, 'newOrderRespType': 'RESULT'}
+    sent_ms = now_ms()
+    sent_at = time.perf_counter()
+    if side == 'LONG': order = binance.create_market_sell_order(order_symbol, amt, params=params)
+    else: order = binance.create_market_buy_order(order_symbol, amt, params=params)
+    return order, sent_at, time.perf_counter(), sent_ms
 
 def close_all_positions(reason="Time End"):
+    """보유 포지션 전체를 동시에 청산 (실패/부분 체결 심볼은 포지션을 다시 조회해 남은 수량으로 재시도)"""
     msg = f"👋 <b>[청산 실행]</b> 사유: {reason}\n"
-    has_trade = False
+    closed = []
+    retry = set()
+    first_sent = last_ack = None
+    signal_ms = now_ms()
     try:
-        exchange_pos = binance.fetch_positions()
-        for p in exchange_pos:
-            order_symbol = p['symbol'] # 주문용 (BTC/USDT:USDT)
-            market_sym = order_symbol.split(':')[0] # 내부용 (BTC/USDT)
-            
-            if market_sym in config.SYMBOLS:
-                amt = abs(float(p['contracts']))
-                if amt > 0.00001: # 먼지 잔고 무시
-                    side = p['side'].upper()
-                    params = {'reduceOnly': True}
+        targets = open_positions_to_close()
+        for attempt in range(CLOSE_RETRIES + 1):
+            if not targets: break
+            if attempt > 0:
+                logger.warning(f"🔁 청산 재시도 {attempt}회차: {[t[1] for t in targets]}")
+
+            retry.clear()
+            with ThreadPoolExecutor(max_workers=min(CLOSE_WORKERS, len(targets))) as pool:
+                futures = {pool.submit(send_close_order, order_symbol, side, amt): (market_sym, side, amt)
+                           for order_symbol, market_sym, side, amt in targets}
+                for fut in as_completed(futures):
+                    market_sym, side, amt = futures[fut]
                     try:
-                        if side == 'LONG': binance.create_market_sell_order(order_symbol, amt, params=params)
-                        else: binance.create_market_buy_order(order_symbol, amt, params=params)
-                        
-                        write_trade_log("EXIT", market_sym, 0, amt, reason)
-                        msg += f"- {market_sym.split('/')[0]} {side} 청산\n"
-                        bot_state["positions"][market_sym] = False
-                        has_trade = True
+                        order, sent_at, acked_at, sent_ms = fut.result()
                     except Exception as order_err:
                         logger.warning(f"{market_sym} 청산 주문 실패: {order_err}")
-        if has_trade:
+                        retry.add(market_sym)
+                        continue
+
+                    first_sent = sent_at if first_sent is None else min(first_sent, sent_at)
+                    last_ack = acked_at if last_ack is None else max(last_ack, acked_at)
+                    latency_ms = (acked_at - sent_at) * 1000
+                    # 응답에 체결 수량이 없으면 전량 체결로 간주
+                    filled = (order or {}).get('filled')
+                    filled = amt if filled is None else float(filled)
+                    if filled > 0:
+                        write_trade_log("EXIT", market_sym, 0, filled, reason, order=order, signal_ms=signal_ms, sent_ms=sent_ms)
+                    if amt - filled > 0.00001:
+                        logger.warning(f"{market_sym} 청산 부분 체결: {filled} / {amt}")
+                        retry.add(market_sym)
+                        continue
+                    bot_state["positions"][market_sym] = False
+                    closed.append((market_sym, side, latency_ms))
+
+            account.invalidate()
+            if not retry: break
+            # 실패/부분 체결 심볼만 포지션을 다시 조회해 남은 수량으로 재시도 (이미 정리된 심볼은 완료 처리)
+            targets = open_positions_to_close(retry)
+            for market_sym in retry - {t[1] for t in targets}:
+                bot_state["positions"][market_sym] = False
+
+        remaining = sorted(t[1] for t in targets) if retry else []
+        if remaining:
+            logger.error(f"❌ 청산 미완료 심볼: {remaining}")
+            msg += f"⚠️ 청산 실패: {', '.join(s.split('/')[0] for s in remaining)}\n"
+
+        if closed:
+            for market_sym, side, latency_ms in closed:
+                msg += f"- {market_sym.split('/')[0]} {side} 청산 (<code>{latency_ms:.0f}ms</code>)\n"
+            span_ms = (last_ack - first_sent) * 1000
+            msg += f"⏱️ 첫 주문 ~ 마지막 응답: <code>{span_ms:.0f}ms</code>"
+            logger.info(f"⏱️ 청산 {len(closed)}건 완료: 총 {span_ms:.0f}ms / "
+                        + ", ".join(f"{s} {l:.0f}ms" for s, _, l in closed))
+        if closed or remaining:
             telegram_notifier.send_telegram_message(msg)
     except Exception as e:
         logger.error(f"청산 오류: {e}")
+    persist_state()
 
 # ===============================================================
 # [메인 루프] - 핵심 수정 부분
@@ -292,81 +770,126 @@ def close_all_positions(reason="Time End"):
 # ===============================================================
 # [메인 루프] - 재실행 시 대기 로직 최적화
 # ===============================================================
-def main():
-    set_leverage_all()
-    threading.Thread(target=telegram_listener, daemon=True).start()
+def main(until=None):
+    """봇 메인 루프 (until: 이 시각(UTC datetime)이 되면 종료 - 페이퍼 트레이딩/벤치마크용)"""
+    if RECORD_FILE and recorder is None:
+        start_recording(RECORD_FILE)
+
+    # [1] 거래소 서버 시간 기준으로 봉 경계 계산
+    scheduler = CandleScheduler(config.TIMEFRAME, clock, CLOSE_BEFORE_SEC, OPEN_DELAY_SEC)
+    scheduler.sync_time(binance)
+
+    # 같은 봉 안에서 재시작했다면 스냅샷으로 상태 복구 (레버리지/목표가 재설정 생략)
+    restored = restore_state(scheduler.candle_start_ms())
+    load_markets_all()
+    if not restored:
+        set_leverage_all()
+    if telegram_notifier.ENABLED:
+        threading.Thread(target=telegram_listener, daemon=True).start()
+    threading.Thread(target=latency_dumper, daemon=True).start()
     
     telegram_notifier.send_telegram_message("🤖 <b>봇 재가동</b> 시간 동기화 중...")
-
-    # [1] 현재 시간 체크
-    now_utc = datetime.datetime.now(timezone.utc)
-    is_break_time = False
-    
-    # UTC 23:50 ~ 23:59 (일봉 마감 10분 전) 인지 확인
-    if now_utc.hour == 23 and now_utc.minute >= 50:
-        is_break_time = True
     
-    # [2] 분기 처리
-    if is_break_time:
+    # [2] 분기 처리: 봉 마감 전 청산 구간(기본 10분) 인지 확인
+    if scheduler.in_close_window():
         # (A) 휴식 시간에 켜졌다면: 아무것도 안 하고 청산 후 대기
-        bot_state["last_close_slot"] = f"{now_utc.date()}_{now_utc.hour}"
+        now_utc = scheduler.to_datetime(scheduler.now_ms())
         
-        next_start = get_next_start_time()
+        next_start = scheduler.to_datetime(scheduler.next_open_ms())
         next_kst = next_start + datetime.timedelta(hours=9)
         
         msg = f"💤 <b>[휴식 시간 재시작]</b> 마감 임박({now_utc.strftime('%H:%M')})으로 인해 매매를 쉬고,\n"
         msg += f"다음 시작 시간(KST {next_kst.strftime('%H:%M')})까지 대기합니다."
         telegram_notifier.send_telegram_message(msg)
         
-        # 혹시 들고 있을 포지션 정리
-        close_all_positions(reason="Restart inside Break Time")
+        # 혹시 들고 있을 진입 주문/포지션 정리 (이번 봉 청산을 이미 마친 스냅샷이면 생략)
+        if bot_state["last_close_slot"] != scheduler.slot_id():
+            cancel_entry_orders(sweep=True)
+            close_all_positions(reason="Restart inside Break Time")
+            bot_state["last_close_slot"] = scheduler.slot_id()
+            persist_state()
         
-        # 12:00 / 00:00 될 때까지 무한 대기
-        while datetime.datetime.now(timezone.utc) < next_start:
-            time.sleep(1)
-            
-        time.sleep(10) # 캔들 생성 대기
+        # 다음 봉 시작 + 캔들 생성 대기 시각까지 한 번에 대기
+        if not scheduler.wait_until(scheduler.next_open_ms() + scheduler.open_delay_ms, until, stop_requested): return
         telegram_notifier.send_telegram_message("🚀 <b>새로운 타임프레임 시작!</b>")
         update_targets(is_restart=False)
 
+    elif restored:
+        # (B-1) 같은 봉 스냅샷 복구: 포지션/진입 주문만 거래소와 한 번 대조
+        sync_positions()
+        reconcile_entry_orders()
+        telegram_notifier.send_telegram_message("♻️ <b>[스냅샷 복구]</b> 저장된 목표가로 매매를 재개합니다.")
+
     else:
-        # (B) 매매 시간에 켜졌다면: 즉시 복구 및 매매 재개
+        # (B-2) 매매 시간에 켜졌다면: 즉시 복구 및 매매 재개
         update_targets(is_restart=True)
         telegram_notifier.send_telegram_message("✅ <b>[매매 재개]</b> 기존 포지션이 있다면 유지하고, 신규 진입을 감시합니다.")
     
     # [3] 메인 감시 루프 진입
-    while True:
+    last_reconcile = 0.0
+    while (until is None or clock.now() < until) and not shutdown_requested:
         try:
-            now_utc = datetime.datetime.now(timezone.utc)
+            server_ms = scheduler.now_ms()
+            close_at = scheduler.close_deadline_ms(server_ms)
             
-            # UTC 23:50 ~ 23:59 사이: 휴식 및 청산 로직
-            if now_utc.hour == 23 and now_utc.minute >= 50:
-                current_slot = f"{now_utc.date()}_{now_utc.hour}"
-
-                # 이미 이번 타임 청산을 완료했다면, 추가 청산 없이 대기만 함
-                if bot_state["last_close_slot"] == current_slot:
-                    time.sleep(10) # 루프 과부하 방지
-                    continue
-
-                # 청산 실행
-                bot_state["last_close_slot"] = current_slot
-                close_all_positions(reason="Timeframe End")
-                telegram_notifier.send_telegram_message("💤 <b>휴식</b> 다음 봉 시작까지 대기...")
-                
-                # 10분+알파 대기 (다음 봉 시작 12:00/00:00 넘길 때까지)
-                time.sleep(601) 
+            # 봉 마감 전 청산 구간: 휴식 및 청산 로직
+            if server_ms >= close_at:
+                current_slot = scheduler.slot_id(server_ms)
+
+                # 이미 이번 봉 청산을 완료했다면 추가 청산 없이 다음 봉까지 대기만 함
+                if bot_state["last_close_slot"] != current_slot:
+                    # 청산 실행 (청산을 마친 뒤에 기록 -> 청산 도중 죽으면 재시작 시 남은 포지션을 다시 청산)
+                    reconcile_entry_orders() # 마지막 대조 이후 체결분 기록
+                    cancel_entry_orders()
+                    close_all_positions(reason="Timeframe End")
+                    bot_state["last_close_slot"] = current_slot
+                    persist_state()
+                    telegram_notifier.send_telegram_message("💤 <b>휴식</b> 다음 봉 시작까지 대기...")
                 
-                time.sleep(10) 
+                # 다음 봉 시작 + 캔들 생성 대기 시각까지 한 번에 대기
+                if not scheduler.wait_until(scheduler.next_open_ms(server_ms) + scheduler.open_delay_ms, until, stop_requested): break
+                scheduler.sync_time(binance) # 봉마다 서버 시간 재동기화 (로컬 시계 드리프트 보정)
                 update_targets(is_restart=False) 
+                continue
             
-            else:
-                # 평상시: 진입 감시
-                check_entry()
-                time.sleep(1)
+            # 평상시: 진입 감시 (1회 순회 소요 시간 측정 후 남은 시간만 대기)
+            loop_start = time.perf_counter()
+            loop_start_clock = clock.time()
+            check_entry()
+            if ENTRY_MODE == "stop" and clock.time() - last_reconcile >= ENTRY_RECONCILE_SEC:
+                last_reconcile = clock.time()
+                reconcile_entry_orders()
+            elapsed = time.perf_counter() - loop_start
+            record_loop_time(elapsed)
+
+            # 다음 감시 시각: 1초 뒤 (단, 청산 시각을 넘기지 않음)
+            next_tick = loop_start_clock + 1
+            if ENTRY_MODE == "stop" and not poll_watch_symbols():
+                # 모든 심볼이 거래소 주문/포지션으로 처리 중이면 다음 체결 대조 시각까지 대기
+                next_tick = last_reconcile + ENTRY_RECONCILE_SEC
+            wake_ms = min(close_at, next_tick * 1000 + scheduler.offset_ms)
+            scheduler.wait_until(wake_ms, until, stop_requested)
             
         except Exception as e:
             logger.error(f"메인 루프 에러: {e}")
-            time.sleep(10)
+            clock.sleep(10)
+
+def stop_requested():
+    return shutdown_requested
+
+def handle_sigterm(signum, frame):
+    """SIGTERM(재시작 스크립트) 수신 -> 종료 플래그만 설정
+
+    핸들러는 메인 스레드의 임의 지점에서 실행되므로 여기서 상태를 저장하면 메인 스레드가 이미 잡은
+    저장 락에서 교착될 수 있다. 메인 루프가 플래그를 보고(대기 중에도 1초 이내) 빠져나온 뒤 저장한다.
+    """
+    global shutdown_requested
+    shutdown_requested = True
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    main()
+    if shutdown_requested:
+        # 상태 저장 후 정상 종료 (atexit으로 텔레그램 큐/매매 기록/응답 녹화 버퍼도 비움)
+        logger.info("🛑 종료 신호 수신 - 상태 저장 후 종료")
+        persist_state()
\ No newline at end of file
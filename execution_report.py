@@ -0,0 +1,201 @@
+# execution_report.py
+
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import backtest
+import candle_cache
+import trade_journal
+from scheduler import parse_timeframe, WEEK_OFFSET_MS
+
+# ==============================================================================
+# 🧾 실거래 체결 품질 분석 (매매 기록 vs 백테스트 가정)
+# ==============================================================================
+# backtest.py는 고가가 목표가를 넘으면 목표가에 진입하고 봉 종가에 청산한다고 가정한다.
+# 매매 기록(trade_journal)의 왕복 거래마다 같은 기간 캔들 캐시에서 해당 봉을 찾아
+#   - 진입 슬리피지: 실제 체결가 vs 목표가 (bp)
+#   - 돌파 ~ 체결 지연: 하위 봉(1m) 고가가 처음 목표가를 넘은 하위 봉의 중간 시각 -> 체결 시각
+#     (하위 봉 해상도만큼 오차가 있으므로 봇 감지 ~ 체결, 주문 전송 ~ 체결 지연은 매매 기록의 시각으로 별도 계산)
+#   - 청산 괴리: 실제 청산가 vs 봉 종가 (bp)
+#   - 실제 손익 vs 같은 수량으로 백테스트 가정을 적용한 모의 손익
+# 을 계산하고 심볼별 / 시간대(UTC)별로 집계한다. 마지막에 intrabar.py 체결 모델에 넣을
+# 지연/슬리피지 추정치와 지연 1초당 슬리피지 비용을 출력한다.
+#   python execution_report.py trade_history.csv --timeframe 1d --k 0.5 --days 90 --offline
+
+BASE_TIMEFRAME = "1m"       # 돌파 시각을 찾는 하위 봉 해상도 (이 해상도가 지연 측정 오차 상한)
+OPEN_DELAY_SEC = 10         # coin_bot.OPEN_DELAY_SEC (봉 시작 후 감시 시작까지)
+POLL_SEC = 1.0              # coin_bot 진입 감시 주기 (돌파 ~ 감지 평균 지연 = 주기의 절반)
+
+def _bar_start(ms, tf_ms):
+    offset = WEEK_OFFSET_MS if tf_ms % (7 * 86400 * 1000) == 0 else 0
+    return (ms - offset) // tf_ms * tf_ms + offset
+
+def load_candles(symbols, base_timeframe, since_ms, offline=False):
+    """심볼별 하위 봉 캐시 (온라인이면 since_ms 이후를 먼저 갱신)"""
+    exchange = None
+    if not offline:
+        import ccxt
+        exchange = ccxt.binance()
+    base_map = {}
+    for sym in symbols:
+        try:
+            candle_cache.update_candles(exchange, sym, base_timeframe, since_ms, offline=offline)
+        except FileNotFoundError as e:
+            print(f"⚠️ {e}")
+            continue
+        base_map[sym] = candle_cache.load_candles(sym, base_timeframe)
+    return base_map
+
+def reconcile(trips, base_map, timeframe, k, base_timeframe=BASE_TIMEFRAME, open_delay_sec=OPEN_DELAY_SEC,
+              fee_rate=backtest.FEE_RATE, funding_rate=backtest.FUNDING_RATE):
+    """왕복 거래(trade_journal.round_trips)별 체결 품질 지표 DataFrame (캔들이 없는 거래는 제외)"""
+    tf_ms = parse_timeframe(timeframe) * 1000
+    base_ms = parse_timeframe(base_timeframe) * 1000
+    rows = []
+    for sym, group in trips.groupby("Symbol", sort=False):
+        base = base_map.get(sym)
+        if base is None or len(base) == 0: continue
+        bars = candle_cache.resample(base, timeframe)
+        base_ts = base[:, 0].astype(np.int64)
+        bar_ts = bars[:, 0].astype(np.int64)
+
+        for t in group.itertuples(index=False):
+            entry_ms = int(t[group.columns.get_loc("Entry Fill")])
+            if entry_ms <= 0: entry_ms = int(t[group.columns.get_loc("Entry Time")])
+            start = _bar_start(entry_ms, tf_ms)
+            i = int(np.searchsorted(bar_ts, start))
+            if i == 0 or i >= len(bars) or bar_ts[i] != start or bar_ts[i - 1] != start - tf_ms: continue
+            o, h, c = bars[i, 1], bars[i, 2], bars[i, 4]
+            sim_target = o + (bars[i - 1, 2] - bars[i - 1, 3]) * k
+            target = t.Target if t.Target > 0 else sim_target
+
+            # 목표가를 처음 넘은 하위 봉 (감시 시작 이후) -> 하위 봉 안의 돌파 시각은 알 수 없으므로 중간 시각 사용
+            watch_ms = start + open_delay_sec * 1000
+            lo = int(np.searchsorted(base_ts, watch_ms // base_ms * base_ms))
+            hi = int(np.searchsorted(base_ts, start + tf_ms))
+            crossed = np.flatnonzero(base[lo:hi, 2] > target)
+            cross_ms = -1
+            if len(crossed):
+                cross_bar = int(base_ts[lo + crossed[0]])
+                cross_lo = max(cross_bar, watch_ms)
+                cross_ms = min(cross_lo + (cross_bar + base_ms - cross_lo) // 2, entry_ms)
+
+            entry_signal = int(t[group.columns.get_loc("Entry Signal")])
+            entry_sent = int(t[group.columns.get_loc("Entry Sent")])
+            exit_fill = int(t[group.columns.get_loc("Exit Fill")])
+            if exit_fill <= 0: exit_fill = int(t[group.columns.get_loc("Exit Time")])
+
+            amount = t.Amount
+            sim_pnl = amount * ((c - sim_target) - (sim_target + c) * fee_rate - sim_target * funding_rate)
+            rows.append({
+                "Symbol": sym,
+                "Bar": start,
+                "Hour": pd.Timestamp(entry_ms, unit='ms').hour,
+                "Target": target,
+                "Entry": t.Entry,
+                "Exit": t.Exit,
+                "Close": c,
+                "Slippage (bp)": (t.Entry - target) / target * 1e4,
+                "Target Gap (bp)": (target - sim_target) / sim_target * 1e4, # 실거래 목표가 vs 캐시로 계산한 목표가
+                "Cross->Fill (ms)": entry_ms - cross_ms if cross_ms > 0 else np.nan,
+                "Signal->Fill (ms)": entry_ms - entry_signal if entry_signal > 0 else np.nan,
+                "Sent->Fill (ms)": entry_ms - entry_sent if entry_sent > 0 else np.nan,
+                "Exit Drift (bp)": (t.Exit - c) / c * 1e4 if t.Exit > 0 else np.nan,
+                "Exit Before Close (s)": (start + tf_ms - exit_fill) / 1000,
+                "Sim Entered": bool(h > sim_target),
+                "Live PnL": t.PnL,
+                "Sim PnL": sim_pnl if h > sim_target else 0.0,
+            })
+    report = pd.DataFrame(rows)
+    if not report.empty:
+        report["PnL Gap"] = report["Live PnL"] - report["Sim PnL"]
+    return report
+
+def aggregate(report, by):
+    """심볼별(by="Symbol") / 시간대별(by="Hour") 요약"""
+    return report.groupby(by).agg(**{
+        "Trades": ("Symbol", "size"),
+        "Slippage (bp)": ("Slippage (bp)", "mean"),
+        "Slippage p90 (bp)": ("Slippage (bp)", lambda s: s.quantile(0.9)),
+        "Cross->Fill p50 (ms)": ("Cross->Fill (ms)", "median"),
+        "Signal->Fill p50 (ms)": ("Signal->Fill (ms)", "median"),
+        "Exit Drift (bp)": ("Exit Drift (bp)", "mean"),
+        "Live PnL": ("Live PnL", "sum"),
+        "Sim PnL": ("Sim PnL", "sum"),
+        "PnL Gap": ("PnL Gap", "sum"),
+    })
+
+def fit_fill_model(report, poll_sec=POLL_SEC):
+    """intrabar.py 체결 모델 추정치와 지연 1초당 진입 슬리피지 (bp/초, 표본 부족 시 NaN)
+
+    체결 지연은 매매 기록의 감지 ~ 체결 시각이 있으면 그것에 평균 감지 지연(poll_sec / 2)을 더해 쓰고,
+    없으면(이전 기록) 하위 봉 기준 돌파 ~ 체결 추정치를 쓴다.
+    """
+    latency = report["Cross->Fill (ms)"] / 1000
+    valid = latency.notna() & report["Slippage (bp)"].notna()
+    slope = np.nan
+    if valid.sum() >= 3 and latency[valid].std() > 0:
+        slope = float(np.polyfit(latency[valid], report.loc[valid, "Slippage (bp)"], 1)[0])
+    signal = report["Signal->Fill (ms)"].dropna()
+    fill_delay = signal.median() / 1000 + poll_sec / 2 if len(signal) else latency.median()
+    return {
+        "fill_delay_sec": float(fill_delay),
+        "slippage_bps": float(report["Slippage (bp)"].median()),
+        "bps_per_sec": slope,
+    }
+
+FORMATTERS = {
+    "Slippage (bp)": "{:+.2f}".format,
+    "Slippage p90 (bp)": "{:+.2f}".format,
+    "Cross->Fill p50 (ms)": "{:,.0f}".format,
+    "Signal->Fill p50 (ms)": "{:,.0f}".format,
+    "Exit Drift (bp)": "{:+.2f}".format,
+    "Live PnL": "${:+,.2f}".format,
+    "Sim PnL": "${:+,.2f}".format,
+    "PnL Gap": "${:+,.2f}".format,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="실거래 체결 품질 분석 (매매 기록 vs 백테스트 체결 가정)")
+    parser.add_argument("path", nargs="?", default="trade_history.csv")
+    parser.add_argument("--timeframe", default="1d", help="봇의 config.TIMEFRAME")
+    parser.add_argument("--k", type=float, default=0.5, help="봇의 config.K_VALUE")
+    parser.add_argument("--base", default=BASE_TIMEFRAME, help="돌파 시각을 찾는 하위 봉 해상도")
+    parser.add_argument("--days", type=float, default=None, help="최근 N일 거래만 분석")
+    parser.add_argument("--offline", action="store_true", help="네트워크 없이 로컬 캐시만 사용")
+    parser.add_argument("--csv", default=None, help="거래별 결과를 CSV로 저장")
+    args = parser.parse_args()
+
+    start_ms = None if args.days is None else int((time.time() - args.days * 86400) * 1000)
+    trips = trade_journal.round_trips(trade_journal.load_journal(args.path, start_ms))
+    if trips.empty:
+        raise SystemExit("분석할 왕복 거래가 없습니다")
+
+    tf_ms = parse_timeframe(args.timeframe) * 1000
+    since = _bar_start(int(trips["Entry Time"].min()), tf_ms) - tf_ms
+    base_map = load_candles(trips["Symbol"].unique(), args.base, since, args.offline)
+    report = reconcile(trips, base_map, args.timeframe, args.k, args.base)
+    if report.empty:
+        raise SystemExit("거래 기간의 캔들이 캐시에 없습니다")
+    if args.csv:
+        report.to_csv(args.csv, index=False)
+
+    print("\n" + "=" * 120)
+    print(f"🧾 체결 품질 [{args.timeframe} / K={args.k}] 거래 {len(report):,}건 (캔들 없음 {len(trips) - len(report)}건)")
+    print("=" * 120)
+    print(aggregate(report, "Symbol").to_string(formatters=FORMATTERS))
+    print("-" * 120)
+    print(aggregate(report, "Hour").to_string(formatters=FORMATTERS))
+    print("-" * 120)
+
+    fit = fit_fill_model(report)
+    not_entered = int((~report["Sim Entered"]).sum())
+    print(f"실제 손익 ${report['Live PnL'].sum():+,.2f} / 백테스트 가정 손익 ${report['Sim PnL'].sum():+,.2f} "
+          f"(백테스트에서는 미진입 {not_entered}건)")
+    print(f"목표가 차이 중앙값 {report['Target Gap (bp)'].median():+.2f}bp / 청산 시각 중앙값: 마감 "
+          f"{report['Exit Before Close (s)'].median():.0f}초 전")
+    print(f"체결 모델 추정: python intrabar.py --base {args.base} --fill-delay {fit['fill_delay_sec']:.1f} "
+          f"--slippage {fit['slippage_bps']:.1f}")
+    if not np.isnan(fit["bps_per_sec"]):
+        print(f"지연 1초당 진입 슬리피지: {fit['bps_per_sec']:+.2f}bp (하위 봉 {args.base} 해상도 기준)")
@@ -0,0 +1,221 @@
+# intrabar.py
+
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import candle_cache
+from scheduler import parse_timeframe, WEEK_OFFSET_MS
+
+# ==============================================================================
+# 🔬 봉 내부(1분봉) 경로 기반 백테스트
+# ==============================================================================
+# backtest.py는 고가가 목표가를 넘으면 목표가에 체결, 종가에 청산한다고 가정한다.
+# 여기서는 실제 봇처럼
+#   - 봉 시작 + OPEN_DELAY_SEC 이후부터 마감 전 청산 시각 전까지 현재가를 감시하고
+#   - 하위 봉(1분봉) 고가가 처음 목표가를 넘은 시점에 시장가로 진입하며 (체결 지연 + 슬리피지)
+#   - 마감 CLOSE_BEFORE_SEC 전 시각의 가격으로 청산한다 (슬리피지)
+# 각 봉을 (봉 x 하위 봉) 격자로 펼쳐 첫 돌파 위치를 배열 연산으로 찾는다. 하위 봉 캐시는 메모리 매핑으로
+# 열고 CHUNK_ROWS개 격자 칸 단위로 잘라 처리하므로 수년치 1분봉도 전체를 메모리에 올리지 않는다.
+#   python intrabar.py --timeframes 1d 12h --k 0.3 0.5 --offline
+
+OPEN_DELAY_SEC = 10         # coin_bot.OPEN_DELAY_SEC (새 봉 시작 후 목표가 계산까지)
+CLOSE_BEFORE_SEC = 600      # coin_bot.CLOSE_BEFORE_SEC (마감 몇 초 전 청산)
+FILL_DELAY_SEC = 1.5        # 돌파 ~ 체결까지 지연 (1초 감시 주기 + 주문 왕복)
+SLIPPAGE_BPS = 2.0          # 시장가 진입/청산 시 불리한 방향 슬리피지 (bp)
+CHUNK_ROWS = 4_000_000      # 한 번에 펼치는 격자 칸 수 (칸당 float64 4개 -> 약 128MB)
+
+def _bar_offset(tf_ms):
+    return WEEK_OFFSET_MS if tf_ms % (7 * 86400 * 1000) == 0 else 0
+
+def _dense_grid(base, t0, n_bars, tf_ms, base_ms):
+    """[t0, t0 + n_bars*tf) 구간 하위 봉을 (OHLC, 봉, 하위 봉) 격자로 배치 (빠진 하위 봉은 NaN)"""
+    ts = base[:, 0]
+    lo = int(np.searchsorted(ts, t0))
+    hi = int(np.searchsorted(ts, t0 + n_bars * tf_ms))
+    rows = np.asarray(base[lo:hi])
+
+    per_bar = tf_ms // base_ms
+    grid = np.full((4, n_bars, per_bar), np.nan)
+    pos = ((rows[:, 0].astype(np.int64) - t0) // base_ms)
+    grid[:, pos // per_bar, pos % per_bar] = rows[:, 1:5].T
+    return grid
+
+def intrabar_factors(base, timeframe, k_values, base_timeframe="1m",
+                     open_delay_sec=OPEN_DELAY_SEC, close_before_sec=CLOSE_BEFORE_SEC,
+                     fill_delay_sec=FILL_DELAY_SEC, slippage_bps=SLIPPAGE_BPS,
+                     leverage=3.0, fee_rate=0.0004, funding_rate=0.0001, chunk_rows=CHUNK_ROWS):
+    """심볼 1개의 하위 봉 배열(base)로 봉별 슬롯 자금 배율 계산
+
+    반환값: (봉 시작 시각(ms) 배열, 배율 (봉 x K), 진입 여부 (봉 x K))
+    """
+    tf_ms = parse_timeframe(timeframe) * 1000
+    base_ms = parse_timeframe(base_timeframe) * 1000
+    if tf_ms % base_ms:
+        raise ValueError(f"{timeframe}은 하위 봉 {base_timeframe}의 배수가 아닙니다")
+    per_bar = tf_ms // base_ms
+    start_idx = int(open_delay_sec * 1000 // base_ms) # 감시 시작 시각이 속한 하위 봉부터
+    deadline_idx = per_bar - int(np.ceil(close_before_sec * 1000 / base_ms))
+    if not 0 <= start_idx < deadline_idx < per_bar:
+        raise ValueError(f"{timeframe} 봉에서 감시 구간이 비어 있습니다 (하위 봉 {base_timeframe})")
+    delay_bars, delay_frac = divmod(fill_delay_sec * 1000 / base_ms, 1.0)
+    delay_bars = int(delay_bars)
+    slip = slippage_bps / 10000.0
+
+    k_values = np.asarray(k_values, dtype=np.float64)
+    if len(base) == 0:
+        return np.empty(0, dtype=np.int64), np.ones((0, len(k_values))), np.zeros((0, len(k_values)), bool)
+
+    # 하위 봉이 청산 시각까지 존재하는 봉만 평가 (진행 중인 마지막 봉 제외)
+    offset = _bar_offset(tf_ms)
+    first_bar = (int(base[0, 0]) - offset) // tf_ms * tf_ms + offset
+    last_bar = (int(base[-1, 0]) - offset) // tf_ms * tf_ms + offset
+    if int(base[-1, 0]) < last_bar + deadline_idx * base_ms:
+        last_bar -= tf_ms
+    n_bars = max(0, (last_bar - first_bar) // tf_ms + 1)
+
+    bar_starts = first_bar + np.arange(n_bars, dtype=np.int64) * tf_ms
+    factors = np.ones((n_bars, len(k_values)))
+    entries = np.zeros((n_bars, len(k_values)), dtype=bool)
+
+    chunk_bars = max(1, chunk_rows // per_bar)
+    prev_range = np.nan
+    for c0 in range(0, n_bars, chunk_bars):
+        nb = min(chunk_bars, n_bars - c0)
+        o, h, l, c = _dense_grid(base, int(bar_starts[c0]), nb, tf_ms, base_ms)
+        b = np.arange(nb)
+
+        bar_high = np.max(np.where(np.isnan(h), -np.inf, h), axis=1)
+        bar_low = np.min(np.where(np.isnan(l), np.inf, l), axis=1)
+        bar_range = np.where(np.isfinite(bar_high) & np.isfinite(bar_low), bar_high - bar_low, np.nan)
+        # 목표가는 전 봉 변동폭 기준 (청크 경계는 이전 청크 마지막 봉을 이어받음)
+        rng = np.r_[prev_range, bar_range[:-1]]
+        prev_range = bar_range[-1]
+        bar_open = o[:, 0]
+
+        # 마감 전 청산 가격: 청산 시각 하위 봉 시가 (없으면 그 이전 마지막 종가)
+        exit_raw = o[:, deadline_idx].copy()
+        missing = np.isnan(exit_raw)
+        if missing.any():
+            closes = c[:, :deadline_idx]
+            valid = ~np.isnan(closes)
+            last_idx = np.where(valid.any(axis=1), deadline_idx - 1 - np.argmax(valid[:, ::-1], axis=1), 0)
+            exit_raw[missing] = closes[b, last_idx][missing]
+        exit_p = exit_raw * (1 - slip)
+
+        window_high = np.where(np.isnan(h[:, start_idx:deadline_idx]), -np.inf, h[:, start_idx:deadline_idx])
+        run_max = np.maximum.accumulate(window_high, axis=1)
+
+        for j, k in enumerate(k_values):
+            target = bar_open + rng * k
+            with np.errstate(invalid='ignore'):
+                crossed = run_max > target[:, None]
+            # 첫 돌파 하위 봉 = 누적 최고가가 목표가를 처음 넘는 위치 (이진 탐색 대신 argmax)
+            hit = crossed[:, -1]
+            first = np.argmax(crossed, axis=1) + start_idx
+
+            # 돌파 가격: 하위 봉이 목표가 위에서 시작했으면 시가, 아니면 목표가
+            p0 = np.fmax(target, o[b, first])
+            # 체결 지연: delay_bars만큼 뒤 하위 봉에서 시가 -> 종가 방향으로 delay_frac만큼 진행한 가격
+            m = first + delay_bars
+            in_window = m < deadline_idx
+            m = np.minimum(m, deadline_idx - 1)
+            p_start = p0 if delay_bars == 0 else np.where(np.isnan(o[b, m]), p0, o[b, m])
+            p_end = np.where(np.isnan(c[b, m]), p_start, c[b, m])
+            fill = (p_start + (p_end - p_start) * delay_frac) * (1 + slip)
+
+            entry = hit & in_window & np.isfinite(target) & np.isfinite(exit_p)
+            entry_p = np.where(entry, fill, 1.0)
+            with np.errstate(invalid='ignore'):
+                pnl = exit_p - entry_p
+                fee = (entry_p + exit_p) * fee_rate
+                growth = leverage * (pnl - fee - entry_p * funding_rate) / entry_p
+            factors[c0:c0 + nb, j] = np.where(entry, 1.0 + growth, 1.0)
+            entries[c0:c0 + nb, j] = entry
+
+    return bar_starts, factors, entries
+
+def run_intrabar_backtest(base_map, timeframe, k_values, base_timeframe="1m", total_capital=10000.0, **kwargs):
+    """심볼별 하위 봉 배열로 자산 곡선 계산 (backtest.run_vectorized_backtest와 같은 균등 재분배 복리)
+
+    반환값: (봉 시작 시각 DatetimeIndex, {K: 자산 곡선})
+    """
+    per_symbol = [intrabar_factors(base, timeframe, k_values, base_timeframe, **kwargs) for base in base_map.values()]
+
+    # 첫 심볼 봉을 공통 시간축으로 사용, 다른 심볼에 없는 봉은 슬롯 자금 유지(배율 1)
+    bar_starts = per_symbol[0][0]
+    stacked = np.ones((len(bar_starts), len(k_values), len(per_symbol)))
+    for i, (starts, factors, _) in enumerate(per_symbol):
+        idx = np.searchsorted(starts, bar_starts)
+        found = idx < len(starts)
+        found[found] = starts[idx[found]] == bar_starts[found]
+        stacked[found, :, i] = factors[idx[found]]
+
+    curves = total_capital * np.cumprod(stacked.mean(axis=2), axis=0)
+    time_index = pd.to_datetime(bar_starts, unit='ms')
+    return time_index, {k: curves[:, j] for j, k in enumerate(k_values)}
+
+def load_base_data(symbols, days, base_timeframe="1m", offline=False):
+    """하위 봉 캐시 수집/갱신 후 메모리 매핑 배열로 반환 (최근 days일)"""
+    import ccxt
+    binance = None if offline else ccxt.binance()
+    base_map = {}
+    for sym in symbols:
+        print(f"   ㄴ 수집중: {sym} [{base_timeframe}]...", end="\r")
+        now_ms = int(time.time() * 1000) if offline else binance.milliseconds()
+        since = now_ms - days * 24 * 60 * 60 * 1000
+        candle_cache.update_candles(binance, sym, base_timeframe, since, offline=offline)
+        base = candle_cache.load_candles(sym, base_timeframe)
+        if offline and len(base) > 0:
+            since = base[-1, 0] - days * 24 * 60 * 60 * 1000
+        base_map[sym] = base[int(np.searchsorted(base[:, 0], since)):]
+    print()
+    return base_map
+
+if __name__ == "__main__":
+    import backtest
+    parser = argparse.ArgumentParser(description="1분봉 경로 기반 변동성 돌파 백테스트 (봉 종가 가정 백테스트와 비교)")
+    parser.add_argument("--timeframes", nargs="+", default=backtest.TIMEFRAMES)
+    parser.add_argument("--k", nargs="+", type=float, default=backtest.K_VALUES)
+    parser.add_argument("--days", type=int, default=backtest.FETCH_DAYS)
+    parser.add_argument("--base", default="1m", help="하위 봉 해상도")
+    parser.add_argument("--fill-delay", type=float, default=FILL_DELAY_SEC, help="돌파 ~ 체결 지연 (초)")
+    parser.add_argument("--slippage", type=float, default=SLIPPAGE_BPS, help="진입/청산 슬리피지 (bp)")
+    parser.add_argument("--offline", action="store_true", help="네트워크 없이 로컬 캐시만 사용")
+    args = parser.parse_args()
+    backtest.FETCH_DAYS = args.days # evaluate_curve의 CAGR 기간
+
+    base_map = load_base_data(backtest.SYMBOLS, args.days, args.base, args.offline)
+    rows = []
+    for tf in args.timeframes:
+        time_index, curves = run_intrabar_backtest(
+            base_map, tf, args.k, args.base, total_capital=backtest.TOTAL_CAPITAL,
+            fill_delay_sec=args.fill_delay, slippage_bps=args.slippage,
+            leverage=backtest.LEVERAGE, fee_rate=backtest.FEE_RATE, funding_rate=backtest.FUNDING_RATE)
+        # 같은 하위 봉으로 만든 상위 봉에서 기존(목표가 체결 / 종가 청산) 가정 결과도 계산
+        bar_data = {}
+        for sym, base in base_map.items():
+            df = pd.DataFrame(candle_cache.resample(base, tf), columns=candle_cache.COLUMNS)
+            df['datetime'] = pd.to_datetime(df['datetime'].astype(np.int64), unit='ms')
+            df.set_index('datetime', inplace=True)
+            df['range'] = df['high'].shift(1) - df['low'].shift(1)
+            bar_data[sym] = df.loc[df.index.isin(time_index)]
+        _, mats = backtest.build_market_matrix(bar_data)
+
+        for k in args.k:
+            row = backtest.evaluate_curve(tf, k, curves[k])
+            row["Bar Return"] = backtest.evaluate_curve(tf, k, backtest.run_vectorized_backtest(k, mats))["Return"]
+            rows.append(row)
+
+    df_res = pd.DataFrame(rows).sort_values(by="Score (Calmar)", ascending=False)
+    print("=" * 90)
+    print(f"🔬 1분봉 경로 백테스트 (체결 지연 {args.fill_delay}초, 슬리피지 {args.slippage}bp) vs 봉 종가 가정")
+    print("=" * 90)
+    print(df_res.to_string(index=False, formatters={
+        "Final Balance": "${:,.0f}".format,
+        "Return": "{:+.2f}%".format,
+        "Bar Return": "{:+.2f}%".format,
+        "CAGR": "{:+.2f}%".format,
+        "MDD": "{:.2f}%".format,
+        "Score (Calmar)": "{:.2f}".format
+    }))
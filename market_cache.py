@@ -0,0 +1,97 @@
+# market_cache.py
+
+import os
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+# ==============================================================================
+# 🗂️ 마켓 메타데이터 / 레버리지 캐시
+# ==============================================================================
+# 첫 amount_to_precision 호출 시 ccxt가 load_markets로 바이낸스 전체 마켓 목록을 받는 대신,
+# 거래 심볼의 선물 마켓 정보(정밀도, 한도, 계약 크기)만 파일에 저장해 두고 set_markets로 주입한다.
+# 심볼별로 마지막으로 설정한 레버리지도 기록하여 값이 같으면 set_leverage 호출을 생략한다.
+
+logger = logging.getLogger()
+
+def _read(path):
+    if not path or not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def load_markets_cached(exchange, symbols, path, ttl):
+    """TTL 안의 캐시가 있으면 거래소 요청 없이 마켓 정보 주입, 없으면 load_markets 후 저장
+
+    반환값: 캐시 사용 여부
+    """
+    cache = _read(path)
+    markets = cache.get("markets", {})
+    cached_symbols = {sym.split(':')[0] for sym in markets}
+    if markets and time.time() - cache.get("time", 0) < ttl and set(symbols) <= cached_symbols:
+        exchange.set_markets(markets)
+        return True
+
+    exchange.load_markets()
+    # 거래 심볼의 USDT-M 선물 마켓만 저장 (BTC/USDT -> BTC/USDT:USDT)
+    keep = {}
+    for sym, market in exchange.markets.items():
+        if market.get('linear') and sym.split(':')[0] in symbols:
+            keep[sym] = market
+    cache["markets"] = keep
+    cache["time"] = time.time()
+    if path:
+        try:
+            _write(path, cache)
+        except Exception as e:
+            logger.error(f"마켓 캐시 저장 실패: {e}")
+    return False
+
+def ensure_leverage(exchange, symbols, leverage, path, ttl, workers=8):
+    """레버리지가 이미 설정된 심볼은 건너뛰고, 필요한 심볼만 병렬로 set_leverage 호출
+
+    반환값: {심볼: 성공 여부} (설정 호출을 생략한 심볼 포함)
+    """
+    cache = _read(path)
+    known = cache.get("leverage", {})
+    now = time.time()
+    pending = [sym for sym in symbols
+               if not (known.get(sym, {}).get("value") == leverage and now - known[sym].get("time", 0) < ttl)]
+    results = {sym: True for sym in symbols if sym not in pending}
+
+    def apply(sym):
+        exchange.set_leverage(leverage, sym)
+        return sym
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            futures = {sym: pool.submit(apply, sym) for sym in pending}
+            for sym, fut in futures.items():
+                try:
+                    fut.result()
+                    known[sym] = {"value": leverage, "time": now}
+                    results[sym] = True
+                except Exception as e:
+                    logger.error(f"⚠️ {sym} 레버리지 설정 실패: {e}")
+                    known.pop(sym, None)
+                    results[sym] = False
+
+        # 다른 프로세스가 그 사이 마켓 캐시를 갱신했을 수 있으므로 다시 읽어서 레버리지만 병합
+        if path:
+            cache = _read(path)
+            cache["leverage"] = known
+            try:
+                _write(path, cache)
+            except Exception as e:
+                logger.error(f"레버리지 캐시 저장 실패: {e}")
+    return results
@@ -0,0 +1,295 @@
+# market_recorder.py
+
+import os
+import sys
+import copy
+import gzip
+import json
+import time
+import atexit
+import bisect
+import argparse
+import datetime
+import threading
+from collections import deque, Counter
+from datetime import timezone
+
+# ==============================================================================
+# 📼 거래소 응답 녹화 / 재생
+# ==============================================================================
+# 녹화: InstrumentedExchange에 MarketRecorder를 붙이면 봇이 받은 모든 거래소 응답(시세, 캔들, 포지션,
+# 잔고, 주문 응답, 오류)과 수량/가격 정밀도 계산 결과를 전송 시각과 함께 gzip JSONL 파일에 남긴다.
+# 매매 스레드는 참조만 큐에 넣고 반환하며, 직렬화/압축/쓰기는 백그라운드 스레드가 FLUSH_SEC마다 처리한다.
+# (응답 객체는 나중에 직렬화되므로 봇이 응답을 수정하지 않는다는 전제 - ccxt는 매번 새 객체를 반환)
+#
+# 재생: ReplayExchange가 녹화 파일을 거래소처럼 흉내 내고 coin_bot.main()을 SimClock 위에서
+# 대기 없이 실행한다. 조회 응답은 같은 요청의 녹화 응답을 순서대로(이미 지난 것은 건너뛰고) 돌려주며,
+# 녹화 시각이 조금 뒤(LOOKAHEAD_MS 이내)면 시계를 그 시각으로 옮겨 실거래 당시의 응답 지연을 재현한다.
+# 주문/취소/정밀도 계산은 같은 인자의 녹화 응답을 순서대로 돌려준다. 재생 중 봇이 보낸 주문/취소를
+# 녹화와 비교해 같은 결정을 내렸는지(그리고 몇 ms 차이로) 보고한다.
+#   config.py: RECORD_FILE = "records/live.jsonl.gz"
+#   python market_recorder.py records/live.jsonl.gz            (재생 후 결정 비교)
+#   python market_recorder.py records/live.jsonl.gz --stats    (메서드별 녹화 건수)
+
+FLUSH_SEC = 1.0             # 큐를 파일에 쓰는 주기 (초)
+LOOKAHEAD_MS = 500          # 재생 시 이만큼 뒤에 녹화된 응답까지 "지금 보낸 요청의 응답"으로 사용 (진입 감시 주기보다 짧게)
+REPLAY_LOG_FILE = "replay_trade_history.csv"
+
+DECISION_PREFIXES = ("create_", "cancel_", "edit_")  # 봇의 결정 (재생 결과 비교 대상)
+ORDERED_PREFIXES = DECISION_PREFIXES + ("set_", "amount_to_precision", "price_to_precision") # 같은 인자 순서대로 응답
+REPLAYED_PREFIXES = ORDERED_PREFIXES + ("fetch_", "load_markets")
+
+def _key(args, kwargs):
+    """호출 인자 비교용 문자열 (녹화 파일의 JSON과 같은 형태로 정규화)"""
+    return json.dumps([list(args), kwargs], sort_keys=True, default=str)
+
+class MarketRecorder:
+    def __init__(self, path, clock, header=None, flush_sec=FLUSH_SEC):
+        self.path = path
+        self.clock = clock
+        self.flush_sec = flush_sec
+        self.count = 0
+        self._queue = deque()       # append/popleft는 스레드 안전 - 매매 스레드에서 락 없이 추가
+        self._closed = False
+        self._wake = threading.Event()
+        self._write_lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 'a' 모드: 같은 파일에 이어서 녹화하면 gzip 멤버가 추가되며 읽을 때는 하나로 이어짐
+        self._file = gzip.open(path, 'at', encoding='utf-8', compresslevel=6)
+        self._file.write(json.dumps({"type": "header", "t": self.now_ms(), **(header or {})}, default=str) + "\n")
+
+        self._thread = threading.Thread(target=self._writer_loop, name="market-recorder", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def now_ms(self):
+        return int(self.clock.time() * 1000)
+
+    def record(self, method, args, kwargs, t_ms, result=None, error=None):
+        """응답 1건 녹화 (직렬화 없이 큐에만 추가)"""
+        if self._closed: return
+        self._queue.append((t_ms, method, args, kwargs, result, error))
+
+    def flush(self):
+        with self._write_lock:
+            if self._file is None: return
+            lines = []
+            while self._queue:
+                t_ms, method, args, kwargs, result, error = self._queue.popleft()
+                item = {"t": t_ms, "m": method, "a": args, "k": kwargs}
+                if error is not None:
+                    item["e"] = {"type": type(error).__name__, "msg": str(error)[:500]}
+                else:
+                    item["r"] = result
+                lines.append(json.dumps(item, separators=(',', ':'), default=str))
+            if lines:
+                self._file.write("\n".join(lines) + "\n")
+                self.count += len(lines)
+            self._file.flush() # 압축 스트림 동기화 - 비정상 종료 시에도 여기까지는 읽을 수 있음
+
+    def close(self):
+        if self._closed: return
+        self._closed = True
+        self._wake.set()
+        self.flush()
+        with self._write_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _writer_loop(self):
+        while not self._closed:
+            self._wake.wait(self.flush_sec)
+            if self._closed: break
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[응답 녹화] 파일 기록 실패: {e}")
+
+def load_recording(path):
+    """녹화 파일 -> (첫 헤더, 응답 목록 (시각 순))"""
+    header, entries = None, []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+            except ValueError:
+                break # 비정상 종료로 잘린 마지막 줄
+            if item.get("type") == "header":
+                if header is None: header = item
+                continue
+            entries.append(item)
+    entries.sort(key=lambda e: e["t"])
+    return header or {}, entries
+
+class ReplayError(Exception):
+    """녹화된 거래소 오류 재현 / 녹화에 없는 주문"""
+
+class ReplayExchange:
+    """녹화 파일로 거래소 응답을 재현하는 모의 거래소 (coin_bot.set_exchange용)"""
+
+    def __init__(self, header, entries, clock):
+        self.id = header.get("id", "replay")
+        self.has = header.get("has", {})
+        self.clock = clock
+        self.last_response_headers = None
+        self.calls = []             # 재생 중 봇이 보낸 주문/취소 [(시각 ms, 메서드, 인자, 키워드 인자)]
+        self.divergences = []       # 녹화에 같은 주문이 없던 호출
+        self._ordered = {}
+        self._series = {}
+        for e in entries:
+            name = e["m"]
+            if name.startswith(ORDERED_PREFIXES):
+                self._ordered.setdefault(name, []).append(e)
+                continue
+            # 정확한 인자 -> 첫 인자(심볼) -> 메서드 순으로 찾을 수 있도록 세 단계로 색인
+            args = e["a"]
+            for key in ((name, _key(args, e["k"])), (name, json.dumps(args[:1], default=str)), (name,)):
+                ts, items, _ = self._series.setdefault(key, ([], [], [0]))
+                ts.append(e["t"])
+                items.append(e)
+
+    def milliseconds(self):
+        return int(self.clock.ms())
+
+    def throttle(self, cost=None):
+        pass
+
+    def __getattr__(self, name):
+        if not name.startswith(REPLAYED_PREFIXES):
+            raise AttributeError(name)
+        def method(*args, **kwargs):
+            return self._respond(name, args, kwargs)
+        return method
+
+    def _respond(self, name, args, kwargs):
+        now = self.clock.ms()
+        if name.startswith(ORDERED_PREFIXES):
+            decision = name.startswith(DECISION_PREFIXES)
+            if decision:
+                self.calls.append((now, name, args, kwargs))
+            queue = self._ordered.get(name, [])
+            key = _key(args, kwargs)
+            for i, e in enumerate(queue):
+                if _key(e["a"], e["k"]) == key:
+                    self._catch_up(now, e["t"])
+                    return self._result(queue.pop(i))
+            if decision:
+                self.divergences.append((now, name, args, kwargs))
+                raise ReplayError(f"녹화에 없는 주문: {name}{args}")
+            # 녹화되지 않은 정밀도 계산/설정 호출 (예: 실거래에서는 캐시로 생략된 set_leverage)
+            return str(args[1]) if name.endswith("_to_precision") else None
+
+        for key in ((name, _key(args, kwargs)), (name, json.dumps(list(args[:1]), default=str)), (name,)):
+            series = self._series.get(key)
+            if series is None: continue
+            ts, items, cursor = series
+            latest = bisect.bisect_right(ts, now) - 1
+            # 다음 미사용 응답 (그 사이 녹화에만 있는 요청의 응답은 건너뜀)
+            i = max(cursor[0], latest)
+            if i < len(ts) and ts[i] <= now + LOOKAHEAD_MS:
+                cursor[0] = i + 1
+                self._catch_up(now, ts[i])
+                return self._result(items[i])
+            return self._result(items[max(latest, 0)])
+        return None
+
+    def _catch_up(self, now, recorded_ms):
+        """녹화 응답이 조금 뒤 시각이면 시계를 그 시각까지 진행 (실거래 당시 응답 지연 재현)"""
+        if now < recorded_ms <= now + LOOKAHEAD_MS:
+            self.clock.sleep((recorded_ms - now) / 1000)
+
+    @staticmethod
+    def _result(entry):
+        if "e" in entry:
+            raise ReplayError(f"{entry['e']['type']}: {entry['e']['msg']}")
+        return copy.deepcopy(entry["r"])
+
+def recorded_decisions(entries):
+    """녹화에서 봇의 주문/취소 호출 [(시각 ms, 메서드, 인자, 키워드 인자)]"""
+    return [(e["t"], e["m"], e["a"], e["k"]) for e in entries if e["m"].startswith(DECISION_PREFIXES)]
+
+def compare_decisions(recorded, replayed):
+    """녹화 vs 재생 주문/취소를 같은 (메서드, 인자)끼리 순서대로 짝지어 비교
+
+    반환값: (일치 [(메서드, 인자, 녹화 시각, 재생 시각)], 녹화에만 있는 호출, 재생에만 있는 호출)
+    """
+    pending = {}
+    for t, name, args, kwargs in recorded:
+        pending.setdefault((name, _key(args, kwargs)), deque()).append((t, args))
+    matched, replay_only = [], []
+    for t, name, args, kwargs in replayed:
+        queue = pending.get((name, _key(args, kwargs)))
+        if queue:
+            live_t, _ = queue.popleft()
+            matched.append((name, list(args), live_t, t))
+        else:
+            replay_only.append((t, name, list(args)))
+    live_only = [(t, name, args) for (name, _), queue in pending.items() for t, args in queue]
+    return matched, sorted(live_only), replay_only
+
+def replay(path, until_ms=None):
+    """녹화 파일로 coin_bot.main()을 재실행 -> (ReplayExchange, 녹화 응답 목록, 실행 시간 초)"""
+    header, entries = load_recording(path)
+    if not entries:
+        raise ValueError(f"녹화된 응답이 없습니다: {path}")
+
+    # coin_bot import 전에 녹화 당시 설정으로 config 구성
+    import paper_trade
+    settings = header.get("config", {})
+    config = paper_trade.prepare_config(settings.get("SYMBOLS", []), settings.get("TIMEFRAME", "1d"),
+                                        settings.get("K_VALUE", 0.5), settings.get("ENTRY_MODE", "poll"))
+    for key, value in settings.items():
+        setattr(config, key, value)
+    import coin_bot
+    import mock_exchange
+
+    clock = mock_exchange.SimClock(min(header.get("t", entries[0]["t"]), entries[0]["t"]))
+    exchange = ReplayExchange(header, entries, clock)
+    coin_bot.set_exchange(exchange, clock)
+    coin_bot.LOG_FILE = REPLAY_LOG_FILE
+    coin_bot.STATE_FILE = None
+    coin_bot.MARKET_CACHE_FILE = None
+    coin_bot.RECORD_FILE = None
+
+    until_ms = until_ms or entries[-1]["t"]
+    start = time.perf_counter()
+    coin_bot.main(until=datetime.datetime.fromtimestamp(until_ms / 1000, timezone.utc))
+    elapsed = time.perf_counter() - start
+    coin_bot.close_journal()
+    return exchange, entries, elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="거래소 응답 녹화 파일 재생 (coin_bot 결정 재현)")
+    parser.add_argument("path")
+    parser.add_argument("--stats", action="store_true", help="재생하지 않고 메서드별 녹화 건수만 출력")
+    parser.add_argument("--tolerance-ms", type=float, default=1000, help="이보다 시각 차이가 큰 일치 결정은 따로 표시")
+    args = parser.parse_args()
+
+    if args.stats:
+        header, entries = load_recording(args.path)
+        span_h = (entries[-1]["t"] - entries[0]["t"]) / 3600000 if entries else 0
+        print(f"📼 {args.path}: 응답 {len(entries):,}건 / {span_h:.1f}시간 / {os.path.getsize(args.path) / 1e6:.1f}MB")
+        for name, count in Counter(e["m"] for e in entries).most_common():
+            print(f"  {name:<28} {count:>10,}")
+        sys.exit(0)
+
+    exchange, entries, elapsed = replay(args.path)
+    span_sec = (entries[-1]["t"] - entries[0]["t"]) / 1000
+    matched, live_only, replay_only = compare_decisions(recorded_decisions(entries), exchange.calls)
+    late = [m for m in matched if abs(m[3] - m[2]) > args.tolerance_ms]
+
+    print("\n" + "=" * 70)
+    print(f"📼 재생 결과: 녹화 {span_sec / 3600:.1f}시간을 {elapsed:.1f}초에 재생 ({span_sec / max(elapsed, 1e-9):,.0f}배속)")
+    print("=" * 70)
+    print(f"일치한 주문/취소: {len(matched)}건 (시각 차이 {args.tolerance_ms:.0f}ms 초과 {len(late)}건)")
+    print(f"녹화에만 있음: {len(live_only)}건 / 재생에만 있음: {len(replay_only)}건")
+    for t, name, call_args in (live_only + replay_only)[:20]:
+        stamp = datetime.datetime.fromtimestamp(t / 1000, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        print(f"  ⚠️ {stamp} {name} {call_args}")
+    if late:
+        delays = sorted(m[3] - m[2] for m in late)
+        print(f"시각 차이 (재생 - 녹화): 최소 {delays[0]:+,.0f}ms / 최대 {delays[-1]:+,.0f}ms")
+    sys.exit(0 if not live_only and not replay_only else 1)
@@ -0,0 +1,86 @@
+# market_watch.py
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# ==============================================================================
+# 🔭 다심볼 감시 지원 (목표가 병렬 계산 / 진입 실행기)
+# ==============================================================================
+# 수백 개 심볼을 감시할 때 새 봉 시작 시 목표가 계산을 심볼별 병렬 요청으로 처리하고,
+# 돌파 심볼의 진입은 자본 배분을 전담하는 EntryExecutor 하나가 결정/전송한다.
+# (현재가는 fetch_last_prices 한 번으로 전 심볼 스냅샷을 받으므로 감시 자체는 심볼 수와 무관하게 요청 1회)
+
+logger = logging.getLogger()
+
+def calc_target(ohlcv, k):
+    """[전 봉, 현재 봉] -> 롱 목표가 (현재 봉 시가 + 전 봉 변동폭 * K)"""
+    return ohlcv[-1][1] + (ohlcv[-2][2] - ohlcv[-2][3]) * k
+
+def fetch_targets(exchange, symbols, timeframe, k, workers=8):
+    """심볼별 최근 2개 봉을 병렬 조회해 목표가 계산
+
+    반환값: ({심볼: 목표가}, 현재 봉 시작 시각(ms) 또는 None, {심볼: 오류})
+    """
+    targets, errors = {}, {}
+    candle = None
+    if not symbols:
+        return targets, candle, errors
+
+    def fetch(sym):
+        return exchange.fetch_ohlcv(sym, timeframe=timeframe, limit=2)
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(symbols))) as pool:
+        futures = {pool.submit(fetch, sym): sym for sym in symbols}
+        for fut in as_completed(futures):
+            sym = futures[fut]
+            try:
+                ohlcv = fut.result()
+                targets[sym] = calc_target(ohlcv, k)
+                candle = ohlcv[-1][0] if candle is None else max(candle, ohlcv[-1][0])
+            except Exception as e:
+                errors[sym] = e
+    return targets, candle, errors
+
+class EntryExecutor:
+    """진입 주문의 자본 배분 담당
+
+    총 자산을 max_positions 슬롯으로 나눠 슬롯당 증거금을 정하고, 동시에 여러 심볼이 돌파하면
+    남은 슬롯 수만큼 돌파 강도(현재가/목표가)가 큰 순서로 골라 주문을 동시에 전송한다.
+    """
+
+    def __init__(self, max_positions, workers=8):
+        self.max_positions = max(1, int(max_positions))
+        self.workers = workers
+
+    def slot_capital(self, total_usdt):
+        """슬롯당 할당 증거금 (봉 시작 시 1회 계산)"""
+        return total_usdt / self.max_positions
+
+    def free_slots(self, used):
+        """보유 포지션 + 대기 진입 주문 수(used)를 뺀 남은 슬롯"""
+        return max(0, self.max_positions - used)
+
+    def select(self, breakouts, used):
+        """[(심볼, 현재가, 목표가)] 중 남은 슬롯만큼 돌파 강도 순으로 선택"""
+        ranked = sorted(breakouts, key=lambda b: b[1] / b[2] if b[2] > 0 else 0.0, reverse=True)
+        return ranked[:self.free_slots(used)]
+
+    def execute(self, orders, send):
+        """orders의 각 항목을 send(항목)으로 동시 전송 -> [(항목, 결과 또는 None, 오류 또는 None)]"""
+        if not orders:
+            return []
+        if len(orders) == 1:
+            try:
+                return [(orders[0], send(orders[0]), None)]
+            except Exception as e:
+                return [(orders[0], None, e)]
+
+        results = []
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(orders))) as pool:
+            futures = {pool.submit(send, order): order for order in orders}
+            for fut in as_completed(futures):
+                try:
+                    results.append((futures[fut], fut.result(), None))
+                except Exception as e:
+                    results.append((futures[fut], None, e))
+        return results
@@ -0,0 +1,331 @@
+# mock_exchange.py
+
+import time
+import datetime
+import threading
+import numpy as np
+from datetime import timezone
+from scheduler import parse_timeframe, WEEK_OFFSET_MS
+
+# ==============================================================================
+# 🧪 오프라인 모의 거래소 (페이퍼 트레이딩 / 벤치마크용)
+# ==============================================================================
+# coin_bot이 사용하는 ccxt 메서드만 구현한다. 기준 캔들(예: 1m)을 시뮬레이션 시계에 맞춰
+# 재생하며, 캔들 안의 가격은 시가 -> 고가/저가 -> 종가 경로를 선형 보간한 틱으로 만든다.
+# 모든 API 호출은 설정한 지연만큼 시계를 진행시키고, 주문은 현재가 + 슬리피지로 체결된다.
+
+MINUTE_MS = 60 * 1000
+
+class SimClock:
+    """시뮬레이션 시계 (speed=None이면 sleep이 실제 대기 없이 시간만 진행 -> 최대 속도)"""
+
+    def __init__(self, start_ms, speed=None):
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._virtual_ms = float(start_ms)
+        self._real_start = time.monotonic()
+
+    def ms(self):
+        with self._lock:
+            if self.speed is None:
+                return self._virtual_ms
+            return self._virtual_ms + (time.monotonic() - self._real_start) * 1000 * self.speed
+
+    def now(self):
+        return datetime.datetime.fromtimestamp(self.ms() / 1000, timezone.utc)
+
+    def time(self):
+        return self.ms() / 1000
+
+    def sleep(self, sec):
+        if sec <= 0: return
+        if self.speed is None:
+            with self._lock:
+                self._virtual_ms += sec * 1000
+        else:
+            time.sleep(sec / self.speed)
+
+def synthetic_candles(start_ms, minutes, base_price=100.0, vol=0.001, seed=0):
+    """기하 브라운 운동 1분봉 [timestamp, open, high, low, close, volume] 생성"""
+    rng = np.random.default_rng(seed)
+    close = base_price * np.exp(np.cumsum(rng.normal(0, vol, minutes)))
+    open_ = np.r_[base_price, close[:-1]]
+    wick = np.abs(rng.normal(0, vol, (2, minutes)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    ts = start_ms + np.arange(minutes, dtype=np.float64) * MINUTE_MS
+    return np.column_stack([ts, open_, high, low, close, np.ones(minutes)])
+
+class MockExchange:
+    """ccxt.binance(선물) 대체용 모의 거래소"""
+
+    id = "mock"
+
+    def __init__(self, candles, clock, base_timeframe="1m", latency=0.0, balance=10000.0,
+                 fee_rate=0.0004, slippage_bps=1.0, amount_decimals=3):
+        self.candles = {sym: np.asarray(arr, dtype=np.float64) for sym, arr in candles.items()}
+        self.clock = clock
+        self.base_ms = parse_timeframe(base_timeframe) * 1000
+        self.latency = latency
+        self.fee_rate = fee_rate
+        self.slippage = slippage_bps / 10000.0
+        self.amount_decimals = amount_decimals
+        self.has = {'fetchLastPrices': True, 'fetchTickers': True}
+        self.enableRateLimit = False
+        self.markets = {sym: {'symbol': sym} for sym in self.candles}
+        # ccxt binance와 같이 심볼 없는 미체결 조회(가중치 40)는 명시적으로 끄지 않으면 거부
+        self.options = {'fetchOpenOrders': {'warnWithoutSymbol': True}}
+
+        self._lock = threading.RLock()
+        self.cash = float(balance)
+        self.positions = {}         # sym -> {"contracts", "entry_price", "leverage"}
+        self.leverage = {}
+        self.open_orders = {}       # id -> 조건부(스탑) 주문
+        self.trades = []            # 체결 내역 (벤치마크/검증용)
+        self._next_id = 1
+        self._last_trigger_ms = clock.ms()
+
+    # ------------------------------------------------------------------
+    # 내부 유틸
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _base(symbol):
+        return symbol.split(':')[0] # BTC/USDT:USDT -> BTC/USDT
+
+    def _api_call(self):
+        """네트워크 지연 모사 + 대기 중인 스탑 주문 발동 처리"""
+        self.clock.sleep(self.latency)
+        self._process_triggers()
+
+    def _price_at(self, sym, ms):
+        """시각 ms의 가격 (캔들 내부는 시가 -> 고/저 -> 종가 경로를 선형 보간)"""
+        arr = self.candles[sym]
+        i = int(np.searchsorted(arr[:, 0], ms, side='right')) - 1
+        if i < 0: return float(arr[0, 1])
+        if i >= len(arr): i = len(arr) - 1
+        ts, o, h, l, c = arr[i, :5]
+        frac = min(max((ms - ts) / self.base_ms, 0.0), 1.0)
+
+        # 양봉이면 저가를 먼저, 음봉이면 고가를 먼저 찍는 경로
+        path = (o, l, h, c) if c >= o else (o, h, l, c)
+        seg = min(int(frac * 3), 2)
+        t = frac * 3 - seg
+        return float(path[seg] + (path[seg + 1] - path[seg]) * t)
+
+    def _range_between(self, sym, start_ms, end_ms):
+        """(start, end] 구간에 거친 최고가 (스탑 주문 발동 판정용)"""
+        arr = self.candles[sym]
+        lo = int(np.searchsorted(arr[:, 0], start_ms, side='right'))
+        hi = int(np.searchsorted(arr[:, 0], end_ms, side='right')) - 1
+        prices = [self._price_at(sym, start_ms), self._price_at(sym, end_ms)]
+        if hi > lo:
+            prices.append(float(arr[lo:hi, 2].max())) # 사이에 완전히 포함된 캔들의 고가
+        return max(prices)
+
+    def _fill(self, sym, side, amount, price, reduce_only=False):
+        """체결 처리 (원웨이 모드, 롱/숏 단일 포지션)"""
+        amount = float(amount)
+        fill_price = price * (1 + self.slippage) if side == 'buy' else price * (1 - self.slippage)
+        fee = fill_price * amount * self.fee_rate
+        signed = amount if side == 'buy' else -amount
+
+        pos = self.positions.get(sym, {"contracts": 0.0, "entry_price": 0.0})
+        current = pos["contracts"]
+        if reduce_only:
+            if current == 0 or (current > 0) == (signed > 0):
+                raise Exception(f"ReduceOnly Order is rejected: {sym}")
+            signed = max(-abs(current), min(abs(current), signed))
+
+        new = current + signed
+        if current != 0 and (current > 0) != (signed > 0):
+            # 청산분 실현 손익
+            closed = min(abs(current), abs(signed))
+            direction = 1 if current > 0 else -1
+            self.cash += (fill_price - pos["entry_price"]) * closed * direction
+        if new != 0 and (current == 0 or (current > 0) == (signed > 0)):
+            pos["entry_price"] = (pos["entry_price"] * abs(current) + fill_price * abs(signed)) / abs(new)
+        pos["contracts"] = new
+        self.cash -= fee
+
+        if abs(new) < 1e-12:
+            self.positions.pop(sym, None)
+        else:
+            self.positions[sym] = pos
+
+        order = {
+            'id': str(self._next_id), 'symbol': f"{sym}:USDT", 'type': 'market', 'side': side,
+            'amount': abs(signed), 'filled': abs(signed), 'average': fill_price, 'price': fill_price,
+            'status': 'closed', 'timestamp': int(self.clock.ms()), 'reduceOnly': reduce_only,
+            'fee': {'cost': fee, 'currency': 'USDT'},
+        }
+        self._next_id += 1
+        self.trades.append(order)
+        return order
+
+    def _process_triggers(self):
+        """지난 확인 이후 가격이 트리거를 넘은 스탑 매수 주문을 체결"""
+        with self._lock:
+            now_ms = self.clock.ms()
+            start_ms = self._last_trigger_ms
+            self._last_trigger_ms = now_ms
+            for oid, o in list(self.open_orders.items()):
+                if self._range_between(o['sym'], start_ms, now_ms) >= o['triggerPrice']:
+                    del self.open_orders[oid]
+                    price = max(o['triggerPrice'], self._price_at(o['sym'], now_ms))
+                    self._fill(o['sym'], 'buy', o['amount'], price)
+
+    # ------------------------------------------------------------------
+    # ccxt 호환 메서드
+    # ------------------------------------------------------------------
+    def milliseconds(self):
+        return int(self.clock.ms())
+
+    def throttle(self, cost=None):
+        pass
+
+    def load_markets(self, reload=False):
+        return self.markets
+
+    def fetch_time(self):
+        self._api_call()
+        return int(self.clock.ms())
+
+    def amount_to_precision(self, symbol, amount):
+        factor = 10 ** self.amount_decimals
+        return f"{np.floor(float(amount) * factor) / factor:.{self.amount_decimals}f}"
+
+    def price_to_precision(self, symbol, price):
+        return f"{float(price):.6f}"
+
+    def set_leverage(self, leverage, symbol):
+        self._api_call()
+        self.leverage[self._base(symbol)] = leverage
+        return {'leverage': leverage, 'symbol': symbol}
+
+    def fetch_ticker(self, symbol):
+        self._api_call()
+        sym = self._base(symbol)
+        return {'symbol': f"{sym}:USDT", 'last': self._price_at(sym, self.clock.ms()), 'timestamp': int(self.clock.ms())}
+
+    def fetch_tickers(self, symbols=None):
+        self._api_call()
+        now_ms = self.clock.ms()
+        syms = [self._base(s) for s in (symbols or self.candles)]
+        return {f"{s}:USDT": {'symbol': f"{s}:USDT", 'last': self._price_at(s, now_ms)} for s in syms}
+
+    def fetch_last_prices(self, symbols=None):
+        self._api_call()
+        now_ms = self.clock.ms()
+        syms = [self._base(s) for s in (symbols or self.candles)]
+        return {f"{s}:USDT": {'symbol': f"{s}:USDT", 'price': self._price_at(s, now_ms), 'timestamp': int(now_ms)} for s in syms}
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None):
+        """기준 캔들을 timeframe으로 묶어 반환 (현재 진행 중인 봉은 현재가까지만 반영)"""
+        self._api_call()
+        sym = self._base(symbol)
+        now_ms = self.clock.ms()
+        tf_ms = parse_timeframe(timeframe) * 1000
+        offset = WEEK_OFFSET_MS if tf_ms % (7 * 86400 * 1000) == 0 else 0 # 주봉은 월요일 00:00 UTC 시작
+        arr = self.candles[sym]
+
+        # 필요한 구간만 잘라서 집계 (limit만 주면 최근 limit개 봉 구간)
+        if since is None and limit is not None:
+            since = ((now_ms - offset) // tf_ms - limit) * tf_ms + offset
+        lo = 0 if since is None else int(np.searchsorted(arr[:, 0], (since - offset) // tf_ms * tf_ms + offset))
+        hi = int(np.searchsorted(arr[:, 0], now_ms - self.base_ms, side='right'))
+        closed = arr[lo:hi]
+
+        rows = {}
+        if len(closed):
+            keys = ((closed[:, 0] - offset) // tf_ms * tf_ms + offset).astype(np.int64)
+            _, starts = np.unique(keys, return_index=True)
+            ends = np.r_[starts[1:], len(closed)] - 1
+            highs = np.maximum.reduceat(closed[:, 2], starts)
+            lows = np.minimum.reduceat(closed[:, 3], starts)
+            vols = np.add.reduceat(closed[:, 5], starts)
+            for j, (s, e) in enumerate(zip(starts, ends)):
+                rows[int(keys[s])] = [int(keys[s]), float(closed[s, 1]), float(highs[j]),
+                                      float(lows[j]), float(closed[e, 4]), float(vols[j])]
+
+        # 진행 중인 기준 캔들: 시가 ~ 현재가 범위만 반영 (미래 고가/저가 누출 방지)
+        i = int(np.searchsorted(arr[:, 0], now_ms, side='right')) - 1
+        if 0 <= i < len(arr) and arr[i, 0] + self.base_ms > now_ms:
+            o, last = float(arr[i, 1]), self._price_at(sym, now_ms)
+            key = int((arr[i, 0] - offset) // tf_ms * tf_ms + offset)
+            row = rows.setdefault(key, [key, o, o, o, o, 0.0])
+            row[2] = max(row[2], o, last); row[3] = min(row[3], o, last); row[4] = last
+
+        result = [rows[k] for k in sorted(rows)]
+        if limit is not None:
+            result = result[-limit:]
+        return result
+
+    def fetch_balance(self):
+        self._api_call()
+        with self._lock:
+            now_ms = self.clock.ms()
+            margin = 0.0
+            for sym, pos in self.positions.items():
+                lev = self.leverage.get(sym, 1)
+                margin += abs(pos["contracts"]) * self._price_at(sym, now_ms) / lev
+            return {'USDT': {'free': self.cash - margin, 'used': margin, 'total': self.cash}}
+
+    def fetch_positions(self, symbols=None):
+        self._api_call()
+        with self._lock:
+            now_ms = self.clock.ms()
+            result = []
+            for sym, pos in self.positions.items():
+                price = self._price_at(sym, now_ms)
+                contracts = pos["contracts"]
+                result.append({
+                    'symbol': f"{sym}:USDT",
+                    'contracts': abs(contracts),
+                    'side': 'long' if contracts > 0 else 'short',
+                    'entryPrice': pos["entry_price"],
+                    'markPrice': price,
+                    'notional': contracts * price,
+                    'unrealizedPnl': (price - pos["entry_price"]) * contracts,
+                    'leverage': self.leverage.get(sym, 1),
+                })
+            return result
+
+    def create_order(self, symbol, type, side, amount, price=None, params={}):
+        self._api_call()
+        sym = self._base(symbol)
+        with self._lock:
+            trigger = params.get('triggerPrice') or params.get('stopPrice')
+            if trigger is not None:
+                trigger = float(trigger)
+                if side == 'buy' and self._price_at(sym, self.clock.ms()) >= trigger:
+                    raise Exception("Order would immediately trigger.")
+                oid = str(self._next_id)
+                self._next_id += 1
+                self.open_orders[oid] = {'id': oid, 'sym': sym, 'symbol': f"{sym}:USDT", 'side': side,
+                                         'amount': float(amount), 'triggerPrice': trigger, 'reduceOnly': False}
+                return {'id': oid, 'symbol': f"{sym}:USDT", 'status': 'open', 'side': side}
+            return self._fill(sym, side, amount, self._price_at(sym, self.clock.ms()),
+                              reduce_only=bool(params.get('reduceOnly')))
+
+    def create_market_buy_order(self, symbol, amount, params={}):
+        return self.create_order(symbol, 'market', 'buy', amount, None, params)
+
+    def create_market_sell_order(self, symbol, amount, params={}):
+        return self.create_order(symbol, 'market', 'sell', amount, None, params)
+
+    def fetch_open_orders(self, symbol=None, since=None, limit=None, params={}):
+        self._api_call()
+        if symbol is None and self.options['fetchOpenOrders'].get('warnWithoutSymbol', True):
+            raise Exception("binance fetchOpenOrders() WARNING: fetching open orders without specifying a symbol "
+                            "has stricter rate limits (10 times more for spot, 40 times more for other markets)")
+        with self._lock:
+            return [dict(o) for o in self.open_orders.values()
+                    if symbol is None or o['sym'] == self._base(symbol)]
+
+    def cancel_order(self, id, symbol=None, params={}):
+        self._api_call()
+        with self._lock:
+            if str(id) not in self.open_orders:
+                raise Exception(f"Unknown order sent: {id}")
+            del self.open_orders[str(id)]
+            return {'id': str(id), 'status': 'canceled'}
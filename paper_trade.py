@@ -0,0 +1,127 @@
+# paper_trade.py
+
+import sys
+import time
+import types
+import argparse
+import datetime
+import numpy as np
+from datetime import timezone
+
+# ==============================================================================
+# 🧪 페이퍼 트레이딩 / 라이브 루프 벤치마크
+# ==============================================================================
+# coin_bot.main()을 모의 거래소(mock_exchange) 위에서 네트워크 없이 가속 실행한다.
+#   python paper_trade.py --symbols 100 --days 3                 (합성 1분봉, 최대 속도)
+#   python paper_trade.py --cached BTC/USDT ETH/USDT --days 7 --speed 600   (data_cache/ 1분봉 재생, 600배속)
+
+PAPER_LOG_FILE = "paper_trade_history.csv"
+
+DEFAULTS = {
+    "BINANCE_API_KEY": "", "BINANCE_SECRET": "",
+    "TELEGRAM_BOT_TOKEN": "", "TELEGRAM_CHAT_ID": "",
+    "TIME_SLEEP": 1, "TIMEFRAME": "1d", "K_VALUE": 0.5, "LEVERAGE": 3,
+}
+
+def prepare_config(symbols, timeframe, k_value, entry_mode):
+    """coin_bot import 전에 config를 페이퍼 트레이딩용으로 덮어씀 (config.py가 없으면 기본값 사용)"""
+    try:
+        import config
+    except ImportError:
+        config = types.ModuleType("config")
+        for key, value in DEFAULTS.items():
+            setattr(config, key, value)
+        sys.modules["config"] = config
+
+    config.SYMBOLS = symbols
+    config.TIMEFRAME = timeframe
+    config.K_VALUE = k_value
+    config.ENTRY_MODE = entry_mode
+    config.TELEGRAM_ENABLED = False
+    return config
+
+def load_market_data(symbols, start_ms, minutes, cached, seed):
+    """1분봉 데이터 준비 (캐시 재생 또는 합성)"""
+    import mock_exchange
+    candles = {}
+    for i, sym in enumerate(symbols):
+        if cached:
+            import candle_cache
+            arr = candle_cache.load_candles(sym, "1m")
+            if arr is None:
+                raise FileNotFoundError(f"1m 캐시 없음: {sym}")
+            candles[sym] = np.asarray(arr[arr[:, 0] >= start_ms][:minutes])
+        else:
+            candles[sym] = mock_exchange.synthetic_candles(start_ms, minutes, base_price=100.0 * (1 + i % 7), seed=seed + i)
+    return candles
+
+def run(symbols, days, speed=None, latency=0.0, timeframe="1d", k_value=0.5, entry_mode="poll",
+        cached=False, seed=0, start=None, state_file=None, record=None):
+    """페이퍼 트레이딩 실행 후 처리량 요약 반환"""
+    prepare_config(symbols, timeframe, k_value, entry_mode)
+    import coin_bot
+    import mock_exchange
+
+    start_dt = start or datetime.datetime(2025, 1, 1, tzinfo=timezone.utc)
+    start_ms = int(start_dt.timestamp() * 1000)
+    # 첫 봉 목표가 계산을 위해 하루치 워밍업 데이터를 앞에 둔다
+    warmup_ms = 24 * 60 * 60 * 1000
+    minutes = int((days + 1) * 24 * 60)
+    candles = load_market_data(symbols, start_ms - warmup_ms, minutes, cached, seed)
+
+    clock = mock_exchange.SimClock(start_ms, speed=speed)
+    exchange = mock_exchange.MockExchange(candles, clock, latency=latency)
+    coin_bot.set_exchange(exchange, clock)
+    coin_bot.LOG_FILE = PAPER_LOG_FILE # 실거래 기록(trade_history.csv)과 분리
+    coin_bot.STATE_FILE = state_file   # 기본값 None: 실거래 스냅샷(bot_state.json)을 읽거나 덮어쓰지 않음
+    coin_bot.MARKET_CACHE_FILE = None  # 모의 마켓 정보로 실거래 캐시를 덮어쓰지 않음
+    coin_bot.RECORD_FILE = record      # 모의 거래소 응답 녹화 (market_recorder.py 재생 검증용)
+
+    until = start_dt + datetime.timedelta(days=days)
+    real_start = time.perf_counter()
+    coin_bot.main(until=until)
+    real_sec = time.perf_counter() - real_start
+    coin_bot.close_journal()
+    coin_bot.stop_recording()
+
+    stats = coin_bot.loop_stats
+    return {
+        "symbols": len(symbols),
+        "sim_days": days,
+        "real_sec": real_sec,
+        "speedup": days * 86400 / real_sec if real_sec > 0 else float("inf"),
+        "loop_count": stats["count"],
+        "loop_avg_ms": stats["total"] / stats["count"] * 1000 if stats["count"] else 0.0,
+        "loop_max_ms": stats["max"] * 1000,
+        "trades": len(exchange.trades),
+        "final_cash": exchange.cash,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="모의 거래소 위에서 coin_bot 메인 루프 가속 실행")
+    parser.add_argument("--symbols", type=int, default=4, help="합성 심볼 수 (--cached면 무시)")
+    parser.add_argument("--cached", nargs="*", default=None, help="data_cache/의 1m 캔들로 재생할 심볼 목록")
+    parser.add_argument("--days", type=float, default=2)
+    parser.add_argument("--speed", type=float, default=None, help="배속 (생략 시 대기 없이 최대 속도)")
+    parser.add_argument("--latency", type=float, default=0.05, help="API 호출당 모의 지연 (초, 시뮬레이션 시간)")
+    parser.add_argument("--timeframe", default="1d")
+    parser.add_argument("--k", type=float, default=0.5)
+    parser.add_argument("--entry-mode", default="poll", choices=["poll", "stop"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--record", default=None, help="거래소 응답 녹화 파일 (.jsonl.gz)")
+    args = parser.parse_args()
+
+    if args.cached:
+        symbols, cached = args.cached, True
+    else:
+        symbols, cached = [f"SIM{i:03d}/USDT" for i in range(args.symbols)], False
+
+    result = run(symbols, args.days, speed=args.speed, latency=args.latency, timeframe=args.timeframe,
+                 k_value=args.k, entry_mode=args.entry_mode, cached=cached, seed=args.seed, record=args.record)
+
+    print("\n" + "=" * 60)
+    print(f"🧪 페이퍼 트레이딩 결과 ({result['symbols']}개 심볼, {result['sim_days']}일)")
+    print("=" * 60)
+    print(f"실행 시간: {result['real_sec']:.1f}초 ({result['speedup']:,.0f}배속)")
+    print(f"감시 루프: {result['loop_count']:,}회 / 평균 {result['loop_avg_ms']:.2f}ms / 최대 {result['loop_max_ms']:.1f}ms")
+    print(f"체결: {result['trades']}건 / 최종 잔고: ${result['final_cash']:,.2f}")
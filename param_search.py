@@ -0,0 +1,227 @@
+# param_search.py
+
+import math
+import argparse
+import numpy as np
+import pandas as pd
+import backtest
+import backtest_metrics
+from walk_forward import OBJECTIVES
+
+# ==============================================================================
+# 🔎 적응형 파라미터 탐색 (연속 반감 + 모델 유도 샘플링)
+# ==============================================================================
+# 그리드는 차원(심볼별 K, 레버리지 ...)이 늘면 조합 수가 폭발하므로, 후보를 많이 뽑아 최근 짧은 구간으로
+# 먼저 평가하고 상위 1/ETA만 더 긴 구간으로 올리는 연속 반감(successive halving)을 반복한다.
+# 예산은 "전체 기간 백테스트 1회 = 1"로 센 계산량이며 (구간 비율 f 평가 = f), 예산을 브래킷 여러 개로 나눠
+# 첫 브래킷은 무작위로, 이후 브래킷은 지금까지 가장 긴 구간에서 상위 GAMMA에 든 후보 주변(커널 밀도)에서
+# 후보를 뽑는다 (TPE의 좋은 집합만 쓰는 단순 버전). 같은 --seed면 결과가 같다.
+#   python param_search.py --budget 15 --seed 0 --offline
+#   python param_search.py --budget 40 --per-symbol-k --leverage-range 1 5 --offline
+#   python param_search.py --budget 10 --check --offline     (TF x K 전체 그리드와 비교)
+
+ETA = 3                     # 단계마다 상위 1/ETA만 다음 구간으로 승급
+MIN_FRACTION = 1 / 9        # 첫 단계 평가 구간 (전체 기간 대비 비율, 최근 구간)
+MIN_BARS = 30               # 짧은 구간도 최소 이만큼의 봉으로 평가
+BRACKETS = 3                # 예산을 나눌 연속 반감 반복 횟수 (2번째부터 모델 유도 샘플링)
+GAMMA = 0.25                # 모델이 "좋은 후보"로 보는 상위 비율
+EXPLORE = 0.25              # 모델 유도 브래킷에서도 무작위로 뽑는 비율
+MIN_MODEL_OBS = 8           # 모델을 쓰기 위한 최소 관측 수 (같은 구간 길이 기준)
+
+class SearchSpace:
+    """탐색 공간: 타임프레임(범주) x K(연속, 전체 또는 심볼별) x 레버리지(연속, 선택)"""
+
+    def __init__(self, timeframes, k_range, n_symbols, per_symbol_k=False, leverage_range=None):
+        self.timeframes = list(timeframes)
+        self.k_range = k_range
+        self.k_dims = n_symbols if per_symbol_k else 1
+        self.leverage_range = leverage_range
+
+    def _clip(self, cand):
+        cand["K"] = np.clip(cand["K"], *self.k_range)
+        if self.leverage_range:
+            cand["Leverage"] = float(np.clip(cand["Leverage"], *self.leverage_range))
+        return cand
+
+    def sample(self, rng):
+        """무작위 후보 1개"""
+        cand = {"TF": self.timeframes[rng.integers(len(self.timeframes))],
+                "K": rng.uniform(*self.k_range, size=self.k_dims)}
+        cand["Leverage"] = float(rng.uniform(*self.leverage_range)) if self.leverage_range else backtest.LEVERAGE
+        return cand
+
+    def sample_near(self, rng, good):
+        """좋은 후보 중 하나를 골라 좋은 집합의 퍼짐에 비례한 가우시안 커널로 변형"""
+        parent = good[rng.integers(len(good))]
+        same_tf = [c for c in good if c["TF"] == parent["TF"]] or good
+        k_width = max(np.std([c["K"] for c in same_tf], axis=0).max(), 0.02 * (self.k_range[1] - self.k_range[0]))
+        cand = {"TF": parent["TF"] if rng.random() < 0.8 else self.timeframes[rng.integers(len(self.timeframes))],
+                "K": parent["K"] + rng.normal(0, k_width, size=self.k_dims),
+                "Leverage": parent["Leverage"]}
+        if self.leverage_range:
+            lev_width = max(np.std([c["Leverage"] for c in same_tf]), 0.02 * (self.leverage_range[1] - self.leverage_range[0]))
+            cand["Leverage"] = parent["Leverage"] + rng.normal(0, lev_width)
+        return self._clip(cand)
+
+    def grid_size(self, k_steps):
+        """같은 해상도의 전체 그리드 셀 수 (비교용)"""
+        return len(self.timeframes) * k_steps ** self.k_dims
+
+def k_label(k):
+    return f"{k[0]:.3f}" if len(k) == 1 else "[" + ", ".join(f"{v:.2f}" for v in k) + "]"
+
+def describe(cand):
+    return f"{cand['TF']} / K={k_label(cand['K'])} / Lev={cand['Leverage']:.2f}"
+
+class SliceEvaluator:
+    """후보를 최근 fraction 구간으로 평가 (TF별 봉 x 심볼 배열은 한 번만 구성) - 사용 예산 집계"""
+
+    def __init__(self, raw_data, timeframes, objective="calmar"):
+        self.metric = OBJECTIVES[objective]
+        self.mats = {tf: backtest.build_market_matrix(raw_data[tf])[1] for tf in timeframes}
+        self.cost = 0.0             # 전체 기간 백테스트 환산 횟수
+        self.evaluations = 0
+
+    def slice_cost(self, tf, fraction):
+        n = len(self.mats[tf]['close'])
+        return min(n, max(int(n * fraction), MIN_BARS)) / n
+
+    def curve(self, cand, fraction=1.0):
+        mats = self.mats[cand["TF"]]
+        n = len(mats['close'])
+        lo = n - min(n, max(int(n * fraction), MIN_BARS))
+        window = {col: m[lo:] for col, m in mats.items()}
+        # K가 심볼별 배열이어도 (시간 x 심볼)로 그대로 브로드캐스트됨
+        factors, _ = backtest.compute_bar_factors(cand["K"], window, leverage=cand["Leverage"])
+        return backtest.TOTAL_CAPITAL * np.cumprod(factors.mean(axis=1))
+
+    def __call__(self, cand, fraction):
+        curve = self.curve(cand, fraction)
+        ppy = backtest.periods_per_year(cand["TF"])
+        self.cost += self.slice_cost(cand["TF"], fraction)
+        self.evaluations += 1
+        score = backtest_metrics.compute_metrics(curve, backtest.TOTAL_CAPITAL, len(curve) / ppy, ppy)[self.metric][0]
+        return score if np.isfinite(score) else -np.inf
+
+def successive_halving(candidates, evaluate, budget, eta=ETA, min_fraction=MIN_FRACTION):
+    """후보 목록을 구간을 늘려가며 평가하고 상위 1/eta씩 승급 -> 관측 [(후보, 구간 비율, 점수)]
+
+    budget: 이 브래킷에서 쓸 수 있는 예산 (evaluate.cost 기준, 넘기 전에 중단)
+    """
+    fractions = rung_fractions(eta, min_fraction)
+    start_cost = evaluate.cost
+    history = []
+    for rung, fraction in enumerate(fractions):
+        scored = []
+        for cand in candidates:
+            if evaluate.cost - start_cost + evaluate.slice_cost(cand["TF"], fraction) > budget + 1e-9:
+                break
+            scored.append((evaluate(cand, fraction), cand))
+        history.extend((cand, fraction, score) for score, cand in scored)
+        if not scored: break
+        # 동점이면 먼저 뽑힌 후보 우선 (정렬 안정성 -> 시드가 같으면 결과 동일)
+        scored.sort(key=lambda item: -item[0])
+        keep = max(1, len(scored) // eta) if rung < len(fractions) - 1 else len(scored)
+        candidates = [cand for _, cand in scored[:keep]]
+    return history
+
+def rung_fractions(eta=ETA, min_fraction=MIN_FRACTION):
+    """[min_fraction, min_fraction * eta, ..., 1.0]"""
+    steps = max(0, math.ceil(math.log(1 / min_fraction, eta) - 1e-9))
+    return [min(1.0, min_fraction * eta ** i) for i in range(steps)] + [1.0]
+
+def initial_count(budget, eta=ETA, min_fraction=MIN_FRACTION):
+    """브래킷 예산을 단계마다 비슷하게 쓰도록 첫 단계 후보 수 결정"""
+    fractions = rung_fractions(eta, min_fraction)
+    per_candidate = sum(f / eta ** i for i, f in enumerate(fractions)) # 첫 단계 후보 1개당 기대 비용
+    return max(eta, int(budget / per_candidate))
+
+def model_candidates(space, history, rng, n, gamma=GAMMA, explore=EXPLORE):
+    """지금까지 관측 중 가장 긴 구간(관측 MIN_MODEL_OBS개 이상)의 상위 gamma 후보 주변에서 n개 샘플링"""
+    fidelities = sorted({f for _, f, _ in history}, reverse=True)
+    obs = []
+    for fraction in fidelities:
+        obs = [(score, cand) for cand, f, score in history if f == fraction]
+        if len(obs) >= MIN_MODEL_OBS: break
+    if len(obs) < MIN_MODEL_OBS:
+        return [space.sample(rng) for _ in range(n)]
+    obs.sort(key=lambda item: -item[0])
+    good = [cand for _, cand in obs[:max(2, int(len(obs) * gamma))]]
+    return [space.sample(rng) if rng.random() < explore else space.sample_near(rng, good) for _ in range(n)]
+
+def search(space, evaluate, budget, seed=0, eta=ETA, min_fraction=MIN_FRACTION, brackets=BRACKETS):
+    """예산 안에서 연속 반감 브래킷 반복 -> (전체 기간 평가 결과 [(점수, 후보)] 내림차순, 전체 관측)"""
+    rng = np.random.default_rng(seed)
+    history = []
+    for b in range(brackets):
+        remaining = budget - evaluate.cost
+        bracket_budget = remaining / (brackets - b)
+        n = initial_count(bracket_budget, eta, min_fraction)
+        candidates = ([space.sample(rng) for _ in range(n)] if b == 0
+                      else model_candidates(space, history, rng, n))
+        history += successive_halving(candidates, evaluate, bracket_budget, eta, min_fraction)
+
+    finals = [(score, cand) for cand, f, score in history if f == 1.0]
+    finals.sort(key=lambda item: -item[0])
+    return finals, history
+
+def results_table(evaluate, finals, top, sort_by):
+    """상위 후보의 전체 기간 지표표"""
+    rows = finals[:top]
+    labels = [{"TF": c["TF"], "K": k_label(c["K"]), "Leverage": c["Leverage"]} for _, c in rows]
+    curves = [evaluate.curve(c) for _, c in rows]
+    frames = []
+    # TF마다 곡선 길이가 다르므로 TF별로 지표 계산
+    for tf in dict.fromkeys(c["TF"] for _, c in rows):
+        idx = [i for i, (_, c) in enumerate(rows) if c["TF"] == tf]
+        ppy = backtest.periods_per_year(tf)
+        stacked = np.stack([curves[i] for i in idx])
+        metrics = backtest_metrics.compute_metrics(stacked, backtest.TOTAL_CAPITAL, stacked.shape[1] / ppy, ppy)
+        frames.append(backtest_metrics.metrics_table([labels[i] for i in idx], metrics, sort_by=None))
+    return backtest_metrics.sort_table(pd.concat(frames, ignore_index=True), sort_by)
+
+FORMATTERS = {**backtest_metrics.FORMATTERS, "Leverage": "{:.2f}".format}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="변동성 돌파 전략 적응형 파라미터 탐색 (연속 반감 + 모델 유도 샘플링)")
+    parser.add_argument("--budget", type=float, default=15, help="계산 예산 (전체 기간 백테스트 환산 횟수)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--objective", default="calmar", choices=list(OBJECTIVES))
+    parser.add_argument("--eta", type=int, default=ETA)
+    parser.add_argument("--min-fraction", type=float, default=MIN_FRACTION, help="첫 단계 평가 구간 비율")
+    parser.add_argument("--brackets", type=int, default=BRACKETS)
+    parser.add_argument("--per-symbol-k", action="store_true", help="심볼마다 K를 따로 탐색")
+    parser.add_argument("--leverage-range", type=float, nargs=2, default=None, metavar=("MIN", "MAX"))
+    parser.add_argument("--top", type=int, default=10, help="출력할 상위 후보 수")
+    parser.add_argument("--check", action="store_true", help="TF x K_VALUES 전체 그리드도 실행해 비교")
+    parser.add_argument("--offline", action="store_true", help="네트워크 없이 로컬 캐시만 사용")
+    args = parser.parse_args()
+
+    raw_data = backtest.fetch_all_data(backtest.SYMBOLS, backtest.TIMEFRAMES, backtest.FETCH_DAYS, offline=args.offline)
+    k_range = (min(backtest.K_VALUES), max(backtest.K_VALUES))
+    space = SearchSpace(backtest.TIMEFRAMES, k_range, len(backtest.SYMBOLS), args.per_symbol_k,
+                        tuple(args.leverage_range) if args.leverage_range else None)
+    evaluate = SliceEvaluator(raw_data, backtest.TIMEFRAMES, args.objective)
+    finals, history = search(space, evaluate, args.budget, args.seed, args.eta, args.min_fraction, args.brackets)
+    if not finals:
+        raise SystemExit("예산이 너무 작아 전체 기간까지 평가된 후보가 없습니다")
+
+    metric = OBJECTIVES[args.objective]
+    grid_cells = space.grid_size(len(backtest.K_VALUES))
+    print("\n" + "=" * 120)
+    print(f"🔎 적응형 탐색 결과 (기준: {args.objective}, 시드 {args.seed}) 평가 {evaluate.evaluations}회 / "
+          f"사용 예산 {evaluate.cost:.1f} (전체 그리드 {grid_cells:,}회의 {evaluate.cost / grid_cells:.2%})")
+    print("=" * 120)
+    print(results_table(evaluate, finals, args.top, metric).to_string(index=False, formatters=FORMATTERS))
+    print("=" * 120)
+    print(f"✅ 추천: {describe(finals[0][1])}")
+
+    if args.check:
+        # K_VALUES 해상도의 전체 그리드 (전체 K 공통, 기본 레버리지)와 비교
+        grid = [(evaluate({"TF": tf, "K": np.array([k]), "Leverage": backtest.LEVERAGE}, 1.0), tf, k)
+                for tf in backtest.TIMEFRAMES for k in backtest.K_VALUES]
+        grid.sort(key=lambda item: -item[0])
+        best_score = finals[0][0]
+        rank = 1 + sum(score > best_score for score, _, _ in grid)
+        print(f"🧮 전체 그리드 최고: {grid[0][1]} / K={grid[0][2]} ({metric} {grid[0][0]:.2f}) / "
+              f"탐색 결과 {metric} {best_score:.2f} -> 그리드 {len(grid)}개 중 {rank}위 수준")
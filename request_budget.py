@@ -0,0 +1,201 @@
+# request_budget.py
+
+import time
+import threading
+import ccxt
+from contextlib import contextmanager
+
+# ==============================================================================
+# 🚦 요청 가중치 예산 (바이낸스 USDT-M 선물)
+# ==============================================================================
+# 바이낸스는 IP별로 1분 단위 요청 가중치(기본 2400)를 제한하고, 응답 헤더
+# X-MBX-USED-WEIGHT-1M으로 현재 분의 사용량을 알려준다. 모든 스레드(메인 루프, 텔레그램
+# 리스너, 청산 스레드)가 이 예산 하나를 공유하며, 우선순위가 낮은 요청은 한도에 닿기 전에
+# 다음 분까지 양보한다.
+#   CRITICAL: 주문/취소 (reduce-only 청산 포함) - 예산과 무관하게 즉시 전송
+#   NORMAL  : 기본 (목표가 계산, 체결 확인 등) - 한도의 90%까지
+#   LOW     : 1초 현재가 감시, 텔레그램 명령 - 한도의 70%까지
+
+CRITICAL, NORMAL, LOW = 0, 1, 2
+PRIORITY_NAMES = {CRITICAL: "CRITICAL", NORMAL: "NORMAL", LOW: "LOW"}
+PRIORITY_CAPS = {CRITICAL: 1.0, NORMAL: 0.9, LOW: 0.7}
+
+WEIGHT_LIMIT = 2400         # 1분당 IP 가중치 한도
+WINDOW_SEC = 60
+BACKOFF_SEC = 60            # 429/418 응답에 Retry-After가 없을 때 대기 시간
+USED_WEIGHT_HEADER = "x-mbx-used-weight-1m"
+
+# ccxt 메서드별 가중치 (바이낸스 선물 API 문서 기준, 없는 메서드는 1)
+METHOD_WEIGHTS = {
+    "fetch_balance": 5,
+    "fetch_positions": 5,
+    "fetch_tickers": 40,
+    "fetch_last_prices": 2,
+    "fetch_open_orders": 1,     # 심볼 없이 전체 조회하면 40 (weight_of 참고)
+    "load_markets": 10,
+}
+
+def ohlcv_weight(limit):
+    """klines 가중치는 limit에 따라 달라짐"""
+    if limit is None: return 5 # ccxt 기본 500개
+    if limit < 100: return 1
+    if limit < 500: return 2
+    if limit <= 1000: return 5
+    return 10
+
+def weight_of(method, args=(), kwargs=None):
+    """ccxt 메서드 호출 한 번의 예상 가중치"""
+    kwargs = kwargs or {}
+    if method == "fetch_ohlcv":
+        limit = kwargs.get("limit", args[3] if len(args) > 3 else None)
+        return ohlcv_weight(limit)
+    if method == "fetch_open_orders":
+        symbol = kwargs.get("symbol", args[0] if args else None)
+        return 1 if symbol else 40
+    return METHOD_WEIGHTS.get(method, 1)
+
+def default_priority(method):
+    """주문/취소는 항상 최우선"""
+    if method.startswith(("create_", "cancel_", "edit_")):
+        return CRITICAL
+    return None
+
+class RequestBudget:
+    """1분 고정 창 가중치 카운터 (바이낸스와 같은 방식) + 우선순위별 사용 상한"""
+
+    def __init__(self, limit=WEIGHT_LIMIT, clock=None):
+        self.limit = limit
+        self.clock = clock or time
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._window = None     # 현재 분 (epoch // 60)
+        self.used = 0           # 현재 분 사용량 추정치 (로컬 집계와 응답 헤더 중 큰 값)
+        self.header_used = None # 마지막으로 받은 헤더 값
+        self.backoff_until = 0.0
+        self.waits = {p: 0 for p in PRIORITY_CAPS}
+        self.peak = 0
+
+    # ------------------------------------------------------------------
+    # 우선순위 지정
+    # ------------------------------------------------------------------
+    @contextmanager
+    def priority(self, priority):
+        """with budget.priority(LOW): ... 블록 안의 요청 우선순위 (주문/취소는 항상 CRITICAL)"""
+        previous = getattr(self._local, "priority", None)
+        self._local.priority = priority
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def set_thread_priority(self, priority):
+        """현재 스레드의 기본 우선순위 (예: 텔레그램 리스너 스레드는 LOW)"""
+        self._local.priority = priority
+
+    def current_priority(self, method):
+        forced = default_priority(method)
+        if forced is not None:
+            return forced
+        priority = getattr(self._local, "priority", None)
+        return NORMAL if priority is None else priority
+
+    # ------------------------------------------------------------------
+    # 예산 차감
+    # ------------------------------------------------------------------
+    def _roll(self, now):
+        window = int(now // WINDOW_SEC)
+        if window != self._window:
+            self._window = window
+            self.used = 0
+            self.header_used = None
+
+    def _allowed(self, weight, priority, now):
+        if priority == CRITICAL:
+            return True
+        if now < self.backoff_until:
+            return False
+        return self.used + weight <= self.limit * PRIORITY_CAPS[priority]
+
+    def has_room(self, priority, weight=1):
+        """지금 바로 보낼 수 있는지 (대기 없이 건너뛸 요청의 사전 확인용)"""
+        with self._lock:
+            now = self.clock.time()
+            self._roll(now)
+            return self._allowed(weight, priority, now)
+
+    def acquire(self, method, args=(), kwargs=None, priority=None):
+        """예산이 생길 때까지 대기 후 가중치 차감, 대기한 시간(초) 반환"""
+        weight = weight_of(method, args, kwargs)
+        priority = self.current_priority(method) if priority is None else priority
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self.clock.time()
+                self._roll(now)
+                if self._allowed(weight, priority, now):
+                    self.used += weight
+                    self.peak = max(self.peak, self.used)
+                    return waited
+                if waited == 0.0:
+                    self.waits[priority] += 1
+                wake = max(self.backoff_until, (self._window + 1) * WINDOW_SEC)
+            # 다음 분(또는 백오프 종료)까지 대기 - 그 사이 창이 바뀌었는지 1초마다 다시 확인
+            delay = min(max(wake - now, 0.01), 1.0)
+            self.clock.sleep(delay)
+            waited += delay
+
+    # ------------------------------------------------------------------
+    # 응답 반영
+    # ------------------------------------------------------------------
+    def observe(self, exchange, error=None, sent_at=None):
+        """응답 헤더의 실제 사용량으로 추정치 보정, 429/418이면 다른 요청을 잠시 멈춤"""
+        headers = getattr(exchange, "last_response_headers", None)
+        used = _header(headers, USED_WEIGHT_HEADER)
+        with self._lock:
+            now = self.clock.time()
+            self._roll(now)
+            # 분이 바뀌기 전에 보낸 요청의 헤더는 이전 분 사용량이므로 무시
+            if sent_at is not None and int(sent_at // WINDOW_SEC) != self._window:
+                used = None
+            if used is not None:
+                try:
+                    used = int(used)
+                except ValueError:
+                    used = None
+            if used is not None:
+                self.header_used = used
+                self.used = max(self.used, used)
+                self.peak = max(self.peak, self.used)
+            if error is not None and _is_rate_limited(error):
+                retry_after = _header(headers, "retry-after")
+                try:
+                    delay = float(retry_after) if retry_after is not None else BACKOFF_SEC
+                except ValueError:
+                    delay = BACKOFF_SEC
+                self.backoff_until = max(self.backoff_until, now + delay)
+
+    def format_status(self):
+        """텔레그램 /latency 응답에 덧붙일 한 줄 요약 (HTML)"""
+        with self._lock:
+            self._roll(self.clock.time())
+            msg = f"🚦 가중치 {self.used}/{self.limit} (최대 {self.peak})"
+            waits = ", ".join(f"{PRIORITY_NAMES[p]} {n}" for p, n in self.waits.items() if n)
+            if waits:
+                msg += f" / 양보: {waits}"
+            if self.backoff_until > self.clock.time():
+                msg += f" / ⛔ 백오프 {self.backoff_until - self.clock.time():.0f}초"
+        return msg
+
+def _header(headers, name):
+    """대소문자 무시 헤더 조회 (ccxt는 requests 응답 헤더를 그대로 보관)"""
+    if not headers:
+        return None
+    value = headers.get(name)
+    if value is None:
+        for key, v in headers.items():
+            if key.lower() == name:
+                return v
+    return value
+
+def _is_rate_limited(error):
+    return isinstance(error, (ccxt.RateLimitExceeded, ccxt.DDoSProtection))
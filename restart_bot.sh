@@ -22,10 +22,20 @@ echo "Checking for running process: $SCRIPT_NAME..."
 PID=$(pgrep -f "python3 $SCRIPT_NAME")
 
 if [ -n "$PID" ]; then
-    echo "Found running process (PID: $PID). Killing..."
-    kill -9 $PID
-    sleep 2 # 프로세스가 완전히 죽을 때까지 잠시 대기
-    echo "Process killed."
+    echo "Found running process (PID: $PID). Stopping..."
+    # SIGTERM으로 종료 요청 -> 봇이 상태 스냅샷 저장 및 텔레그램 큐 전송 후 종료
+    kill $PID
+    for i in $(seq 1 10); do
+        kill -0 $PID 2>/dev/null || break
+        sleep 1
+    done
+    # 10초 안에 종료되지 않으면 강제 종료
+    if kill -0 $PID 2>/dev/null; then
+        echo "Process did not exit. Killing..."
+        kill -9 $PID
+        sleep 2
+    fi
+    echo "Process stopped."
 else
     echo "No running process found."
 fi
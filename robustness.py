@@ -0,0 +1,162 @@
+# robustness.py
+
+import time
+import argparse
+import multiprocessing
+import numpy as np
+import pandas as pd
+import backtest
+import backtest_metrics
+from scheduler import parse_timeframe
+
+# ==============================================================================
+# 🎲 블록 부트스트랩 강건성 테스트
+# ==============================================================================
+# 선택한 (TF, K)의 봉 x 심볼 진입/가격 비율을 한 번 계산한 뒤, 시간 블록을 복원 추출해 수천 개의
+# 가상 경로를 만든다 (같은 시각의 심볼들은 함께 뽑혀 심볼 간 상관관계 유지). 경로마다 수수료/슬리피지/
+# 펀딩비를 범위 안에서 흔들어 최종 자산, MDD, 파산(RUIN_FRACTION 이하)까지 걸린 시간의 분포를 본다.
+# 경로는 BATCH_PATHS개씩 (경로 x 봉 x 심볼) 배열로 한 번에 계산하고, --workers로 프로세스 풀에 나눌 수 있다.
+#   python robustness.py --tf 6h --k 0.5 --paths 10000 --fee-range 0.0004 0.0006 --slippage-range 0 5 --offline
+
+BATCH_PATHS = 500           # 한 번에 계산하는 경로 수 (경로 x 봉 x 심볼 float64 배열 크기 결정)
+BLOCK_BARS = 20             # 부트스트랩 블록 길이 (봉) - 변동성 군집 등 짧은 자기상관 보존
+RUIN_FRACTION = 0.2         # 자산이 시작 자산의 이 비율 이하가 되면 파산으로 간주
+PERCENTILES = [1, 5, 25, 50, 75, 95, 99]
+
+def bar_components(k, mats):
+    """(봉 x 심볼) 진입 여부와 청산가/진입가 비율 (수수료/슬리피지와 무관한 부분만)"""
+    _, entry = backtest.compute_bar_factors(k, mats)
+    target = mats['open'] + mats['range'] * k
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = np.where(entry, mats['close'] / target, 1.0)
+    return entry, ratio
+
+def path_factors(entry, ratio, leverage, fee_rate, slippage, funding_rate):
+    """진입 칸의 슬롯 배율 (fee_rate/slippage/funding_rate는 경로별 값을 브로드캐스트)
+
+    slippage: 진입가는 (1 + s), 청산가는 (1 - s) 배로 불리하게 적용 (비율, bp 아님)
+    backtest.compute_bar_factors와 같은 식: leverage * (pnl - fee - fund) / 진입가
+    """
+    e = 1.0 + slippage
+    x = ratio * (1.0 - slippage)
+    growth = leverage * ((x - e) - (e + x) * fee_rate - e * funding_rate) / e
+    return np.where(entry, 1.0 + growth, 1.0)
+
+def block_indices(rng, n_paths, n_bars, block_bars):
+    """원형 이동 블록 부트스트랩 시간 인덱스 (경로 x 봉)"""
+    n_blocks = -(-n_bars // block_bars)
+    starts = rng.integers(0, n_bars, size=(n_paths, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block_bars)) % n_bars
+    return idx.reshape(n_paths, -1)[:, :n_bars]
+
+def simulate_batch(entry, ratio, n_paths, seed, block_bars=BLOCK_BARS, leverage=backtest.LEVERAGE,
+                   fee_range=(backtest.FEE_RATE, backtest.FEE_RATE), slippage_bps_range=(0.0, 0.0),
+                   funding_range=(backtest.FUNDING_RATE, backtest.FUNDING_RATE), ruin_fraction=RUIN_FRACTION):
+    """경로 n_paths개 -> (자산 곡선 (경로 x 봉), 파산 봉 인덱스 (없으면 -1))"""
+    rng = np.random.default_rng(seed)
+    n_bars = entry.shape[0]
+    idx = block_indices(rng, n_paths, n_bars, block_bars)
+
+    # 경로별 비용 가정 (경로 x 1 x 1로 브로드캐스트)
+    fee = rng.uniform(*fee_range, size=(n_paths, 1, 1))
+    slip = rng.uniform(*slippage_bps_range, size=(n_paths, 1, 1)) / 10000.0
+    fund = rng.uniform(*funding_range, size=(n_paths, 1, 1))
+
+    factors = path_factors(entry[idx], ratio[idx], leverage, fee, slip, fund)
+    curves = backtest.TOTAL_CAPITAL * np.cumprod(factors.mean(axis=2), axis=1)
+
+    ruined = curves <= backtest.TOTAL_CAPITAL * ruin_fraction
+    ruin_bar = np.where(ruined.any(axis=1), ruined.argmax(axis=1), -1)
+    return curves, ruin_bar
+
+def _summarize(curves, ruin_bar, periods_per_year):
+    """배치 결과 -> 경로별 (최종 자산, MDD %, 파산 봉)"""
+    m = backtest_metrics.compute_metrics(curves, backtest.TOTAL_CAPITAL, curves.shape[1] / periods_per_year, periods_per_year)
+    return np.column_stack([m["Final Balance"], m["MDD"], ruin_bar])
+
+_worker_data = {}
+
+def _init_worker(entry, ratio, periods_per_year, options):
+    _worker_data.update(entry=entry, ratio=ratio, ppy=periods_per_year, options=options)
+
+def _run_batch(task):
+    n_paths, seed = task
+    d = _worker_data
+    curves, ruin_bar = simulate_batch(d["entry"], d["ratio"], n_paths, seed, **d["options"])
+    return _summarize(curves, ruin_bar, d["ppy"])
+
+def run_bootstrap(entry, ratio, periods_per_year, n_paths, seed=0, workers=1, batch_paths=BATCH_PATHS, **options):
+    """n_paths개 경로를 배치로 나눠 실행 -> (경로 x [최종 자산, MDD %, 파산 봉]) 배열
+
+    배치 시드는 SeedSequence로 파생하므로 workers 수와 무관하게 결과가 같다.
+    """
+    sizes = [min(batch_paths, n_paths - i) for i in range(0, n_paths, batch_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = list(zip(sizes, seeds))
+
+    if workers > 1:
+        with multiprocessing.Pool(workers, initializer=_init_worker,
+                                  initargs=(entry, ratio, periods_per_year, options)) as pool:
+            parts = pool.map(_run_batch, tasks)
+    else:
+        _init_worker(entry, ratio, periods_per_year, options)
+        parts = [_run_batch(task) for task in tasks]
+    return np.concatenate(parts)
+
+def summary_table(results, bar_days):
+    """분포 요약 (백분위수별 최종 자산 / MDD, 파산 확률 / 파산까지 일수)"""
+    final, mdd, ruin_bar = results[:, 0], results[:, 1], results[:, 2]
+    ruined = ruin_bar >= 0
+    table = pd.DataFrame({
+        "Percentile": [f"p{p}" for p in PERCENTILES],
+        "Final Balance": np.percentile(final, PERCENTILES),
+        "MDD": np.percentile(mdd, PERCENTILES),
+    })
+    ruin_days = (ruin_bar[ruined] + 1) * bar_days
+    stats = {
+        "paths": len(results),
+        "ruin_prob": ruined.mean() * 100,
+        "ruin_days_median": float(np.median(ruin_days)) if ruined.any() else None,
+        "ruin_days_p5": float(np.percentile(ruin_days, 5)) if ruined.any() else None,
+        "loss_prob": (final < backtest.TOTAL_CAPITAL).mean() * 100,
+    }
+    return table, stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="변동성 돌파 전략 블록 부트스트랩 강건성 테스트")
+    parser.add_argument("--tf", default="6h")
+    parser.add_argument("--k", type=float, default=0.5)
+    parser.add_argument("--paths", type=int, default=10000)
+    parser.add_argument("--block", type=int, default=BLOCK_BARS, help="블록 길이 (봉)")
+    parser.add_argument("--fee-range", type=float, nargs=2, default=[backtest.FEE_RATE] * 2, metavar=("MIN", "MAX"))
+    parser.add_argument("--slippage-range", type=float, nargs=2, default=[0.0, 0.0], metavar=("MIN", "MAX"), help="bp")
+    parser.add_argument("--funding-range", type=float, nargs=2, default=[backtest.FUNDING_RATE] * 2, metavar=("MIN", "MAX"))
+    parser.add_argument("--ruin", type=float, default=RUIN_FRACTION, help="파산 기준 (시작 자산 대비 비율)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=backtest.WORKERS, help="프로세스 풀 워커 수 (1이면 직렬)")
+    parser.add_argument("--offline", action="store_true", help="네트워크 없이 로컬 캐시만 사용")
+    args = parser.parse_args()
+
+    raw_data = backtest.fetch_all_data(backtest.SYMBOLS, [args.tf], backtest.FETCH_DAYS, offline=args.offline)
+    _, mats = backtest.build_market_matrix(raw_data[args.tf])
+    entry, ratio = bar_components(args.k, mats)
+    ppy = backtest.periods_per_year(args.tf)
+
+    start = time.perf_counter()
+    results = run_bootstrap(entry, ratio, ppy, args.paths, seed=args.seed, workers=args.workers,
+                            block_bars=args.block, fee_range=tuple(args.fee_range),
+                            slippage_bps_range=tuple(args.slippage_range), funding_range=tuple(args.funding_range),
+                            ruin_fraction=args.ruin)
+    elapsed = time.perf_counter() - start
+    table, stats = summary_table(results, parse_timeframe(args.tf) / 86400)
+
+    historical = backtest.run_vectorized_backtest(args.k, mats)
+    print("\n" + "=" * 70)
+    print(f"🎲 부트스트랩 강건성 [{args.tf} / K={args.k}] 경로 {stats['paths']:,}개, 블록 {args.block}봉 ({elapsed:.1f}초)")
+    print("=" * 70)
+    print(f"실제 경로: 최종 ${historical[-1]:,.0f} / MDD {backtest.evaluate_curve(args.tf, args.k, historical)['MDD']:.2f}%")
+    print(table.to_string(index=False, formatters={"Final Balance": "${:,.0f}".format, "MDD": "{:.2f}%".format}))
+    print("-" * 70)
+    print(f"손실 확률: {stats['loss_prob']:.1f}% / 파산 확률 (자산 {args.ruin:.0%} 이하): {stats['ruin_prob']:.2f}%")
+    if stats["ruin_days_median"] is not None:
+        print(f"파산까지: 중앙값 {stats['ruin_days_median']:.0f}일 / 하위 5% {stats['ruin_days_p5']:.0f}일")
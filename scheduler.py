@@ -0,0 +1,119 @@
+# scheduler.py
+
+import time
+import logging
+import datetime
+from datetime import timezone
+
+# ==============================================================================
+# ⏰ 캔들 경계 스케줄러
+# ==============================================================================
+# ccxt 타임프레임(15m, 6h, 12h, 1d, 1w ...)의 정확한 봉 시작/마감 시각을 거래소 서버 시간
+# 기준으로 계산한다. 메인 루프는 고정 sleep 대신 다음 마감 전 청산 시각 / 다음 봉 시작 시각까지
+# 한 번에 대기하고, 대기 중 로컬 시계 오차는 서버 시간 재동기화로 보정한다.
+
+logger = logging.getLogger()
+
+UNIT_SEC = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+WEEK_OFFSET_MS = 4 * 86400 * 1000  # 1970-01-01(목) -> 바이낸스 주봉은 월요일 00:00 UTC 시작
+MAX_WAIT_SEC = 300                 # 긴 대기도 이 간격으로 끊어 시계 오차/종료 조건을 다시 확인
+STOP_CHECK_SEC = 1.0               # 중단 조건(stop)이 있으면 이 간격으로 확인 (종료 신호 반응 시간)
+
+def parse_timeframe(timeframe):
+    """'15m', '6h', '1d', '1w' -> 초
+
+    월봉('1M')은 달마다 길이가 달라 고정 간격으로 봉 경계를 계산할 수 없으므로 ValueError.
+    """
+    units = ", ".join(UNIT_SEC)
+    unit, count = timeframe[-1:], timeframe[:-1]
+    if unit == 'M':
+        raise ValueError(f"월봉 타임프레임은 지원하지 않습니다: {timeframe} (지원 단위: {units})")
+    if unit not in UNIT_SEC or not count.isdigit() or int(count) == 0:
+        raise ValueError(f"지원하지 않는 타임프레임: {timeframe} (지원 단위: {units})")
+    return int(count) * UNIT_SEC[unit]
+
+class SystemClock:
+    """실제 시계 (페이퍼 트레이딩에서는 mock_exchange.SimClock으로 교체)"""
+    def now(self): return datetime.datetime.now(timezone.utc)
+    def time(self): return time.time()
+    def sleep(self, sec): time.sleep(sec)
+
+class CandleScheduler:
+    def __init__(self, timeframe, clock, close_before_sec=600, open_delay_sec=10):
+        self.timeframe = timeframe
+        self.tf_ms = parse_timeframe(timeframe) * 1000
+        self.clock = clock
+        self.close_before_ms = int(close_before_sec * 1000)
+        self.open_delay_ms = int(open_delay_sec * 1000)
+        self.offset_ms = 0.0       # 거래소 서버 시간 - 로컬 시간
+        if self.close_before_ms >= self.tf_ms:
+            raise ValueError(f"마감 전 청산 시간({close_before_sec}초)이 봉 길이보다 깁니다: {timeframe}")
+
+    # ------------------------------------------------------------------
+    # 서버 시간
+    # ------------------------------------------------------------------
+    def sync_time(self, exchange):
+        """거래소 서버 시간과 로컬 시계 차이 측정 (요청 왕복 시간의 중간 시점 기준)"""
+        try:
+            before = self.clock.time() * 1000
+            server_ms = exchange.fetch_time()
+            after = self.clock.time() * 1000
+            self.offset_ms = server_ms - (before + after) / 2
+            if abs(self.offset_ms) > 1000:
+                logger.warning(f"⏰ 로컬 시계가 서버와 {self.offset_ms / 1000:+.1f}초 차이 납니다")
+        except Exception as e:
+            logger.error(f"서버 시간 동기화 실패 (로컬 시계 사용): {e}")
+
+    def now_ms(self):
+        """서버 기준 현재 시각 (ms)"""
+        return self.clock.time() * 1000 + self.offset_ms
+
+    # ------------------------------------------------------------------
+    # 봉 경계
+    # ------------------------------------------------------------------
+    def candle_start_ms(self, now_ms=None):
+        """현재 봉 시작 시각"""
+        now_ms = self.now_ms() if now_ms is None else now_ms
+        offset = WEEK_OFFSET_MS if self.tf_ms % (7 * 86400 * 1000) == 0 else 0
+        return int((now_ms - offset) // self.tf_ms * self.tf_ms + offset)
+
+    def next_open_ms(self, now_ms=None):
+        """다음 봉 시작 시각"""
+        return self.candle_start_ms(now_ms) + self.tf_ms
+
+    def close_deadline_ms(self, now_ms=None):
+        """현재 봉의 마감 전 청산 시각 (봉 마감 - close_before)"""
+        return self.next_open_ms(now_ms) - self.close_before_ms
+
+    def in_close_window(self, now_ms=None):
+        """마감 전 청산 ~ 다음 봉 시작 사이(휴식 구간)인지"""
+        now_ms = self.now_ms() if now_ms is None else now_ms
+        return now_ms >= self.close_deadline_ms(now_ms)
+
+    def slot_id(self, now_ms=None):
+        """봉 식별자 (청산 중복 방지용) - 봉 시작 시각 UTC 문자열"""
+        return self.to_datetime(self.candle_start_ms(now_ms)).strftime("%Y-%m-%d_%H:%M")
+
+    @staticmethod
+    def to_datetime(ms):
+        return datetime.datetime.fromtimestamp(ms / 1000, timezone.utc)
+
+    # ------------------------------------------------------------------
+    # 대기
+    # ------------------------------------------------------------------
+    def wait_until(self, deadline_ms, until=None, stop=None):
+        """서버 기준 deadline까지 대기 (until(UTC datetime)이 먼저 오거나 stop()이 참이 되면 False 반환)"""
+        until_ms = None if until is None else until.timestamp() * 1000
+        max_sleep = MAX_WAIT_SEC if stop is None else STOP_CHECK_SEC
+        while True:
+            if stop is not None and stop():
+                return False
+            now_ms = self.now_ms()
+            if until_ms is not None and now_ms >= until_ms:
+                return False
+            remaining = deadline_ms - now_ms
+            if remaining <= 0:
+                return True
+            if until_ms is not None:
+                remaining = min(remaining, until_ms - now_ms)
+            self.clock.sleep(min(remaining / 1000, max_sleep))
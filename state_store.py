@@ -0,0 +1,34 @@
+# state_store.py
+
+import os
+import json
+import threading
+
+# ==============================================================================
+# 💾 봇 상태 스냅샷
+# ==============================================================================
+# bot_state를 변경될 때마다 JSON 파일에 원자적으로 저장한다 (임시 파일 -> fsync -> 교체).
+# 재시작 시 스냅샷이 현재 봉의 것이면 목표가/할당액/포지션/청산 여부를 그대로 복구한다.
+
+_lock = threading.Lock()
+
+def save_state(path, state):
+    """상태 딕셔너리를 JSON으로 원자적 저장 (메인 루프/텔레그램 스레드 동시 호출 안전)"""
+    with _lock:
+        data = json.dumps(state, ensure_ascii=False)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+def load_state(path):
+    """저장된 상태 로드 (없거나 깨졌으면 None)"""
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -2,14 +2,105 @@
 
 import requests
 import time
+import queue
+import atexit
+import threading
 import config
+from api_metrics import metrics
 
 # ==============================================================================
 # 📞 텔레그램 알림 함수
 # ==============================================================================
+# 매매 스레드는 메시지를 큐에 넣기만 하고 즉시 반환한다.
+# 실제 전송은 백그라운드 스레드가 몰려온 메시지를 하나로 묶어, 채팅방 전송 간격을
+# 지키면서 보낸다 (429 응답 시 retry_after 만큼 대기, 그 외 실패는 지수 백오프).
+
+ENABLED = getattr(config, "TELEGRAM_ENABLED", True) # False면 전송하지 않음 (페이퍼 트레이딩/벤치마크)
+MAX_QUEUE = 1000            # 전송 대기 메시지 최대 개수 (가득 차면 새 메시지는 버림)
+MAX_MESSAGE_LEN = 4096      # 텔레그램 메시지 최대 길이
+COALESCE_WINDOW = 0.5       # 첫 메시지 이후 이 시간(초) 안에 들어온 메시지는 한 번에 전송
+MIN_INTERVAL = max(1.0, getattr(config, "TIME_SLEEP", 1.0)) # 같은 채팅방 전송 최소 간격 (초)
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0          # 재시도 대기: 1, 2, 4, 8 ... 초
+
+_queue = queue.Queue(maxsize=MAX_QUEUE)
+_worker = None
+_worker_lock = threading.Lock()
 
 def send_telegram_message(message):
-    """텔레그램 봇으로 메시지를 전송하는 함수"""
+    """텔레그램 메시지를 전송 큐에 넣고 즉시 반환 (전송은 백그라운드 스레드가 처리)"""
+    if not ENABLED: return True
+    if _worker is None or not _worker.is_alive():
+        _start_worker()
+    try:
+        _queue.put_nowait(message)
+        return True
+    except queue.Full:
+        print(f"[텔레그램] 전송 큐 초과로 메시지 버림: {message[:50]}")
+        return False
+
+def flush(timeout=10.0):
+    """큐에 남은 메시지가 모두 전송될 때까지 대기 (종료 시 호출)"""
+    deadline = time.monotonic() + timeout
+    with _queue.all_tasks_done:
+        while _queue.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"[텔레그램] 종료 대기 시간 초과: 미전송 {_queue.unfinished_tasks}건")
+                return False
+            _queue.all_tasks_done.wait(remaining)
+    return True
+
+def _start_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_sender_loop, name="telegram-sender", daemon=True)
+            _worker.start()
+
+def _sender_loop():
+    last_sent = 0.0
+    while True:
+        batch = [_queue.get()]
+
+        # 짧은 시간 안에 몰려온 메시지를 모아서 한 번에 전송
+        deadline = time.monotonic() + COALESCE_WINDOW
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0: break
+            try:
+                batch.append(_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        try:
+            for text in _coalesce(batch):
+                wait = MIN_INTERVAL - (time.monotonic() - last_sent)
+                if wait > 0: time.sleep(wait)
+                _post_with_retry(text)
+                last_sent = time.monotonic()
+        except Exception as e:
+            print(f"[텔레그램] 전송 스레드 오류: {e}")
+        finally:
+            for _ in batch:
+                _queue.task_done()
+
+def _coalesce(messages):
+    """메시지들을 최대 길이를 넘지 않는 선에서 빈 줄로 이어 붙임"""
+    chunks = []
+    current = ""
+    for msg in messages:
+        if current and len(current) + 2 + len(msg) > MAX_MESSAGE_LEN:
+            chunks.append(current)
+            current = msg
+        else:
+            current = f"{current}\n\n{msg}" if current else msg
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _post_with_retry(message):
+    """텔레그램 봇으로 메시지를 전송 (속도 제한/일시 오류 시 재시도)"""
     url = f"https://api.telegram.org/bot{config.TELEGRAM_BOT_TOKEN}/sendMessage"
     payload = {
         'chat_id': config.TELEGRAM_CHAT_ID,
@@ -17,11 +108,27 @@ def send_telegram_message(message):
         # 'parse_mode': 'Markdown'
         'parse_mode': 'HTML'
     }
-    try:
-        response = requests.post(url, data=payload)
-        response.raise_for_status() 
-        time.sleep(config.TIME_SLEEP)
-        return True
-    except Exception as e:
-        print(f"[텔레그램] 메시지 전송 실패: {e}")
-        return False
\ No newline at end of file
+    for attempt in range(MAX_RETRIES):
+        try:
+            with metrics.timed("telegram.sendMessage"):
+                response = requests.post(url, data=payload, timeout=10)
+            if response.status_code == 429:
+                # 텔레그램이 알려준 대기 시간만큼 쉬고 재전송
+                retry_after = response.json().get('parameters', {}).get('retry_after', BACKOFF_BASE * 2 ** attempt)
+                metrics.record_wait("telegram.sendMessage", float(retry_after))
+                time.sleep(float(retry_after))
+                continue
+            if 400 <= response.status_code < 500:
+                # 잘못된 요청(HTML 파싱 오류 등)은 재시도해도 실패하므로 바로 포기
+                print(f"[텔레그램] 메시지 전송 실패: {response.status_code} {response.text[:200]}")
+                return False
+            response.raise_for_status()
+            return True
+        except Exception as e:
+            if attempt == MAX_RETRIES - 1:
+                print(f"[텔레그램] 메시지 전송 실패: {e}")
+                break
+            time.sleep(BACKOFF_BASE * 2 ** attempt)
+    return False
+
+atexit.register(flush)
@@ -0,0 +1,45 @@
+# conftest.py
+
+import os
+import sys
+import datetime
+import pytest
+from datetime import timezone
+
+# 저장소 최상위 모듈(backtest, coin_bot ...)을 그대로 import
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import paper_trade
+
+# coin_bot은 import 시점의 config로 bot_state를 만들므로 테스트 전체가 같은 심볼 목록을 사용
+SYMBOLS = ["AAA/USDT", "BBB/USDT", "CCC/USDT", "DDD/USDT"]
+START = datetime.datetime(2025, 1, 1, tzinfo=timezone.utc)
+paper_trade.prepare_config(SYMBOLS, "1d", 0.5, "poll")
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    """모의 거래소에 연결된 coin_bot (상태 초기화, 매매 기록은 임시 폴더) -> (coin_bot, 거래소, 시계)"""
+    import coin_bot
+    import mock_exchange
+
+    start_ms = int(START.timestamp() * 1000)
+    day_ms = 24 * 60 * 60 * 1000
+    candles = {sym: mock_exchange.synthetic_candles(start_ms - day_ms, 3 * 24 * 60, base_price=100.0 * (i + 1), seed=i)
+               for i, sym in enumerate(SYMBOLS)}
+    clock = mock_exchange.SimClock(start_ms)
+    exchange = mock_exchange.MockExchange(candles, clock)
+    coin_bot.set_exchange(exchange, clock)
+
+    monkeypatch.setattr(coin_bot, "LOG_FILE", str(tmp_path / "trade_history.csv"))
+    monkeypatch.setattr(coin_bot, "STATE_FILE", None)
+    monkeypatch.setattr(coin_bot, "MARKET_CACHE_FILE", None)
+    monkeypatch.setitem(coin_bot.bot_state, "is_active", True)
+    monkeypatch.setitem(coin_bot.bot_state, "temp_pause", False)
+    monkeypatch.setitem(coin_bot.bot_state, "period_capital", 0.0)
+    monkeypatch.setitem(coin_bot.bot_state, "positions", {sym: False for sym in SYMBOLS})
+    monkeypatch.setitem(coin_bot.bot_state, "targets", {sym: {"long": 0.0} for sym in SYMBOLS})
+    monkeypatch.setitem(coin_bot.bot_state, "entry_orders", {})
+    yield coin_bot, exchange, clock
+    coin_bot.close_journal()
@@ -0,0 +1,72 @@
+# test_account_cache.py
+
+import threading
+from account_cache import AccountCache
+from mock_exchange import SimClock
+from request_budget import RequestBudget, CRITICAL, LOW
+
+class SlowExchange:
+    """첫 fetch_positions 호출을 release가 설정될 때까지 붙잡는 거래소 (예산 대기 중인 저순위 조회 모사)"""
+
+    def __init__(self):
+        self.calls = 0
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def fetch_positions(self):
+        self.calls += 1
+        n = self.calls
+        if n == 1:
+            self.entered.set()
+            self.release.wait(5)
+        return [n]
+
+    def fetch_balance(self):
+        return {}
+
+def test_ttl_follows_injected_clock():
+    clock = SimClock(0)
+    exchange = SlowExchange()
+    exchange.release.set()
+    cache = AccountCache(exchange, ttl=2.0, clock=clock)
+
+    assert cache.positions() == [1]
+    clock.sleep(1.0)
+    assert cache.positions() == [1]
+    clock.sleep(1.5)
+    assert cache.positions() == [2]
+
+def test_critical_caller_does_not_wait_for_low_holder():
+    clock = SimClock(0)
+    budget = RequestBudget(clock=clock)
+    exchange = SlowExchange()
+    cache = AccountCache(exchange, clock=clock, budget=budget)
+
+    def low_reader():
+        budget.set_thread_priority(LOW)
+        cache.positions(max_age=0)
+
+    thread = threading.Thread(target=low_reader)
+    thread.start()
+    assert exchange.entered.wait(5)
+    try:
+        with budget.priority(CRITICAL):
+            assert cache.positions(max_age=0) == [2]
+    finally:
+        exchange.release.set()
+        thread.join(5)
+
+def test_invalidate_discards_in_flight_result():
+    clock = SimClock(0)
+    exchange = SlowExchange()
+    cache = AccountCache(exchange, clock=clock)
+
+    thread = threading.Thread(target=cache.positions)
+    thread.start()
+    assert exchange.entered.wait(5)
+    clock.sleep(0.5)
+    cache.invalidate()          # 조회 도중 주문 체결 -> 진행 중인 조회 결과는 캐시하지 않음
+    exchange.release.set()
+    thread.join(5)
+
+    assert cache.positions() == [2]
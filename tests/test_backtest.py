@@ -0,0 +1,50 @@
+# test_backtest.py
+
+import numpy as np
+import pandas as pd
+import pytest
+import backtest
+import candle_cache
+from mock_exchange import synthetic_candles
+
+HOUR_MS = 3600 * 1000
+TIMEFRAMES = ["6h", "12h", "1d"]
+
+def make_data_map(timeframe, n_symbols=4, days=60):
+    """fetch_all_data와 같은 형식의 {심볼: DataFrame} (첫 심볼 외에는 중간 봉이 빠진 데이터)"""
+    rng = np.random.default_rng(1)
+    data_map = {}
+    for i in range(n_symbols):
+        base = synthetic_candles(0, days * 24, base_price=100.0 * (i + 1), vol=0.01, seed=i)
+        base[:, 0] = np.arange(len(base)) * HOUR_MS
+        if i > 0:
+            # 흩어진 결측 + 봉 전체가 빠지는 이틀 연속 결측 (점검/상장 전)
+            gaps = np.r_[rng.choice(len(base), size=len(base) // 10, replace=False), np.arange(24 * i * 5, 24 * (i * 5 + 2))]
+            base = np.delete(base, np.unique(gaps), axis=0)
+        candles = candle_cache.resample(base, timeframe)
+
+        df = pd.DataFrame(candles, columns=candle_cache.COLUMNS)
+        df['datetime'] = pd.to_datetime(df['datetime'].astype(np.int64), unit='ms')
+        df.set_index('datetime', inplace=True)
+        df['range'] = df['high'].shift(1) - df['low'].shift(1)
+        data_map[f"S{i}/USDT"] = df
+    return data_map
+
+@pytest.mark.parametrize("timeframe", TIMEFRAMES)
+def test_vectorized_backtest_matches_loop(timeframe):
+    data_map = make_data_map(timeframe)
+    for k in backtest.K_VALUES:
+        expected = np.asarray(backtest.run_single_backtest_loop(timeframe, k, data_map))
+        curve = backtest.run_single_backtest(timeframe, k, data_map)
+        assert np.allclose(curve, expected, rtol=1e-12, atol=0)
+
+def test_parallel_grid_matches_serial():
+    raw_data = {tf: make_data_map(tf) for tf in TIMEFRAMES}
+    k_values = [0.3, 0.5, 0.7]
+    serial = backtest.run_grid_serial(raw_data, TIMEFRAMES, k_values)
+    parallel = backtest.run_grid_parallel(raw_data, TIMEFRAMES, k_values, workers=2)
+
+    assert [(tf, k) for tf, k, _, _ in parallel] == [(tf, k) for tf, k, _, _ in serial]
+    for (_, _, curve, exposure), (_, _, p_curve, p_exposure) in zip(serial, parallel):
+        assert np.array_equal(curve, p_curve)
+        assert np.array_equal(exposure, p_exposure)
@@ -0,0 +1,45 @@
+# test_backtest_metrics.py
+
+import numpy as np
+import pandas as pd
+import backtest_metrics
+
+INITIAL = 10000.0
+YEARS = 2.0
+PPY = 365
+
+def reference_metrics(curve):
+    """이전 evaluate_curve의 셀별 pd.Series 계산 (시작 자산을 첫 고점으로 포함하도록 앞에 붙임)"""
+    final = curve[-1]
+    cagr = (final / INITIAL) ** (1 / YEARS) - 1
+    s = pd.Series(np.r_[INITIAL, curve])
+    peak = s.cummax()
+    mdd = ((s - peak) / peak).min()
+    calmar = cagr / abs(mdd) if mdd != 0 else 0
+    return {"Final Balance": final, "Return": (final - INITIAL) / INITIAL * 100,
+            "CAGR": cagr * 100, "MDD": mdd * 100, "Score (Calmar)": calmar}
+
+def test_vectorized_metrics_match_per_curve_reference():
+    rng = np.random.default_rng(0)
+    curves = INITIAL * np.cumprod(1 + rng.normal(0.001, 0.02, (20, int(YEARS * PPY))), axis=1)
+    curves[0] = INITIAL * np.linspace(0.9, 1.5, curves.shape[1])    # 첫 봉 손실 -> MDD에 포함
+    curves[1] = INITIAL * np.linspace(1.01, 1.5, curves.shape[1])   # 손실 없음 -> MDD 0, Calmar 0
+
+    metrics = backtest_metrics.compute_metrics(curves, INITIAL, YEARS, PPY)
+    for i, curve in enumerate(curves):
+        for name, value in reference_metrics(curve).items():
+            assert np.isclose(metrics[name][i], value, rtol=1e-10, atol=1e-12), (i, name)
+    assert np.isclose(metrics["MDD"][0], -10.0)
+
+def test_exposure_metrics():
+    curve = INITIAL * np.array([1.0, 1.1, 1.1, 1.0])
+    exposure = np.array([0.0, 1.0, 0.0, 0.5])
+    m = backtest_metrics.compute_metrics(curve, INITIAL, 1.0, 4, exposure=exposure, leverage=3)
+    assert np.isclose(m["Win Rate"][0], 50.0)       # 진입 봉 2개 중 상승 1개
+    assert np.isclose(m["Exposure"][0], 37.5)
+    assert np.isclose(m["Turnover"][0], 1.5 * 2 * 3)
+
+def test_sort_table_direction():
+    df = pd.DataFrame({"K": [0.1, 0.2, 0.3], "Score (Calmar)": [1.0, 3.0, 2.0], "MDD Days": [30, 10, 20]})
+    assert list(backtest_metrics.sort_table(df)["K"]) == [0.2, 0.3, 0.1]
+    assert list(backtest_metrics.sort_table(df, "MDD Days")["K"]) == [0.2, 0.3, 0.1]
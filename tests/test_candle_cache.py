@@ -0,0 +1,116 @@
+# test_candle_cache.py
+
+import numpy as np
+import pytest
+import pandas as pd
+import candle_cache
+from mock_exchange import synthetic_candles
+
+HOUR_MS = 3600 * 1000
+
+def hourly(hours, seed=0):
+    """synthetic_candles(1분 간격)를 1시간 간격 캔들로 사용"""
+    candles = synthetic_candles(0, hours, seed=seed)
+    candles[:, 0] = np.arange(hours) * HOUR_MS
+    return candles
+
+def test_resample_matches_pandas_on_gapped_data():
+    base = hourly(24 * 20)
+    base = np.delete(base, np.r_[30:37, 100:130, 300], axis=0)      # 거래소 점검 등으로 빠진 봉
+
+    df = pd.DataFrame(base, columns=candle_cache.COLUMNS)
+    df.index = pd.to_datetime(df['datetime'], unit='ms')
+    expected = df.resample("6h").agg({"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}).dropna()
+
+    out = candle_cache.resample(base, "6h")
+    assert np.array_equal(out[:, 0], (expected.index - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1))
+    assert np.allclose(out[:, 1:], expected.to_numpy())
+
+def test_resampled_cache_refreshes_when_last_bar_is_rewritten(tmp_path):
+    base = hourly(24 * 3)
+    first = candle_cache.resampled_candles("AAA/USDT", "6h", base, "1h", str(tmp_path))
+
+    # update_candles처럼 마지막 봉만 같은 시각으로 덮어씀 (행 수/마지막 시각 동일, 파일 수정 시각과 무관)
+    updated = base.copy()
+    updated[-1, 2] = updated[:, 2].max() * 2
+    updated[-1, 4] = updated[-1, 2]
+    second = candle_cache.resampled_candles("AAA/USDT", "6h", updated, "1h", str(tmp_path))
+    assert second[-1, 2] == updated[-1, 2] != first[-1, 2]
+    assert second[-1, 4] == updated[-1, 4]
+
+    # 같은 기준 캔들이면 캐시 재사용
+    cached = candle_cache.resampled_candles("AAA/USDT", "6h", updated, "1h", str(tmp_path))
+    assert isinstance(cached, np.memmap)
+    assert np.array_equal(cached, second)
+
+def test_resampled_cache_refreshes_when_bars_are_appended(tmp_path):
+    base = hourly(24 * 3)
+    candle_cache.resampled_candles("AAA/USDT", "6h", base[:-6], "1h", str(tmp_path))
+    out = candle_cache.resampled_candles("AAA/USDT", "6h", base, "1h", str(tmp_path))
+    assert len(out) == 12
+
+class PagedExchange:
+    """fetch_ohlcv를 limit개씩 잘라 돌려주는 가짜 거래소 (now 이후 봉은 없음)"""
+    def __init__(self, candles, now):
+        self.candles = candles
+        self.now = now
+        self.calls = 0
+
+    def milliseconds(self):
+        return self.now
+
+    def fetch_ohlcv(self, symbol, timeframe, since, limit=1000):
+        self.calls += 1
+        rows = self.candles[(self.candles[:, 0] >= since) & (self.candles[:, 0] < self.now)]
+        return rows[:limit].tolist()
+
+def update(exchange, tmp_path):
+    return candle_cache.update_candles(exchange, "AAA/USDT", "1h", 0, cache_dir=str(tmp_path))
+
+def test_update_streams_pages_and_rewrites_last_bar(tmp_path, monkeypatch):
+    monkeypatch.setattr(candle_cache.time, "sleep", lambda s: None)
+    full = hourly(2500)
+    exchange = PagedExchange(full, now=2000 * HOUR_MS)
+
+    first = update(exchange, tmp_path)
+    assert isinstance(first, np.memmap)
+    assert exchange.calls == 3                                      # 1000봉씩 페이지 단위 수집
+    assert np.array_equal(first, full[:2000])
+    del first
+
+    # 마지막 봉이 미완성이었다면 다음 갱신에서 같은 시각으로 덮어쓰고 이후 봉을 이어 씀
+    changed = full.copy()
+    changed[1999, 4] += 1.0
+    exchange.candles, exchange.now = changed, 2500 * HOUR_MS
+    second = update(exchange, tmp_path)
+    assert isinstance(second, np.memmap)
+    assert np.array_equal(second, changed)
+
+def test_update_rewrites_legacy_cache_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(candle_cache.time, "sleep", lambda s: None)
+    full = hourly(1500)
+    # 헤더를 제자리에서 고칠 수 없는 형식 (.npy 2.0) -> 기존 행을 옮겨 새 파일로 씀
+    with open(candle_cache.cache_path("AAA/USDT", "1h", str(tmp_path)), 'wb') as f:
+        np.lib.format.write_array(f, full[:1200], version=(2, 0))
+
+    out = update(PagedExchange(full, now=1500 * HOUR_MS), tmp_path)
+    assert np.array_equal(out, full)
+    with open(candle_cache.cache_path("AAA/USDT", "1h", str(tmp_path)), 'rb') as f:
+        assert np.lib.format.read_magic(f) == (1, 0)
+
+def test_interrupted_update_keeps_previous_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(candle_cache.time, "sleep", lambda s: None)
+    full = hourly(3000)
+    update(PagedExchange(full, now=1000 * HOUR_MS), tmp_path)
+
+    class Broken(PagedExchange):
+        def fetch_ohlcv(self, *args, **kwargs):
+            if self.calls == 1:
+                raise ConnectionError("끊김")
+            return super().fetch_ohlcv(*args, **kwargs)
+
+    with pytest.raises(ConnectionError):
+        update(Broken(full, now=3000 * HOUR_MS), tmp_path)
+    # 이미 쓴 페이지가 있어도 헤더는 마지막에 고치므로 이전 행 수 그대로 읽힘
+    kept = candle_cache.load_candles("AAA/USDT", "1h", str(tmp_path))
+    assert np.array_equal(kept, full[:1000])
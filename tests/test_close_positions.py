@@ -0,0 +1,46 @@
+# test_close_positions.py
+
+import trade_journal
+
+def open_long(coin_bot, exchange, sym, amount=1.0):
+    exchange.create_market_buy_order(sym, amount)
+    coin_bot.bot_state["positions"][sym] = "LONG"
+
+def partial_fills(monkeypatch, exchange, counts):
+    """counts[심볼]번의 reduceOnly 주문은 요청 수량의 절반만 체결"""
+    original = exchange.create_order
+
+    def create_order(symbol, type, side, amount, price=None, params={}):
+        sym = symbol.split(':')[0]
+        if params.get('reduceOnly') and counts.get(sym, 0) > 0:
+            counts[sym] -= 1
+            amount = float(amount) / 2
+        return original(symbol, type, side, amount, price, params)
+    monkeypatch.setattr(exchange, "create_order", create_order)
+
+def exit_rows(coin_bot, sym):
+    coin_bot.close_journal()
+    df = trade_journal.load_journal(coin_bot.LOG_FILE)
+    return df[(df["Action"] == "EXIT") & (df["Symbol"] == sym)]
+
+def test_partial_close_is_retried_until_flat(bot, monkeypatch):
+    coin_bot, exchange, _ = bot
+    open_long(coin_bot, exchange, "AAA/USDT")
+    open_long(coin_bot, exchange, "BBB/USDT")
+    partial_fills(monkeypatch, exchange, {"AAA/USDT": 1})
+
+    coin_bot.close_all_positions()
+    assert exchange.positions == {}
+    assert not coin_bot.bot_state["positions"]["AAA/USDT"]
+    rows = exit_rows(coin_bot, "AAA/USDT")
+    assert len(rows) == 2
+    assert abs(rows["Amount"].astype(float).sum() - 1.0) < 1e-9
+
+def test_partial_close_reported_when_retries_run_out(bot, monkeypatch):
+    coin_bot, exchange, _ = bot
+    open_long(coin_bot, exchange, "CCC/USDT")
+    partial_fills(monkeypatch, exchange, {"CCC/USDT": coin_bot.CLOSE_RETRIES + 1})
+
+    coin_bot.close_all_positions()
+    assert "CCC/USDT" in exchange.positions
+    assert coin_bot.bot_state["positions"]["CCC/USDT"] == "LONG"
@@ -0,0 +1,119 @@
+# test_entry_orders.py
+
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+@pytest.fixture
+def stop_bot(bot, monkeypatch):
+    coin_bot, exchange, clock = bot
+    monkeypatch.setattr(coin_bot, "ENTRY_MODE", "stop")
+    return bot
+
+def place_stop_order(exchange, sym, offset):
+    price = exchange.fetch_ticker(sym)['last']
+    return exchange.create_order(sym, 'market', 'buy', 1.0, None, {'triggerPrice': price * offset})
+
+def test_mock_rejects_open_orders_without_symbol(stop_bot):
+    _, exchange, _ = stop_bot
+    with pytest.raises(Exception, match="without specifying a symbol"):
+        exchange.fetch_open_orders()
+
+def test_reconcile_records_stop_fill(stop_bot):
+    coin_bot, exchange, clock = stop_bot
+    sym = "AAA/USDT"
+    order = place_stop_order(exchange, sym, 1.0001)
+    target = exchange.open_orders[order['id']]['triggerPrice']
+    coin_bot.bot_state["entry_orders"][sym] = {"id": order['id'], "target": target, "amount": 1.0}
+
+    # 가격이 목표가를 넘을 때까지 시간을 진행시켜 스탑 주문 발동
+    for _ in range(24 * 60):
+        if not exchange.open_orders: break
+        clock.sleep(60)
+        exchange.fetch_time()
+    assert not exchange.open_orders
+
+    coin_bot.reconcile_entry_orders()
+    assert coin_bot.bot_state["entry_orders"] == {}
+    assert coin_bot.bot_state["positions"][sym] == "LONG"
+
+def test_reconcile_keeps_resting_orders(stop_bot):
+    coin_bot, exchange, _ = stop_bot
+    sym = "BBB/USDT"
+    order = place_stop_order(exchange, sym, 1.5)
+    coin_bot.bot_state["entry_orders"][sym] = {"id": order['id'], "target": 1.0, "amount": 1.0}
+
+    coin_bot.reconcile_entry_orders()
+    assert sym in coin_bot.bot_state["entry_orders"]
+    assert not coin_bot.bot_state["positions"][sym]
+
+def test_sweep_cancels_orders_left_by_previous_process(stop_bot):
+    coin_bot, exchange, _ = stop_bot
+    for sym in ("AAA/USDT", "CCC/USDT"):
+        place_stop_order(exchange, sym, 1.5)
+    assert len(exchange.open_orders) == 2
+
+    coin_bot.cancel_entry_orders(sweep=True)
+    assert exchange.open_orders == {}
+    assert coin_bot.bot_state["entry_orders"] == {}
+
+def test_concurrent_cancel(stop_bot):
+    coin_bot, exchange, _ = stop_bot
+    for sym in coin_bot.config.SYMBOLS:
+        order = place_stop_order(exchange, sym, 1.5)
+        coin_bot.bot_state["entry_orders"][sym] = {"id": order['id'], "target": 1.0, "amount": 1.0}
+
+    # 텔레그램 /stop과 메인 루프 청산이 동시에 취소하는 상황
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = [pool.submit(coin_bot.cancel_entry_orders) for _ in range(2)]
+        for fut in futures:
+            fut.result()
+    assert coin_bot.bot_state["entry_orders"] == {}
+    assert exchange.open_orders == {}
+
+def test_place_caps_orders_at_free_slots(stop_bot, monkeypatch):
+    coin_bot, exchange, _ = stop_bot
+    from market_watch import EntryExecutor
+    monkeypatch.setattr(coin_bot, "executor", EntryExecutor(2))
+    coin_bot.bot_state["period_capital"] = 1000.0
+    # 목표가까지 거리: CCC 1% < AAA 2% < DDD 3% < BBB 4%
+    offsets = {"AAA/USDT": 1.02, "BBB/USDT": 1.04, "CCC/USDT": 1.01, "DDD/USDT": 1.03}
+    for sym, offset in offsets.items():
+        coin_bot.bot_state["targets"][sym] = {"long": exchange.fetch_ticker(sym)['last'] * offset}
+
+    coin_bot.place_entry_orders()
+    assert set(coin_bot.bot_state["entry_orders"]) == {"CCC/USDT", "AAA/USDT"}
+    assert len(exchange.open_orders) == 2
+    assert coin_bot.used_slots() == 2
+
+    # 슬롯이 모두 찼으므로 다시 호출해도 추가 배치 없음
+    coin_bot.place_entry_orders()
+    assert len(exchange.open_orders) == 2
+
+def test_pending_orders_block_poll_entries(stop_bot, monkeypatch):
+    coin_bot, exchange, _ = stop_bot
+    from market_watch import EntryExecutor
+    monkeypatch.setattr(coin_bot, "executor", EntryExecutor(1))
+    coin_bot.bot_state["period_capital"] = 1000.0
+    order = place_stop_order(exchange, "AAA/USDT", 1.5)
+    coin_bot.bot_state["entry_orders"]["AAA/USDT"] = {"id": order['id'], "target": 1.0, "amount": 1.0}
+    # BBB는 이미 목표가를 넘었지만 남은 슬롯이 없으므로 진입하지 않음
+    coin_bot.bot_state["targets"]["BBB/USDT"] = {"long": exchange.fetch_ticker("BBB/USDT")['last'] * 0.9}
+
+    coin_bot.check_entry()
+    assert not coin_bot.bot_state["positions"]["BBB/USDT"]
+
+def test_place_sizes_orders_against_remaining_balance(stop_bot, monkeypatch):
+    coin_bot, exchange, _ = stop_bot
+    from market_watch import EntryExecutor
+    monkeypatch.setattr(coin_bot, "executor", EntryExecutor(4))
+    # 슬롯 4개 x 할당 4,000 USDT > 주문가능 10,000 USDT
+    free_usdt = exchange.fetch_balance()['USDT']['free']
+    coin_bot.bot_state["period_capital"] = free_usdt * 0.4
+    for sym in coin_bot.config.SYMBOLS:
+        coin_bot.bot_state["targets"][sym] = {"long": exchange.fetch_ticker(sym)['last'] * 1.05}
+
+    coin_bot.place_entry_orders()
+    entries = coin_bot.bot_state["entry_orders"].values()
+    margin = sum(float(e["amount"]) * e["target"] / coin_bot.config.LEVERAGE for e in entries)
+    assert margin <= free_usdt
+    assert max(float(e["amount"]) * e["target"] / coin_bot.config.LEVERAGE for e in entries) <= free_usdt * 0.4 + 1e-6
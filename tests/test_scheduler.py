@@ -0,0 +1,47 @@
+# test_scheduler.py
+
+import datetime
+import pytest
+from datetime import timezone
+import numpy as np
+import candle_cache
+from mock_exchange import SimClock, MockExchange, synthetic_candles
+from scheduler import CandleScheduler, parse_timeframe
+
+def test_parse_timeframe():
+    assert parse_timeframe("15m") == 900
+    assert parse_timeframe("6h") == 6 * 3600
+    assert parse_timeframe("1w") == 7 * 86400
+
+@pytest.mark.parametrize("timeframe", ["1M", "3M"])
+def test_monthly_timeframe_is_rejected_with_supported_units(timeframe):
+    with pytest.raises(ValueError, match="월봉.*지원 단위: s, m, h, d, w"):
+        parse_timeframe(timeframe)
+
+@pytest.mark.parametrize("timeframe", ["", "h", "0h", "1y", "1.5h"])
+def test_invalid_timeframe(timeframe):
+    with pytest.raises(ValueError, match="지원 단위"):
+        parse_timeframe(timeframe)
+
+def test_weekly_candles_start_on_monday():
+    # 2025-01-08(수) -> 주봉 시작 2025-01-06(월) 00:00 UTC
+    now = datetime.datetime(2025, 1, 8, 12, tzinfo=timezone.utc)
+    scheduler = CandleScheduler("1w", SimClock(now.timestamp() * 1000))
+    start = scheduler.to_datetime(scheduler.candle_start_ms())
+    assert start == datetime.datetime(2025, 1, 6, tzinfo=timezone.utc)
+
+def test_mock_weekly_candles_match_scheduler_and_resample():
+    # 2025-01-01(수)부터 3주 남짓 1분봉 -> 모의 거래소 주봉도 월요일 00:00 UTC 경계로 묶여야 함
+    start = datetime.datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp() * 1000
+    base = synthetic_candles(start, 24 * 60 * 24)
+    clock = SimClock(base[-1, 0] + 60_000)
+    exchange = MockExchange({"AAA/USDT": base}, clock)
+
+    weekly = np.array(exchange.fetch_ohlcv("AAA/USDT:USDT", "1w", since=int(start)))
+    monday = datetime.datetime(2025, 1, 6, tzinfo=timezone.utc).timestamp() * 1000
+    assert weekly[1, 0] == monday
+    assert weekly[-1, 0] == CandleScheduler("1w", clock).candle_start_ms()
+    assert np.allclose(weekly[1:], candle_cache.resample(base, "1w"))   # resample은 앞이 잘린 첫 주를 버림
+
+    with pytest.raises(ValueError, match="월봉"):
+        exchange.fetch_ohlcv("AAA/USDT:USDT", "1M")
@@ -0,0 +1,49 @@
+# test_shutdown.py
+
+import datetime
+import threading
+import signal
+import state_store
+from mock_exchange import SimClock
+from scheduler import CandleScheduler
+
+def test_wait_until_stops_on_request():
+    clock = SimClock(0)
+    scheduler = CandleScheduler("1d", clock)
+    calls = []
+
+    def stop():
+        calls.append(clock.time())
+        return len(calls) > 3
+
+    assert scheduler.wait_until(86400 * 1000, stop=stop) is False
+    assert clock.time() <= 3.0      # 1초 간격으로 확인하므로 3초 안에 중단
+
+def test_sigterm_handler_does_not_take_state_lock(bot, monkeypatch):
+    coin_bot, _, _ = bot
+    monkeypatch.setattr(coin_bot, "shutdown_requested", False)
+    done = threading.Event()
+
+    def save_interrupted_by_signal():
+        # 메인 스레드가 스냅샷 저장 락을 잡은 상태에서 신호가 도착한 상황
+        with state_store._lock:
+            coin_bot.handle_sigterm(signal.SIGTERM, None)
+        done.set()
+
+    thread = threading.Thread(target=save_interrupted_by_signal, daemon=True)
+    thread.start()
+    assert done.wait(5)
+    assert coin_bot.shutdown_requested
+
+def test_main_returns_after_sigterm(bot, monkeypatch, tmp_path):
+    coin_bot, _, clock = bot
+    state_file = tmp_path / "bot_state.json"
+    monkeypatch.setattr(coin_bot, "STATE_FILE", str(state_file))
+    monkeypatch.setattr(coin_bot, "shutdown_requested", False)
+    monkeypatch.setattr(coin_bot, "latency_dumper", lambda: None)
+
+    start = clock.now()
+    coin_bot.handle_sigterm(signal.SIGTERM, None)
+    coin_bot.main(until=start + datetime.timedelta(days=1))
+    assert clock.now() - start < datetime.timedelta(minutes=1)
+    assert state_store.load_state(str(state_file)) is not None
@@ -0,0 +1,17 @@
+# test_walk_forward.py
+
+import numpy as np
+from walk_forward import make_windows, walk_forward, in_sample_baseline
+
+def test_in_sample_baseline_covers_oos_span():
+    rng = np.random.default_rng(0)
+    factors = 1 + rng.normal(0.0005, 0.01, (5, 100))
+    # 마지막 검증 구간 뒤에 남는 봉(100 - 95)이 있도록 구성
+    windows = make_windows(100, 35, 20)
+    assert windows[-1][2] < factors.shape[1]
+
+    _, oos = walk_forward(factors, windows, 365)
+    best, curve = in_sample_baseline(factors, windows, 365, "return")
+    assert len(curve) == len(oos)
+    assert np.isclose(curve[-1], np.prod(factors[best, windows[0][1]:windows[-1][2]]))
+    assert best == int(np.argmax(np.prod(factors[:, windows[0][1]:windows[-1][2]], axis=1)))
@@ -0,0 +1,259 @@
+# trade_journal.py
+
+import os
+import csv
+import json
+import time
+import atexit
+import argparse
+import datetime
+import threading
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# 📒 매매 기록 (버퍼링 CSV + 컬럼형 아카이브)
+# ==============================================================================
+# 매매 스레드는 record()로 행을 버퍼에 넣고 바로 반환한다. 백그라운드 스레드가 FLUSH_SEC마다
+# 열어 둔 파일 핸들에 모아서 쓰고, 종료 시(close/atexit) flush + fsync 한다.
+# CSV가 ROTATE_ROWS행을 넘으면 {CSV 이름}_archive/ 아래 .npz 세그먼트(컬럼별 배열)로 옮기고
+# index.json에 세그먼트별 기간을 기록하므로, 수개월 치 손익 조회도 필요한 세그먼트만 바로 읽는다.
+#   python trade_journal.py trade_history.csv --days 90          (심볼별 손익 요약)
+#   python trade_journal.py trade_history.csv --rotate           (현재 CSV를 즉시 아카이브로 이동)
+
+SCHEMA = ['Time', 'Timestamp', 'Action', 'Symbol', 'Price', 'Amount', 'Value', 'Fee', 'Order ID',
+          'Target', 'Signal Time', 'Sent Time', 'Fill Time', 'Note']
+FLOAT_COLUMNS = ['Price', 'Amount', 'Value', 'Fee', 'Target']
+INT_COLUMNS = ['Timestamp', 'Signal Time', 'Sent Time', 'Fill Time'] # epoch ms (없으면 -1)
+TEXT_COLUMNS = ['Time', 'Action', 'Symbol', 'Order ID', 'Note']
+LEGACY_COLUMNS = {'Value(USDT)': 'Value'} # 이전 헤더 이름 -> 현재 이름
+
+FLUSH_SEC = 1.0             # 버퍼를 파일에 쓰는 주기 (초)
+ROTATE_ROWS = 5000          # CSV 행 수가 이를 넘으면 아카이브 세그먼트로 이동
+
+def archive_dir_for(path):
+    """trade_history.csv -> trade_history_archive/"""
+    return os.path.splitext(path)[0] + "_archive"
+
+class TradeJournal:
+    def __init__(self, path, flush_sec=FLUSH_SEC, rotate_rows=ROTATE_ROWS):
+        self.path = path
+        self.archive_dir = archive_dir_for(path)
+        self.flush_sec = flush_sec
+        self.rotate_rows = rotate_rows
+        self._buffer = []
+        self._lock = threading.Lock()        # 버퍼 보호
+        self._file_lock = threading.Lock()   # 파일 핸들/회전 보호
+        self._wake = threading.Event()
+        self._closed = False
+        self._open()
+        self._thread = threading.Thread(target=self._flush_loop, name="trade-journal", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------
+    # 기록
+    # ------------------------------------------------------------------
+    def record(self, row):
+        """행(dict, SCHEMA 키) 추가 - 파일 I/O 없이 즉시 반환"""
+        with self._lock:
+            self._buffer.append([row.get(col, "") for col in SCHEMA])
+
+    def flush(self, sync=False):
+        """버퍼를 파일에 기록 (sync=True면 fsync까지)"""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        with self._file_lock:
+            if self._file is None: return
+            if rows:
+                self._writer.writerows(rows)
+                self._rows += len(rows)
+                self._file.flush()
+            if sync:
+                os.fsync(self._file.fileno())
+            if self._rows >= self.rotate_rows:
+                self._rotate_locked()
+
+    def close(self):
+        """남은 행 기록 + fsync 후 파일 닫기 (여러 번 호출해도 안전)"""
+        if self._closed: return
+        self._closed = True
+        self._wake.set()
+        self.flush(sync=True)
+        with self._file_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def rotate(self):
+        """현재 CSV를 아카이브 세그먼트로 옮기고 새 CSV 시작"""
+        self.flush(sync=True)
+        with self._file_lock:
+            self._rotate_locked()
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait(self.flush_sec)
+            if self._closed: break
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[매매 기록] 파일 기록 실패: {e}")
+
+    # ------------------------------------------------------------------
+    # 파일 / 아카이브
+    # ------------------------------------------------------------------
+    def _open(self):
+        # 헤더가 현재 스키마와 다르면(이전 버전 CSV) 아카이브로 옮긴 뒤 새로 시작
+        if os.path.isfile(self.path) and os.path.getsize(self.path) > 0:
+            with open(self.path, newline='', encoding='utf-8') as f:
+                header = next(csv.reader(f), [])
+            if header != SCHEMA:
+                archive_csv(self.path, self.archive_dir)
+                os.remove(self.path)
+
+        is_new = not os.path.isfile(self.path) or os.path.getsize(self.path) == 0
+        self._file = open(self.path, mode='a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        if is_new:
+            self._writer.writerow(SCHEMA)
+            self._file.flush()
+            self._rows = 0
+        else:
+            with open(self.path, encoding='utf-8') as f:
+                self._rows = max(0, sum(1 for _ in f) - 1)
+
+    def _rotate_locked(self):
+        if self._rows == 0: return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        archive_csv(self.path, self.archive_dir)
+        os.remove(self.path)
+        self._open()
+
+def _local_ms(text):
+    """'YYYY-mm-dd HH:MM:SS' (로컬 시각) -> epoch ms"""
+    try:
+        return int(time.mktime(time.strptime(text, "%Y-%m-%d %H:%M:%S")) * 1000)
+    except (TypeError, ValueError):
+        return -1
+
+def read_csv(path):
+    """CSV(현재/이전 스키마) -> 현재 스키마 DataFrame"""
+    df = pd.read_csv(path, dtype=str, keep_default_na=False).rename(columns=LEGACY_COLUMNS)
+    for col in SCHEMA:
+        if col not in df.columns:
+            df[col] = ""
+    df = df[SCHEMA].copy()
+    for col in FLOAT_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    for col in INT_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(-1).astype(np.int64)
+    # Timestamp가 없는 이전 기록은 Time 문자열로 계산
+    missing = df['Timestamp'] < 0
+    if missing.any():
+        df.loc[missing, 'Timestamp'] = df.loc[missing, 'Time'].map(_local_ms)
+    return df
+
+def archive_csv(path, archive_dir):
+    """CSV를 컬럼별 배열 .npz 세그먼트로 저장하고 index.json 갱신"""
+    df = read_csv(path)
+    if df.empty: return None
+    os.makedirs(archive_dir, exist_ok=True)
+    start_ms, end_ms = int(df['Timestamp'].min()), int(df['Timestamp'].max())
+    name = f"seg_{start_ms}_{int(time.time() * 1000)}.npz"
+
+    arrays = {col: df[col].to_numpy(dtype=np.float64) for col in FLOAT_COLUMNS}
+    arrays.update({col: df[col].to_numpy(dtype=np.int64) for col in INT_COLUMNS})
+    arrays.update({col: df[col].to_numpy(dtype=str) for col in TEXT_COLUMNS})
+    tmp_path = os.path.join(archive_dir, name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, os.path.join(archive_dir, name))
+
+    index = load_index(archive_dir)
+    index.append({"file": name, "start_ms": start_ms, "end_ms": end_ms, "rows": len(df)})
+    index.sort(key=lambda seg: seg["start_ms"])
+    tmp_index = os.path.join(archive_dir, "index.json.tmp")
+    with open(tmp_index, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp_index, os.path.join(archive_dir, "index.json"))
+    return name
+
+def load_index(archive_dir):
+    path = os.path.join(archive_dir, "index.json")
+    if not os.path.isfile(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def load_journal(path, start_ms=None, end_ms=None):
+    """아카이브(기간이 겹치는 세그먼트만) + 현재 CSV를 합친 매매 기록"""
+    frames = []
+    archive_dir = archive_dir_for(path)
+    for seg in load_index(archive_dir):
+        if start_ms is not None and seg["end_ms"] < start_ms: continue
+        if end_ms is not None and seg["start_ms"] > end_ms: continue
+        with np.load(os.path.join(archive_dir, seg["file"])) as data:
+            frames.append(pd.DataFrame({col: data[col] for col in SCHEMA}))
+    if os.path.isfile(path) and os.path.getsize(path) > 0:
+        frames.append(read_csv(path))
+    if not frames:
+        return pd.DataFrame(columns=SCHEMA)
+
+    df = pd.concat(frames, ignore_index=True)
+    if start_ms is not None: df = df[df['Timestamp'] >= start_ms]
+    if end_ms is not None: df = df[df['Timestamp'] <= end_ms]
+    return df.sort_values('Timestamp', kind='stable').reset_index(drop=True)
+
+def round_trips(df):
+    """진입(BUY_LONG) -> 청산(EXIT) 쌍으로 묶은 거래 목록 (심볼별 순서대로 매칭)"""
+    trips = []
+    open_entries = {}
+    for row in df.itertuples(index=False):
+        action, sym = row.Action, row.Symbol
+        if action.startswith("BUY"):
+            open_entries[sym] = row
+        elif action == "EXIT" and sym in open_entries:
+            entry = open_entries.pop(sym)
+            amount = min(entry.Amount, row.Amount) if row.Amount > 0 else entry.Amount
+            fees = np.nan_to_num(entry.Fee) + np.nan_to_num(row.Fee)
+            pnl = (row.Price - entry.Price) * amount - fees if row.Price > 0 else np.nan
+            trips.append({
+                "Symbol": sym, "Entry Time": entry.Timestamp, "Exit Time": row.Timestamp,
+                "Entry": entry.Price, "Exit": row.Price, "Amount": amount, "Target": entry.Target,
+                "Fees": fees, "PnL": pnl, "Entry Note": entry.Note, "Exit Note": row.Note,
+                # 주문 시각 (epoch ms, 없으면 -1) - execution_report.py 지연 분석용
+                "Entry Signal": entry[SCHEMA.index('Signal Time')], "Entry Sent": entry[SCHEMA.index('Sent Time')],
+                "Entry Fill": entry[SCHEMA.index('Fill Time')], "Exit Signal": row[SCHEMA.index('Signal Time')],
+                "Exit Fill": row[SCHEMA.index('Fill Time')],
+            })
+    return pd.DataFrame(trips)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="매매 기록 손익 요약 / 아카이브 관리")
+    parser.add_argument("path", nargs="?", default="trade_history.csv")
+    parser.add_argument("--days", type=float, default=None, help="최근 N일만 조회")
+    parser.add_argument("--rotate", action="store_true", help="현재 CSV를 아카이브로 이동")
+    args = parser.parse_args()
+
+    if args.rotate:
+        journal = TradeJournal(args.path)
+        journal.rotate()
+        journal.close()
+        print(f"📦 아카이브 세그먼트 {len(load_index(archive_dir_for(args.path)))}개")
+
+    start_ms = None if args.days is None else int((time.time() - args.days * 86400) * 1000)
+    t0 = time.perf_counter()
+    df = load_journal(args.path, start_ms)
+    load_ms = (time.perf_counter() - t0) * 1000
+    trips = round_trips(df)
+    print(f"📒 매매 기록 {len(df):,}행 / 왕복 거래 {len(trips):,}건 (로드 {load_ms:.1f}ms)")
+    if not trips.empty:
+        summary = trips.groupby("Symbol").agg(Trades=("PnL", "size"), PnL=("PnL", "sum"), Fees=("Fees", "sum"),
+                                             WinRate=("PnL", lambda s: (s > 0).mean() * 100))
+        print(summary.to_string(formatters={"PnL": "${:+,.2f}".format, "Fees": "${:,.2f}".format,
+                                            "WinRate": "{:.1f}%".format}))
+        first = datetime.datetime.fromtimestamp(trips["Entry Time"].min() / 1000)
+        print(f"합계: ${trips['PnL'].sum():+,.2f} (수수료 ${trips['Fees'].sum():,.2f}, {first:%Y-%m-%d} 이후)")
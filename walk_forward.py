@@ -0,0 +1,133 @@
+# walk_forward.py
+
+import argparse
+import numpy as np
+import pandas as pd
+import backtest
+import backtest_metrics
+from scheduler import parse_timeframe
+
+# ==============================================================================
+# 🚶 워크포워드 최적화
+# ==============================================================================
+# 학습 구간에서 K를 고르고 바로 뒤 검증 구간에 적용하는 과정을 구간을 밀어가며 반복하고,
+# 검증 구간 결과만 이어 붙인 표본 외(OOS) 자산 곡선을 보고한다.
+# (TF, K)별 봉 단위 포트폴리오 배율은 전체 기간에 대해 한 번만 계산하고 모든 구간이 잘라서 재사용하므로,
+# 구간이 50개여도 비용은 전체 그리드 1회와 비슷하다.
+#   python walk_forward.py --train-days 180 --test-days 30 --objective calmar --offline
+
+OBJECTIVES = {"return": "Return", "calmar": "Score (Calmar)", "sharpe": "Sharpe", "sortino": "Sortino"}
+
+def portfolio_factors(mats, k_values):
+    """(K x 시간) 봉별 포트폴리오 배율 - 매 봉 균등 재분배(run_vectorized_backtest와 동일)"""
+    return np.stack([backtest.compute_bar_factors(k, mats)[0].mean(axis=1) for k in k_values])
+
+def make_windows(n_bars, train_bars, test_bars, anchored=False):
+    """[(학습 시작, 학습 끝, 검증 끝)] 봉 인덱스 목록 (검증 구간은 겹치지 않고 이어짐)"""
+    windows = []
+    start = 0
+    while start + train_bars + test_bars <= n_bars:
+        train_lo = 0 if anchored else start
+        windows.append((train_lo, start + train_bars, start + train_bars + test_bars))
+        start += test_bars
+    return windows
+
+def walk_forward(factors, windows, periods_per_year, objective="calmar"):
+    """구간마다 학습 구간 objective 최고 K 인덱스를 고르고 검증 구간 배율을 이어 붙임
+
+    반환값: (구간별 선택 K 인덱스, 이어 붙인 OOS 배율)
+    """
+    metric = OBJECTIVES[objective]
+    choices, oos = [], []
+    for train_lo, train_hi, test_hi in windows:
+        # 학습 구간 자산 곡선 (K x 학습 봉) -> 지표를 K 전체에 대해 한 번에 계산
+        curves = np.cumprod(factors[:, train_lo:train_hi], axis=1)
+        years = (train_hi - train_lo) / periods_per_year
+        scores = backtest_metrics.compute_metrics(curves, 1.0, years, periods_per_year)[metric]
+        best = int(np.nanargmax(scores))
+        choices.append(best)
+        oos.append(factors[best, train_hi:test_hi])
+    return choices, np.concatenate(oos) if oos else np.empty(0)
+
+def in_sample_baseline(factors, windows, periods_per_year, objective="calmar"):
+    """OOS와 같은 구간(첫 검증 시작 ~ 마지막 검증 끝)을 다 보고 고른 고정 K -> (K 인덱스, 배율 누적 곡선)"""
+    curves = np.cumprod(factors[:, windows[0][1]:windows[-1][2]], axis=1)
+    years = curves.shape[1] / periods_per_year
+    scores = backtest_metrics.compute_metrics(curves, 1.0, years, periods_per_year)[OBJECTIVES[objective]]
+    best = int(np.nanargmax(scores))
+    return best, curves[best]
+
+def run_walk_forward(raw_data, timeframes, k_values, train_days, test_days, objective="calmar", anchored=False):
+    """TF별 워크포워드 결과표와 구간별 선택 내역"""
+    rows, details = [], {}
+    for tf in timeframes:
+        time_index, mats = backtest.build_market_matrix(raw_data[tf])
+        factors = portfolio_factors(mats, k_values)
+        ppy = backtest.periods_per_year(tf)
+        bars_per_day = 86400 / parse_timeframe(tf)
+        windows = make_windows(factors.shape[1], int(train_days * bars_per_day), int(test_days * bars_per_day), anchored)
+        if not windows:
+            print(f"⚠️ {tf}: 데이터가 학습+검증 구간보다 짧습니다")
+            continue
+
+        choices, oos = walk_forward(factors, windows, ppy, objective)
+        oos_curve = backtest.TOTAL_CAPITAL * np.cumprod(oos)
+        m = backtest_metrics.compute_metrics(oos_curve, backtest.TOTAL_CAPITAL, len(oos) / ppy, ppy)
+
+        # 비교: 전체 기간을 보고 고른 고정 K (표본 내 최적 = 과최적화 상한)
+        in_sample_best, is_curve = in_sample_baseline(factors, windows, ppy, objective)
+
+        chosen = [k_values[i] for i in choices]
+        rows.append({
+            "TF": tf,
+            "Windows": len(windows),
+            "OOS Return": m["Return"][0],
+            "OOS CAGR": m["CAGR"][0],
+            "OOS MDD": m["MDD"][0],
+            "OOS Calmar": m["Score (Calmar)"][0],
+            "OOS Sharpe": m["Sharpe"][0],
+            "K (mode)": max(set(chosen), key=chosen.count),
+            "K Changes": int(np.sum(np.diff(choices) != 0)),
+            "In-Sample Best K": k_values[in_sample_best],
+            "In-Sample Return": (is_curve[-1] - 1) * 100,
+        })
+        details[tf] = pd.DataFrame({
+            "Train Start": [time_index[w[0]] for w in windows],
+            "Test Start": [time_index[w[1]] for w in windows],
+            "Test End": [time_index[w[2] - 1] for w in windows],
+            "K": chosen,
+            "Test Return": [(np.prod(factors[i, w[1]:w[2]]) - 1) * 100 for i, w in zip(choices, windows)],
+        })
+    return pd.DataFrame(rows), details
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="변동성 돌파 전략 워크포워드 최적화")
+    parser.add_argument("--train-days", type=float, default=180)
+    parser.add_argument("--test-days", type=float, default=30)
+    parser.add_argument("--objective", default="calmar", choices=list(OBJECTIVES))
+    parser.add_argument("--anchored", action="store_true", help="학습 구간 시작을 데이터 처음에 고정 (확장 구간)")
+    parser.add_argument("--offline", action="store_true", help="네트워크 없이 로컬 캐시만 사용")
+    parser.add_argument("--verbose", action="store_true", help="구간별 선택 K와 검증 수익률 출력")
+    args = parser.parse_args()
+
+    raw_data = backtest.fetch_all_data(backtest.SYMBOLS, backtest.TIMEFRAMES, backtest.FETCH_DAYS, offline=args.offline)
+    summary, details = run_walk_forward(raw_data, backtest.TIMEFRAMES, backtest.K_VALUES,
+                                        args.train_days, args.test_days, args.objective, args.anchored)
+
+    print("\n" + "=" * 120)
+    print(f"🚶 워크포워드 결과 (학습 {args.train_days:g}일 / 검증 {args.test_days:g}일, 기준: {args.objective}"
+          f"{', 확장 구간' if args.anchored else ''})")
+    print("=" * 120)
+    print(summary.to_string(index=False, formatters={
+        "OOS Return": "{:+.2f}%".format,
+        "OOS CAGR": "{:+.2f}%".format,
+        "OOS MDD": "{:.2f}%".format,
+        "OOS Calmar": "{:.2f}".format,
+        "OOS Sharpe": "{:.2f}".format,
+        "In-Sample Return": "{:+.2f}%".format,
+    }))
+    print("=" * 120)
+    if args.verbose:
+        for tf, df in details.items():
+            print(f"\n[{tf}]")
+            print(df.to_string(index=False, formatters={"Test Return": "{:+.2f}%".format}))